@@ -1,15 +1,39 @@
 """Declare app actions."""
 
-from app.util_types import RunAction
-from .generate_acuco_marker_image import generate_marker
-from .configure_perspective_correction import configure_perspective_correction
-from .autonomous_ocean_garbage_collector import autonomous_ocean_garbage_collector
-from .configure_blob_detection import configure_blob_detection
-
-
-actions: dict[str, RunAction] = {
-    'Generate ArUco marker image': generate_marker,
-    'Configure perspective correction': configure_perspective_correction,
-    'Configure blob detection': configure_blob_detection,
-    'Autonomous Ocean Garbage Collector': autonomous_ocean_garbage_collector,
+from importlib import import_module
+from typing import TYPE_CHECKING
+
+# Keep NumPy (imported by the utility types) out of the launcher
+if TYPE_CHECKING:
+    from app.util_types import RunAction
+
+# Actions as (module, run function)
+# Action modules are only imported once the action is selected,
+# so heavy dependencies (OpenCV, SciPy, tkinter, ...) are only loaded if the action requires them.
+actions: dict[str, tuple[str, str]] = {
+    'Generate ArUco marker image': ('generate_acuco_marker_image', 'generate_marker'),
+    'Generate ArUco marker sheets': ('generate_aruco_marker_sheets', 'generate_marker_sheets'),
+    'Probe camera': ('probe_camera', 'probe_camera'),
+    'Calibrate camera': ('calibrate_camera', 'calibrate_camera'),
+    'Configure perspective correction': ('configure_perspective_correction', 'configure_perspective_correction'),
+    'Detect pool boundary': ('detect_pool_boundary', 'detect_pool_boundary'),
+    'Configure blob detection': ('configure_blob_detection', 'configure_blob_detection'),
+    'Tune blob detection': ('tune_blob_detection', 'tune_blob_detection'),
+    'Autonomous Ocean Garbage Collector': ('autonomous_ocean_garbage_collector', 'autonomous_ocean_garbage_collector'),
+    'Receive telemetry': ('receive_telemetry', 'receive_telemetry'),
+    'Report startup time': ('report_startup_time', 'report_startup_time'),
 }
+
+
+def get_action_module(name: str) -> str:
+    """Get the fully qualified module name of an action."""
+    module_name, _ = actions[name]
+    return f'{__name__}.{module_name}'
+
+
+def load_action(name: str) -> 'RunAction':
+    """Import an action's module and get its run function."""
+    _, function_name = actions[name]
+    module = import_module(get_action_module(name))
+    action: RunAction = getattr(module, function_name)
+    return action
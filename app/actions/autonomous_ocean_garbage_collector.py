@@ -1,13 +1,39 @@
 """Execute autonomous ocean garbage collection."""
 
-import cv2
+import numpy as np
 from app.components.aruco import ArUco
+from app.components.background_model import BackgroundModel
 from app.components.boat import Boat, BoatUI
-from app.components.camera import Camera
+from app.components.camera import Camera, CaptureSettings
+from app.components.coverage_map import CoverageMap, CoverageUI
+from app.components.fleet import Fleet, FleetUI
 from app.components.floating_garbage import FloatingGarbageUI, FloatingGarbage
+from app.components.garbage_tracking import GarbageTracker, InterceptUI
 from app.components.main_loop import MainLoop
+from app.components.metrics import FrameMetrics, MetricsServer
+from app.components.motion_gate import MotionGate
 from app.components.opencv_ui import UI
-from app.settings import ARUCO_DICT, BOAT_MARKER_ID, BOAT_MARKER_SIZE_MM, CAMERA, MOCK_IMAGE_PATH
+from app.components.pool import Pool, PoolUI, get_frame_corners
+from app.components.pool.boundary import PoolBoundaryDetector, detect_pool_boundary
+from app.components.pose_estimation import MarkerPoseEstimator
+from app.components.session_recorder import SessionRecorder
+from app.components.stage_timer import StageTimer
+from app.components.telemetry import TelemetryPublisher
+from app.components.video_writer import AsyncVideoWriter
+from app.logger import queue_handler
+from app.settings import (ARUCO_DICT, BACKGROUND_MODEL_LEARNING_RATE, BACKGROUND_MODEL_MIN_AREA_PX,
+                          BACKGROUND_MODEL_SCALE, BACKGROUND_MODEL_THRESHOLD, BOAT_MARKER_ID, BOAT_MARKER_SIZE_MM,
+                          BOAT_MAX_SPEED_M_PER_S, CAMERA, COVERAGE_BOAT_RADIUS_CM, COVERAGE_DIRECTORY, COVERAGE_EXPORT,
+                          COVERAGE_GRID_WIDTH, COVERAGE_HALF_LIFE_S, FLEET_MARKER_IDS, GARBAGE_DETECTION_MODE,
+                          GARBAGE_TRACK_GATE_PX, HEADLESS, METRICS_ENABLED, METRICS_HOST, METRICS_PORT, MOCK_IMAGE_PATH,
+                          MOTION_GATE_CHANGED_FRACTION, MOTION_GATE_ENABLED, MOTION_GATE_MAX_SKIP_S,
+                          MOTION_GATE_PIXEL_THRESHOLD, MOTION_GATE_REGIONS, POOL_BOUNDARY_WINDOW,
+                          POOL_CORNER_MARKER_IDS, POOL_CORNER_MARKER_SIZE_MM, POOL_DIAGONAL_CM, RECORD_SESSION,
+                          RECORD_VIDEO, SESSION_DIRECTORY, TARGET_FPS, TELEMETRY_ENABLED, TELEMETRY_HOST,
+                          TELEMETRY_PORT, USE_MOCK_CAMERA, VIDEO_CODEC, VIDEO_DECIMATION, VIDEO_DIRECTORY, VIDEO_FPS,
+                          VIDEO_SCALE)
+
+STAGES = ('capture', 'motion', 'boat', 'garbage', 'render')
 
 
 def __loop(camera: Camera,
@@ -15,25 +41,119 @@ def __loop(camera: Camera,
            ui: UI,
            aruco: ArUco,
            boat: Boat,
-           floating_garbage: FloatingGarbage) -> None:
+           fleet: Fleet | None,
+           pose_estimator: MarkerPoseEstimator | None,
+           pool: Pool,
+           floating_garbage: FloatingGarbage,
+           garbage_tracker: GarbageTracker,
+           intercept_ui: InterceptUI,
+           coverage_map: CoverageMap,
+           timer: StageTimer,
+           motion_gate: MotionGate | None,
+           telemetry: TelemetryPublisher | None,
+           recorder: SessionRecorder | None,
+           video_writer: AsyncVideoWriter | None,
+           metrics: FrameMetrics | None) -> None:
     # Read capture
-    image = camera.read_corrected_capture()
+    with timer.stage('capture'):
+        image = camera.read_corrected_capture()
+    # No frame while the camera reconnects: keep the previous results
+    if image is None:
+        ui.show_no_frame(window_name, camera.frame_size)
+        return
+
+    # Only run perception if the frame changed (or gating is disabled)
+    with timer.stage('motion'):
+        changed = motion_gate is None or motion_gate.has_changed(image)
+
+    with timer.stage('boat'):
+        # Calculate boat position, rotation and velocity
+        if changed:
+            # Detect all markers once and estimate their poses in a single batch
+            detections = aruco.detect_markers(image)
+            poses = None if pose_estimator is None \
+                else pose_estimator.estimate(detections, (image.shape[1], image.shape[0]))
+            boat.update_location_and_velocity(image, aruco, detections, poses)
+            if fleet is not None:
+                fleet.update(detections, poses)
+        # Otherwise keep the previous results
+        # Render marker
+        boat.visualize(image)
+        if fleet is not None:
+            fleet.visualize(image)
+
+    with timer.stage('garbage'):
+        # Detect the floating garbage position
+        if changed:
+            floating_garbage.detect(image, pool=pool)
+            # Track all garbage candidates to estimate their drift
+            garbage_tracker.update(
+                np.array([keypoint.pt for keypoint in floating_garbage.detector.keypoints], dtype=np.float32)
+            )
+        # Rank the candidates by the time the boat needs to intercept them
+        mm_per_px = boat.mm_per_px
+        if boat.center is not None and mm_per_px is not None:
+            intercept_ui.intercepts = garbage_tracker.plan_intercepts(
+                boat.center,
+                BOAT_MAX_SPEED_M_PER_S * 1000 / mm_per_px
+            )
+        else:
+            intercept_ui.intercepts = None
+        garbage_tracker.visualize(image)
+        # Render pool boundary and garbage visualization
+        pool.visualize(image)
+        floating_garbage.visualize(image)
+
+    # Accumulate the positions of all boats (NaN: not detected) and all garbage candidates
+    boat_positions = [boat.center if boat.center is not None else np.full(2, np.nan, dtype=np.float32)]
+    if fleet is not None:
+        boat_positions.extend(np.where(fleet.detected[:, None], fleet.centers, np.nan))
+    coverage_map.update(
+        np.array(boat_positions, dtype=np.float32),
+        np.array([keypoint.pt for keypoint in floating_garbage.detector.keypoints], dtype=np.float32)
+    )
+
+    # Publish boat and garbage state
+    if telemetry is not None:
+        telemetry.publish(boat, floating_garbage)
+
+    # Record frame state and the previous frame's render timing
+    if recorder is not None:
+        recorder.record(boat, floating_garbage, timer)
 
-    # Calculate boat position, rotation and velocity
-    boat.update_location_and_velocity(image, aruco, 15)
-    # Render marker
-    boat.visualize(image)
+    with timer.stage('render'):
+        # Render the UI
+        ui.render(image)
 
-    # Detect the floating garbage position
-    floating_garbage.detect(image)
-    # Render garbage visualization
-    floating_garbage.visualize(image)
+        # Show capture
+        ui.show(window_name, image)
 
-    # Render the UI
-    ui.render(image)
+        # Record the annotated capture (not modified from here on)
+        if video_writer is not None:
+            video_writer.write(image)
 
-    # Show capture
-    cv2.imshow(window_name, image)
+    # Aggregate frame metrics (served from snapshots by the metrics server thread)
+    if metrics is not None:
+        dropped = {'camera': camera.discarded_frames, 'log': queue_handler.dropped_records}
+        queue_depths = {'log': queue_handler.queue.qsize()}
+        if telemetry is not None:
+            dropped['telemetry'] = telemetry.dropped_records
+            queue_depths['telemetry'] = telemetry.queue_size
+        if recorder is not None:
+            dropped['recorder'] = recorder.dropped_frames
+            queue_depths['recorder'] = recorder.queue_size
+        if video_writer is not None:
+            dropped['video'] = video_writer.dropped_frames
+            queue_depths['video'] = video_writer.queue_size
+        metrics.record(
+            timer,
+            changed,
+            boat,
+            int(fleet.detected.sum()) if fleet is not None else 0,
+            len(floating_garbage.detector.keypoints),
+            dropped,
+            queue_depths
+        )
 
 
 def autonomous_ocean_garbage_collector() -> None:
@@ -42,8 +162,10 @@ def autonomous_ocean_garbage_collector() -> None:
     camera = Camera(
         mock_image_path=MOCK_IMAGE_PATH,
         camera=CAMERA,
-        mock=False,
-        perspective_correction_from_cache=True
+        mock=USE_MOCK_CAMERA,
+        perspective_correction_from_cache=True,
+        intrinsics_from_cache=True,
+        capture_settings=CaptureSettings.from_settings()
     )
     aruco = ArUco(
         aruco_dict=ARUCO_DICT
@@ -52,23 +174,90 @@ def autonomous_ocean_garbage_collector() -> None:
         BOAT_MARKER_ID,
         BOAT_MARKER_SIZE_MM
     )
+    fleet = Fleet(
+        FLEET_MARKER_IDS,
+        BOAT_MARKER_SIZE_MM
+    ) if FLEET_MARKER_IDS else None
+    # Metric poses require the camera intrinsics
+    pose_estimator = MarkerPoseEstimator(
+        camera,
+        marker_sizes_mm={marker_id: BOAT_MARKER_SIZE_MM for marker_id in [BOAT_MARKER_ID, *FLEET_MARKER_IDS]}
+    ) if camera.has_intrinsics else None
+    # Detect garbage only within the pool (the entire frame until the pool boundary is set)
+    frame_height, frame_width = camera.wait_for_capture().shape[:2]
+    pool = Pool(
+        *get_frame_corners(frame_width, frame_height),
+        top_left_bottom_right_distance_cm=POOL_DIAGONAL_CM
+    )
+    # Detect the pool boundary from the corner markers if none is cached
+    if not pool.constraints_from_cache:
+        detect_pool_boundary(
+            camera,
+            aruco,
+            PoolBoundaryDetector(POOL_CORNER_MARKER_IDS, POOL_CORNER_MARKER_SIZE_MM, POOL_BOUNDARY_WINDOW),
+            pool,
+            max_frames=3 * POOL_BOUNDARY_WINDOW
+        )
+    # Continue the cached background model (no warm-up on every start)
+    background_model = BackgroundModel(
+        scale=BACKGROUND_MODEL_SCALE,
+        learning_rate=BACKGROUND_MODEL_LEARNING_RATE,
+        threshold=BACKGROUND_MODEL_THRESHOLD,
+        min_area_px=BACKGROUND_MODEL_MIN_AREA_PX,
+        model_from_cache=True
+    ) if GARBAGE_DETECTION_MODE == 'background' else None
     floating_garbage = FloatingGarbage(
-        blob_id_from_cache=True
+        blob_id_from_cache=True,
+        background_model=background_model
+    )
+    garbage_tracker = GarbageTracker(
+        gate_px=GARBAGE_TRACK_GATE_PX
     )
+    coverage_map = CoverageMap(
+        pool,
+        grid_width=COVERAGE_GRID_WIDTH,
+        boat_radius_cm=COVERAGE_BOAT_RADIUS_CM,
+        half_life_s=COVERAGE_HALF_LIFE_S
+    )
+    timer = StageTimer()
+    motion_gate = MotionGate(
+        pixel_threshold=MOTION_GATE_PIXEL_THRESHOLD,
+        changed_fraction=MOTION_GATE_CHANGED_FRACTION,
+        max_skip_interval_s=MOTION_GATE_MAX_SKIP_S,
+        regions=MOTION_GATE_REGIONS
+    ) if MOTION_GATE_ENABLED else None
+    telemetry = TelemetryPublisher(TELEMETRY_HOST, TELEMETRY_PORT) if TELEMETRY_ENABLED else None
+    recorder = SessionRecorder(SESSION_DIRECTORY, STAGES) if RECORD_SESSION else None
+    video_writer = AsyncVideoWriter(
+        VIDEO_DIRECTORY,
+        fps=VIDEO_FPS,
+        codec=VIDEO_CODEC,
+        scale=VIDEO_SCALE,
+        decimation=VIDEO_DECIMATION
+    ) if RECORD_VIDEO else None
+    metrics = FrameMetrics(STAGES) if METRICS_ENABLED else None
+    metrics_server = MetricsServer(metrics, METRICS_HOST, METRICS_PORT) if metrics is not None else None
 
     # Compose UI
-    ui = UI()
+    ui = UI(headless=HEADLESS)
     boat_ui = BoatUI(boat)
     garbage_ui = FloatingGarbageUI(floating_garbage)
     ui.add_ui_state(boat_ui)
     ui.add_ui_state(garbage_ui)
+    ui.add_ui_state(PoolUI(pool))
+    intercept_ui = InterceptUI()
+    ui.add_ui_state(intercept_ui)
+    ui.add_ui_state(CoverageUI(coverage_map, COVERAGE_DIRECTORY))
+    if fleet is not None:
+        ui.add_ui_state(FleetUI(fleet))
 
     window_name = 'Overhead capture'
 
     # Run main loop
     main_loop = MainLoop(
         ui,
-        window_name
+        window_name,
+        target_fps=TARGET_FPS
     )
     main_loop.run(
         __loop,
@@ -77,5 +266,37 @@ def autonomous_ocean_garbage_collector() -> None:
         ui,
         aruco,
         boat,
-        floating_garbage
+        fleet,
+        pose_estimator,
+        pool,
+        floating_garbage,
+        garbage_tracker,
+        intercept_ui,
+        coverage_map,
+        timer,
+        motion_gate,
+        telemetry,
+        recorder,
+        video_writer,
+        metrics
     )
+
+    if motion_gate is not None:
+        motion_gate.log_stats()
+
+    # Send remaining telemetry
+    if telemetry is not None:
+        telemetry.close()
+    # Write remaining recorded frames
+    if recorder is not None:
+        recorder.close()
+    # Encode remaining video frames
+    if video_writer is not None:
+        video_writer.close()
+    # Stop serving metrics
+    if metrics_server is not None:
+        metrics_server.close()
+    if background_model is not None:
+        background_model.write_to_cache()
+    if COVERAGE_EXPORT:
+        coverage_map.export(COVERAGE_DIRECTORY)
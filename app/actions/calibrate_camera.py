@@ -0,0 +1,128 @@
+"""Calibrate camera intrinsics using a ChArUco board."""
+
+import os
+import cv2
+from app.components.camera import Camera, CaptureSettings
+from app.components.camera_calibration import CharucoCalibration
+from app.components.main_loop import MainLoop
+from app.components.opencv_ui import UI, UIState
+from app.components.opencv_ui.text import TextBox
+from app.settings import (ARUCO_DICT, CAMERA, CHARUCO_MARKER_LENGTH_MM, CHARUCO_SQUARES_X, CHARUCO_SQUARES_Y,
+                          CHARUCO_SQUARE_LENGTH_MM, HEADLESS, MOCK_IMAGE_PATH, TARGET_FPS, USE_MOCK_CAMERA)
+
+
+# Create UI state for collecting board views and saving the calibration
+class CalibrationUI(UIState):
+    """User interface for camera calibration."""
+    camera: Camera
+    calibration: CharucoCalibration
+
+    def __init__(self, camera: Camera, calibration: CharucoCalibration) -> None:
+        """Create calibration UI."""
+        super().__init__(
+            keycode=99,
+            keyname='C',
+            name='Calibrate Camera',
+            instructions='Press "A" to add the current board view, "S" to calibrate and save.'
+        )
+        self.camera = camera
+        self.calibration = calibration
+
+    def on_key(self, keypress: int) -> None:
+        """Add board view or calibrate and save intrinsics."""
+        if keypress == 97:  # a
+            self.calibration.add_view()
+        elif keypress == 115:  # s
+            if self.calibration.calibrate():
+                self.calibration.write_to_cache()
+                # Preview the undistorted capture
+                if (self.calibration.camera_matrix is not None
+                        and self.calibration.distortion_coefficients is not None
+                        and self.calibration.image_size is not None):
+                    self.camera.set_intrinsics(
+                        self.calibration.camera_matrix,
+                        self.calibration.distortion_coefficients,
+                        self.calibration.image_size
+                    )
+
+    def render(self, image: cv2.Mat) -> None:
+        """Render calibration progress."""
+        lines = [f'Views: {self.calibration.view_count}']
+        if self.calibration.reprojection_error is not None:
+            lines.append(f'RMS reprojection error: {self.calibration.reprojection_error:.3f}px')
+        # Bottom-left corner (text box lines are 42px high)
+        TextBox(lines, x_pos=0, y_pos=image.shape[0] - 42 * len(lines)).render(image)
+
+
+def __loop(camera: Camera,
+           main_window_name: str,
+           undistorted_window_name: str,
+           ui: UI,
+           calibration: CharucoCalibration) -> None:
+    # Read capture
+    image = camera.read_capture()
+    if image is None:
+        ui.show_no_frame(main_window_name, camera.frame_size)
+        return
+
+    # Show undistorted capture (once calibrated)
+    if camera.has_intrinsics:
+        ui.show(undistorted_window_name, camera.undistort(image))
+
+    # Detect board
+    calibration.detect(image)
+    # Render board corners
+    calibration.visualize(image)
+
+    # Render the UI
+    ui.render(image)
+
+    # Show capture
+    ui.show(main_window_name, image)
+
+
+def calibrate_camera() -> None:
+    """Calibrate camera intrinsics using a ChArUco board."""
+    # Create components
+    # (Intrinsics are estimated from the raw capture)
+    camera = Camera(
+        mock_image_path=MOCK_IMAGE_PATH,
+        camera=CAMERA,
+        mock=USE_MOCK_CAMERA,
+        capture_settings=CaptureSettings.from_settings()
+    )
+    calibration = CharucoCalibration(
+        aruco_dict=ARUCO_DICT,
+        squares_x=CHARUCO_SQUARES_X,
+        squares_y=CHARUCO_SQUARES_Y,
+        square_length_mm=CHARUCO_SQUARE_LENGTH_MM,
+        marker_length_mm=CHARUCO_MARKER_LENGTH_MM
+    )
+    # Generate printable board (once)
+    board_image_path = 'app/out/charuco_board.png'
+    if not os.path.exists(board_image_path):
+        calibration.generate_board_image(board_image_path)
+
+    # Compose UI
+    ui = UI(headless=HEADLESS)
+    cal_ui = CalibrationUI(camera, calibration)
+    ui.add_ui_state(cal_ui)
+
+    # CONSTANTS
+    main_window_name = 'Camera capture'
+    undistorted_window_name = 'Undistorted capture'
+
+    # Run main loop
+    main_loop = MainLoop(
+        ui,
+        main_window_name,
+        target_fps=TARGET_FPS
+    )
+    main_loop.run(
+        __loop,
+        camera,
+        main_window_name,
+        undistorted_window_name,
+        ui,
+        calibration
+    )
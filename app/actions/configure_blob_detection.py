@@ -1,27 +1,33 @@
 """Configure blob detection parameters."""
 
-import cv2
 from app.components.blob_detection import BlobDetection
 from app.components.blob_detection.gui import BlobDetectionGUI
 from app.components.blob_detection.params import BlobDetectionParams
-from app.components.camera import Camera
+from app.components.blob_detection.sampling import ColorSamplingUI
+from app.components.camera import Camera, CaptureSettings
 from app.components.main_loop import MainLoop
 from app.components.opencv_ui import UI
-from app.settings import CAMERA, MOCK_IMAGE_PATH
+from app.settings import CAMERA, HEADLESS, MOCK_IMAGE_PATH, TARGET_FPS, USE_MOCK_CAMERA
 
 
 def __loop(camera: Camera,
            window_name: str,
            preprocessed_window_name: str,
            ui: UI,
-           blob_detection: BlobDetection) -> None:
+           blob_detection: BlobDetection,
+           color_sampling_ui: ColorSamplingUI) -> None:
     # Read capture
     image = camera.read_corrected_capture()
+    if image is None:
+        ui.show_no_frame(window_name, camera.frame_size)
+        return
 
-    # Detect floating trash blobs
-    blob_detection.detect(image)
-    # Visualize the preprocessed image used for blob detection
-    preprocessed_image = blob_detection.preprocess_image(image)
+    # Sample garbage and water colors clicked since the last frame (before the capture is annotated)
+    color_sampling_ui.sample(image)
+
+    # Detect floating trash blobs (memoized while neither frame nor parameters change)
+    # and reuse the preprocessed image used for blob detection for its visualization
+    preprocessed_image = blob_detection.detect_memoized(image).copy()
     # Visualize detected blobs
     blob_detection.visualize(image)
     blob_detection.visualize(preprocessed_image)
@@ -30,9 +36,9 @@ def __loop(camera: Camera,
     ui.render(image)
 
     # Show capture
-    cv2.imshow(window_name, image)
+    ui.show(window_name, image)
     # Show preprocessed image used for blob detection
-    cv2.imshow(preprocessed_window_name, preprocessed_image)
+    ui.show(preprocessed_window_name, preprocessed_image)
 
 
 def configure_blob_detection() -> None:
@@ -41,8 +47,10 @@ def configure_blob_detection() -> None:
     camera = Camera(
         mock_image_path=MOCK_IMAGE_PATH,
         camera=CAMERA,
-        mock=False,
+        mock=USE_MOCK_CAMERA,
         perspective_correction_from_cache=True,
+        intrinsics_from_cache=True,
+        capture_settings=CaptureSettings.from_settings()
     )
     blob_detection_params = BlobDetectionParams(
         params_from_cache=True
@@ -50,8 +58,10 @@ def configure_blob_detection() -> None:
     blob_detection = BlobDetection(blob_detection_params)
 
     # Compose UI
-    ui = UI()
+    ui = UI(headless=HEADLESS)
     ui.header_text = 'Use the GUI to adjust the detection parameters'
+    color_sampling_ui = ColorSamplingUI(blob_detection)
+    ui.add_ui_state(color_sampling_ui)
 
     # Blob detection GUI
     gui = BlobDetectionGUI(blob_detection)
@@ -63,7 +73,8 @@ def configure_blob_detection() -> None:
     main_loop = MainLoop(
         ui,
         window_name,
-        gui=gui
+        gui=gui,
+        target_fps=TARGET_FPS
     )
     main_loop.run(
         __loop,
@@ -71,5 +82,6 @@ def configure_blob_detection() -> None:
         window_name,
         preprocessed_window_name,
         ui,
-        blob_detection
+        blob_detection,
+        color_sampling_ui
     )
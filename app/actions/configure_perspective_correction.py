@@ -1,14 +1,15 @@
 """Configure perspective correction using ArUco marker."""
 
-import json
-import cv2
+import numpy as np
 from app.components.aruco import ArUco, Marker
-from app.components.camera import Camera
+from app.components.calibration_store import get_calibration_store
+from app.components.camera import Camera, CaptureSettings
 from app.components.main_loop import MainLoop
 from app.components.opencv_ui import UI, UIState
-from app.components.helpers import create_dir_if_not_exists
-from app.settings import (ARUCO_DICT, CAMERA, MOCK_IMAGE_PATH,
-                          PERSPECTIVE_CORRECTION_MARKER_BUFFER_SIZE, PERSPECTIVE_CORRECTION_MARKER_ID)
+from app.components.pose_estimation import MarkerPoseEstimator
+from app.settings import (ARUCO_DICT, CAMERA, HEADLESS, MOCK_IMAGE_PATH, PERSPECTIVE_CORRECTION_MARKER_BUFFER_SIZE,
+                          PERSPECTIVE_CORRECTION_MARKER_ID, PERSPECTIVE_CORRECTION_MARKER_SIZE_MM, TARGET_FPS,
+                          USE_MOCK_CAMERA)
 from app.logger import logger
 
 
@@ -16,8 +17,10 @@ from app.logger import logger
 class CorrectionUI(UIState):
     """User interface for perspective correction."""
     camera: Camera
+    marker: Marker
+    pose_estimator: MarkerPoseEstimator
 
-    def __init__(self, camera: Camera) -> None:
+    def __init__(self, camera: Camera, marker: Marker, pose_estimator: MarkerPoseEstimator) -> None:
         """Create Correction UI."""
         super().__init__(
             keycode=99,
@@ -26,6 +29,8 @@ class CorrectionUI(UIState):
             instructions='Press "S" to save the current perspective correction.'
         )
         self.camera = camera
+        self.marker = marker
+        self.pose_estimator = pose_estimator
 
     def on_key(self, keypress: int) -> None:
         """Save perspective correction."""
@@ -33,19 +38,26 @@ class CorrectionUI(UIState):
             # Get current transform matrix
             perspective_transform_matrix = self.camera.perspective_transform_matrix
             if perspective_transform_matrix is not None:
-                # Try saving matrix to cache
-                try:
-                    create_dir_if_not_exists('app/cache')
-                    with open('app/cache/perspective_correction.json', 'w+') as f:
-                        json.dump(
-                            perspective_transform_matrix.tolist(),
-                            f
-                        )
-                    logger.info('Wrote perspective correction to cache')
-                except Exception:
-                    logger.warn('Failed writing perspective correction to cache')
+                # Save matrix to cache (written in the background)
+                get_calibration_store().set_array('perspective_transform_matrix', perspective_transform_matrix)
+                logger.info('Wrote perspective correction to cache')
             else:
                 logger.warn('Failed writing perspective correction to cache: no correction matrix exists')
+            # Save the marker's pose as the pool frame for metric pose estimation
+            self.__save_pool_frame()
+
+    def __save_pool_frame(self) -> None:
+        """Save pose of the (smoothed) marker in the undistorted capture as pool frame."""
+        corners = self.marker.corners
+        image_size = self.camera.frame_size
+        if not self.camera.has_intrinsics or corners is None or image_size is None:
+            logger.warn('Failed writing pool frame to cache: camera is not calibrated or marker is not detected')
+            return
+        detections = (np.array([corners], dtype=np.float32), np.array([self.marker.id], dtype=np.int32))
+        poses = self.pose_estimator.estimate_camera_poses(detections, image_size)
+        if self.marker.id in poses:
+            rotation, translation = poses[self.marker.id]
+            self.pose_estimator.write_pool_frame_to_cache(rotation, translation)
 
 
 def __loop(camera: Camera,
@@ -55,7 +67,11 @@ def __loop(camera: Camera,
            aruco: ArUco,
            marker: Marker) -> None:
     # Read capture
-    image = camera.read_capture()
+    # (The perspective correction is estimated after correcting the lens distortion)
+    image = camera.read_undistorted_capture()
+    if image is None:
+        ui.show_no_frame(main_window_name, camera.frame_size)
+        return
 
     # Detect marker
     marker.detect(image, aruco)
@@ -70,11 +86,12 @@ def __loop(camera: Camera,
     ui.render(image)
 
     # Show capture
-    cv2.imshow(main_window_name, image)
+    ui.show(main_window_name, image)
 
     # Show corrected capture
     corrected_capture = camera.read_corrected_capture()
-    cv2.imshow(corrected_window_name, corrected_capture)
+    if corrected_capture is not None:
+        ui.show(corrected_window_name, corrected_capture)
 
 
 def configure_perspective_correction() -> None:
@@ -83,7 +100,9 @@ def configure_perspective_correction() -> None:
     camera = Camera(
         mock_image_path=MOCK_IMAGE_PATH,
         camera=CAMERA,
-        mock=False
+        mock=USE_MOCK_CAMERA,
+        intrinsics_from_cache=True,
+        capture_settings=CaptureSettings.from_settings()
     )
     aruco = ArUco(
         aruco_dict=ARUCO_DICT
@@ -95,8 +114,15 @@ def configure_perspective_correction() -> None:
     )
 
     # Compose UI
-    ui = UI()
-    c_ui = CorrectionUI(camera)
+    ui = UI(headless=HEADLESS)
+    # Poses of the marker in the undistorted capture
+    pose_estimator = MarkerPoseEstimator(
+        camera,
+        marker_sizes_mm={PERSPECTIVE_CORRECTION_MARKER_ID: PERSPECTIVE_CORRECTION_MARKER_SIZE_MM},
+        corrected=False,
+        pool_frame_from_cache=False
+    )
+    c_ui = CorrectionUI(camera, marker, pose_estimator)
     ui.add_ui_state(c_ui)
 
     # CONSTANTS
@@ -106,7 +132,8 @@ def configure_perspective_correction() -> None:
     # Run main loop
     main_loop = MainLoop(
         ui,
-        main_window_name
+        main_window_name,
+        target_fps=TARGET_FPS
     )
     main_loop.run(
         __loop,
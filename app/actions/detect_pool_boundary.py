@@ -0,0 +1,91 @@
+"""Detect the pool boundary from ArUco markers placed at the pool's corners."""
+
+from app.components.aruco import ArUco
+from app.components.camera import Camera, CaptureSettings
+from app.components.main_loop import MainLoop
+from app.components.opencv_ui import UI
+from app.components.pool import Pool, get_frame_corners
+from app.components.pool.boundary import PoolBoundaryDetector
+from app.settings import (ARUCO_DICT, CAMERA, HEADLESS, MOCK_IMAGE_PATH, POOL_BOUNDARY_WINDOW, POOL_CORNER_MARKER_IDS,
+                          POOL_CORNER_MARKER_SIZE_MM, POOL_DIAGONAL_CM, TARGET_FPS, USE_MOCK_CAMERA)
+
+
+def __loop(camera: Camera,
+           window_name: str,
+           ui: UI,
+           aruco: ArUco,
+           detector: PoolBoundaryDetector,
+           pool: Pool,
+           main_loop: MainLoop) -> None:
+    # Read capture
+    image = camera.read_corrected_capture()
+    if image is None:
+        ui.show_no_frame(window_name, camera.frame_size)
+        return
+
+    # Buffer the corner markers
+    detector.update(aruco.detect_markers(image))
+    # Render the detection progress
+    detector.visualize(image)
+
+    # Save the boundary once all corners were detected over the entire window
+    if detector.is_complete:
+        detector.apply(pool)
+        pool.visualize(image)
+        main_loop.stop()
+
+    # Render the UI
+    ui.render(image)
+
+    # Show capture
+    ui.show(window_name, image)
+
+
+def detect_pool_boundary() -> None:
+    """Detect the pool boundary from ArUco markers placed at the pool's corners."""
+    # Create components
+    camera = Camera(
+        mock_image_path=MOCK_IMAGE_PATH,
+        camera=CAMERA,
+        mock=USE_MOCK_CAMERA,
+        perspective_correction_from_cache=True,
+        intrinsics_from_cache=True,
+        capture_settings=CaptureSettings.from_settings()
+    )
+    aruco = ArUco(
+        aruco_dict=ARUCO_DICT
+    )
+    detector = PoolBoundaryDetector(
+        POOL_CORNER_MARKER_IDS,
+        POOL_CORNER_MARKER_SIZE_MM,
+        window_size=POOL_BOUNDARY_WINDOW
+    )
+    # The corners are replaced by the detected boundary
+    frame_height, frame_width = camera.wait_for_capture().shape[:2]
+    pool = Pool(
+        *get_frame_corners(frame_width, frame_height),
+        top_left_bottom_right_distance_cm=POOL_DIAGONAL_CM,
+        cache_constraints=True
+    )
+
+    # Compose UI
+    ui = UI(headless=HEADLESS)
+
+    window_name = 'Pool boundary detection'
+
+    # Run main loop until the boundary is detected
+    main_loop = MainLoop(
+        ui,
+        window_name,
+        target_fps=TARGET_FPS
+    )
+    main_loop.run(
+        __loop,
+        camera,
+        window_name,
+        ui,
+        aruco,
+        detector,
+        pool,
+        main_loop
+    )
@@ -0,0 +1,81 @@
+"""Generate printable sheets of ArUco markers."""
+
+import inquirer
+from app.settings import ARUCO_DICT
+from app.components.aruco.sheets import PAGE_SIZES_MM, MarkerSheetGenerator, SheetLayout, parse_id_ranges
+
+
+def __is_id_ranges(x: str) -> bool:
+    try:
+        return len(parse_id_ranges(x)) > 0
+    except Exception:
+        return False
+
+
+def __parse_sizes(x: str) -> list[float]:
+    return [float(size) for size in x.split(',') if size.strip()]
+
+
+def __is_sizes(x: str) -> bool:
+    try:
+        sizes = __parse_sizes(x)
+        return len(sizes) > 0 and all(size > 0 for size in sizes)
+    except Exception:
+        return False
+
+
+def __is_int(x: str) -> bool:
+    try:
+        int(x)
+        return True
+    except Exception:
+        return False
+
+
+def generate_marker_sheets() -> None:
+    """Generate printable sheets of ArUco markers."""
+    # Prompt user for marker and layout parameters
+    questions = [
+        inquirer.Text(
+            'Ids',
+            message='Marker Ids (e.g. 0-9,15)',
+            validate=lambda _, x: __is_id_ranges(x),
+        ),
+        inquirer.Text(
+            'Sizes',
+            message='Marker sizes [mm] (comma-separated)',
+            validate=lambda _, x: __is_sizes(x),
+            default='50'
+        ),
+        inquirer.List(
+            'Page',
+            message='Page size',
+            choices=PAGE_SIZES_MM.keys()
+        ),
+        inquirer.Text(
+            'Dpi',
+            message='Print resolution [dpi]',
+            validate=lambda _, x: __is_int(x),
+            default=300
+        ),
+        inquirer.Text(
+            'Name',
+            message='Sheet filename prefix',
+            default='markers'
+        )
+    ]
+    answers = inquirer.prompt(questions)
+    # Generate sheets using prompt answers
+    if answers:
+        page_width_mm, page_height_mm = PAGE_SIZES_MM[answers['Page']]
+        layout = SheetLayout(
+            page_width_mm=page_width_mm,
+            page_height_mm=page_height_mm,
+            dpi=int(answers['Dpi'])
+        )
+        generator = MarkerSheetGenerator(ARUCO_DICT, layout)
+        generator.generate(
+            parse_id_ranges(answers['Ids']),
+            __parse_sizes(answers['Sizes']),
+            name=answers['Name']
+        )
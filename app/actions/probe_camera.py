@@ -0,0 +1,24 @@
+"""Probe the capture modes supported by the camera."""
+
+from app.components.camera.probe import probe_capture_modes
+from app.settings import CAMERA, CAMERA_BACKEND
+from app.logger import logger
+
+
+def probe_camera() -> None:
+    """Probe the capture modes supported by the camera and log the measured frame rates."""
+    logger.info(f'Probing capture modes of camera {CAMERA} (backend {CAMERA_BACKEND})...')
+    modes = probe_capture_modes(CAMERA, CAMERA_BACKEND)
+    for mode in modes:
+        logger.info(str(mode))
+    if modes:
+        # Largest resolution at the highest measured frame rate
+        best_fps = max(mode.measured_fps for mode in modes)
+        best = max(
+            (mode for mode in modes if mode.measured_fps >= 0.9 * best_fps),
+            key=lambda mode: mode.width * mode.height
+        )
+        logger.info(
+            f'Fastest mode: CAMERA_WIDTH={best.width} CAMERA_HEIGHT={best.height}'
+            f' CAMERA_FPS={best.fps:.0f} CAMERA_FOURCC={best.fourcc}'
+        )
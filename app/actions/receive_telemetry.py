@@ -0,0 +1,30 @@
+"""Receive and print boat and garbage telemetry."""
+
+from app.components.telemetry import TelemetryReceiver
+from app.settings import TELEMETRY_HOST, TELEMETRY_PORT
+from app.logger import logger
+
+
+def receive_telemetry() -> None:
+    """Receive and print boat and garbage telemetry (local ground station)."""
+    receiver = TelemetryReceiver(TELEMETRY_HOST, TELEMETRY_PORT)
+    logger.info(f'Listening for telemetry on udp://{TELEMETRY_HOST}:{TELEMETRY_PORT} (press Ctrl+C to stop)')
+    try:
+        while True:
+            for record in receiver.receive(timeout_s=1):
+                boat = (
+                    f'boat=({record["boat_x"]:.1f}, {record["boat_y"]:.1f})'
+                    f' heading={record["boat_heading"]:.2f}rad'
+                    f' v={record["boat_velocity_m_per_s"]:.3f}m/s'
+                    if record['boat_detected'] else 'boat=-'
+                )
+                garbage = (
+                    f'garbage=({record["garbage_x"]:.1f}, {record["garbage_y"]:.1f})'
+                    f' size={record["garbage_size"]:.1f}px'
+                    if record['garbage_detected'] else 'garbage=-'
+                )
+                print(f'#{record["frame"]} t={record["timestamp"]:.3f} {boat} {garbage}')
+    except KeyboardInterrupt:
+        pass
+    finally:
+        receiver.close()
@@ -0,0 +1,31 @@
+"""Report application startup time."""
+
+from app.actions import actions, get_action_module
+from app.components.startup_report import (check_cold_start_budget, get_package_breakdown, measure_cold_start_ms,
+                                           measure_imports)
+from app.settings import STARTUP_BUDGET_MS
+from app.logger import logger
+
+# Action a watchdog restarts in production
+PRODUCTION_ACTION = 'Autonomous Ocean Garbage Collector'
+
+
+def report_startup_time(top: int = 5) -> None:
+    """Report cold-start time of the launcher and the production action and import breakdown of every action."""
+    # Launcher (before the action is selected)
+    logger.info(f'Launcher cold start: {measure_cold_start_ms("import app"):.0f}ms')
+    # Restart to running (what a watchdog restart has to wait for before the action runs)
+    within_budget, cold_start_ms = check_cold_start_budget(PRODUCTION_ACTION, STARTUP_BUDGET_MS)
+    message = f'{PRODUCTION_ACTION} cold start: {cold_start_ms:.0f}ms (budget {STARTUP_BUDGET_MS:.0f}ms)'
+    if within_budget:
+        logger.info(message)
+    else:
+        logger.warn(f'{message} exceeds the budget!')
+
+    # Import breakdown per action module
+    for name in actions:
+        module = get_action_module(name)
+        timings = measure_imports(module)
+        total_ms = sum(timing.self_ms for timing in timings)
+        breakdown = ', '.join(f'{package} {ms:.0f}ms' for package, ms in get_package_breakdown(timings)[:top])
+        logger.info(f'{name} ({module}): {total_ms:.0f}ms imports - {breakdown}')
@@ -0,0 +1,59 @@
+"""Tune blob detection parameters against labeled frames."""
+
+import inquirer
+from app.components.blob_detection.tuner import BlobDetectionTuner
+from app.settings import BLOB_TUNING_LABELS_PATH
+from app.logger import logger
+
+
+def __is_number(x: str) -> bool:
+    try:
+        float(x)
+        return True
+    except Exception:
+        return False
+
+
+def tune_blob_detection() -> None:
+    """Tune blob detection parameters against labeled frames."""
+    # Prompt user for tuning parameters
+    questions = [
+        inquirer.Text(
+            'Labels',
+            message='Labeled frames (JSON)',
+            default=BLOB_TUNING_LABELS_PATH
+        ),
+        inquirer.List(
+            'Mode',
+            message='Search mode',
+            choices=[
+                ('Random search + refinement around the best trials', 'refine'),
+                ('Random search', 'random'),
+            ]
+        ),
+        inquirer.Text(
+            'Trials',
+            message='Number of trials',
+            validate=lambda _, x: __is_number(x),
+            default=200
+        ),
+        inquirer.Text(
+            'LatencyWeight',
+            message='Score penalty per millisecond of detection latency',
+            validate=lambda _, x: __is_number(x),
+            default=0.005
+        ),
+    ]
+    answers = inquirer.prompt(questions)
+    # Run tuner using prompt answers
+    if answers:
+        tuner = BlobDetectionTuner(
+            labels_path=answers['Labels'],
+            trials=int(answers['Trials']),
+            mode=answers['Mode'],
+            latency_weight=float(answers['LatencyWeight'])
+        )
+        best = tuner.run()
+        if best is not None:
+            logger.info(f'Best blob detection parameters: {best}')
+        tuner.write_best()
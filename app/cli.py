@@ -0,0 +1,146 @@
+"""Command-line interface for running app actions."""
+
+import argparse
+import cProfile
+import os
+import pstats
+from app import settings
+from app.actions import actions, load_action
+from app.components.helpers import create_dir_if_not_exists
+from app.logger import configure_logging, logger
+
+
+def get_action_slug(name: str) -> str:
+    """Get command-line name of an action."""
+    return name.lower().replace(' ', '-')
+
+
+def create_parser() -> argparse.ArgumentParser:
+    """Create command-line argument parser."""
+    action_slugs = [get_action_slug(name) for name in actions]
+    parser = argparse.ArgumentParser(
+        prog='python -m app',
+        description='Autonomous Ocean Garbage Collector. Prompts for an action if none is selected.'
+    )
+    parser.add_argument('action', nargs='?', choices=action_slugs, help='action to run')
+    parser.add_argument('--list', action='store_true', help='list all actions and exit')
+    # Setting overrides
+    parser.add_argument('--source', choices=['camera', 'mock'], help='frame source')
+    parser.add_argument('--camera', type=int, help='camera Id')
+    parser.add_argument('--mock-image', help='image path for the mock frame source')
+    parser.add_argument('--boat-marker-id', type=int, help='ArUco marker Id of the boat')
+    parser.add_argument('--boat-marker-size-mm', type=float, help='size of the boat marker in millimeters')
+    parser.add_argument('--correction-marker-id', type=int, help='ArUco marker Id for the perspective correction')
+    parser.add_argument('--set', action='append', default=[], metavar='KEY=VALUE',
+                        help='override any setting, e.g. --set TELEMETRY_PORT=6000 (repeatable)')
+    # Modes
+    parser.add_argument('--headless', action='store_true', help='run without windows (e.g. as service)')
+    parser.add_argument('--record', action='store_true', help='record the session')
+    parser.add_argument('--record-video', action='store_true', help='record an annotated video')
+    parser.add_argument('--telemetry', action='store_true', help='publish telemetry')
+    parser.add_argument('--metrics', action='store_true', help='serve Prometheus metrics')
+    parser.add_argument('--profile', nargs='?', const='app/out/profile.prof', metavar='PATH',
+                        help='profile the action with cProfile and write the stats to PATH')
+    return parser
+
+
+def set_setting(key: str, value: str) -> None:
+    """Override setting, parsing the value as the type of the current value."""
+    if not key.isupper() or not hasattr(settings, key):
+        raise ValueError(f'Unknown setting {key}')
+    current = getattr(settings, key)
+    if isinstance(current, bool):
+        setattr(settings, key, value.lower() == 'true')
+    elif isinstance(current, (int, float, str)):
+        setattr(settings, key, type(current)(value))
+    else:
+        raise ValueError(f'Setting {key} cannot be overridden from the command line')
+
+
+def apply_setting_overrides(args: argparse.Namespace) -> None:
+    """Override settings using command-line arguments.
+
+    Must run before the action is loaded, since actions import their settings on import.
+    """
+    overrides: dict[str, object] = {
+        'USE_MOCK_CAMERA': args.source == 'mock' if args.source else None,
+        'CAMERA': args.camera,
+        'MOCK_IMAGE_PATH': args.mock_image,
+        'BOAT_MARKER_ID': args.boat_marker_id,
+        'BOAT_MARKER_SIZE_MM': args.boat_marker_size_mm,
+        'PERSPECTIVE_CORRECTION_MARKER_ID': args.correction_marker_id,
+        'HEADLESS': True if args.headless else None,
+        'RECORD_SESSION': True if args.record else None,
+        'RECORD_VIDEO': True if args.record_video else None,
+        'TELEMETRY_ENABLED': True if args.telemetry else None,
+        'METRICS_ENABLED': True if args.metrics else None,
+    }
+    for key, override in overrides.items():
+        if override is not None:
+            setattr(settings, key, override)
+    for assignment in args.set:
+        key, _, value = assignment.partition('=')
+        set_setting(key.strip(), value.strip())
+
+
+def prompt_action() -> str | None:
+    """Prompt action selection."""
+    # Only import the prompt library once the selection is actually prompted
+    import inquirer
+
+    # Define selection for app actions using inquirer
+    # Reference: https://github.com/magmax/python-inquirer
+    actions_list = inquirer.List(
+        'action',
+        message='Launch Autonomous Ocean Garbage Collector action',
+        choices=actions.keys()
+    )
+    # Prompt selection
+    print(
+        '\n'
+        '######################################\n'
+        '# Autonomous Ocean Garbage Collector #\n'
+        '######################################\n'
+    )
+    answers = inquirer.prompt([actions_list])
+    return answers['action'] if answers else None
+
+
+def run_action(name: str, profile_path: str | None = None) -> None:
+    """Run action, optionally profiling it."""
+    action = load_action(name)
+    if profile_path is None:
+        action()
+        return
+    profiler = cProfile.Profile()
+    profiler.runcall(action)
+    create_dir_if_not_exists(os.path.dirname(profile_path) or '.')
+    profiler.dump_stats(profile_path)
+    logger.info(f'Wrote profile to {profile_path}')
+    pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
+
+def run(argv: list[str] | None = None) -> None:
+    """Run action selected via command-line arguments or prompt."""
+    parser = create_parser()
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for action_name in actions:
+            print(f'{get_action_slug(action_name):40} {action_name}')
+        return
+
+    try:
+        apply_setting_overrides(args)
+    except ValueError as e:
+        parser.error(str(e))
+    configure_logging(settings.LOG_FILE, settings.LOG_RATE_LIMIT_BURST, settings.LOG_RATE_LIMIT_INTERVAL_S)
+
+    # Select action by its command-line name or prompt the selection
+    name: str | None
+    if args.action:
+        name = next(action_name for action_name in actions if get_action_slug(action_name) == args.action)
+    else:
+        name = prompt_action()
+    if name is not None:
+        run_action(name, args.profile)
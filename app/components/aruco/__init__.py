@@ -4,15 +4,16 @@ from collections import deque
 import cv2
 import numpy as np
 import numpy.typing as npt
-from PIL import Image
 from cv2 import aruco
-from scipy.spatial import distance
 from uuid import uuid4
 
 from app.components.helpers import create_dir_if_not_exists
 from app.util_types import VecFloat
 from app.logger import logger
 
+# Detected markers as (corners (n x 4 x 2), Ids (n))
+MarkerDetections = tuple[VecFloat, npt.NDArray[np.int32]]
+
 
 class ArUco():
     """Wrapper for OpenCV ArUco functionality."""
@@ -26,12 +27,28 @@ class ArUco():
         self.__detector_parameters = aruco.DetectorParameters()
         self.detector = aruco.ArucoDetector(self.__dictionary, self.__detector_parameters)
 
+    def detect_markers(self, image: cv2.Mat) -> MarkerDetections:
+        """Detect all markers in OpenCV image.
+
+        Run once per frame and share the detections between all markers.
+        """
+        corners, ids, _ = self.detector.detectMarkers(image)
+        if ids is None:
+            return np.empty((0, 4, 2), dtype=np.float32), np.empty(0, dtype=np.int32)
+        return (
+            np.array(corners, dtype=np.float32).reshape(-1, 4, 2),
+            np.array(ids, dtype=np.int32).ravel()
+        )
+
     def get_marker_pixels(self, marker_id: int, size_px: int = 200) -> npt.NDArray[np.uint8]:
         """Get pixel matrix for ArUco marker using its Id."""
         return np.array(self.__dictionary.generateImageMarker(marker_id, size_px), dtype=np.uint8)
 
     def generate_marker_image(self, marker_id: int, name: str | None = None, size_px: int = 1200) -> None:
         """Generate image for ArUco marker using its Id."""
+        # Pillow is only needed for writing marker images
+        from PIL import Image
+
         marker_pixels = self.get_marker_pixels(marker_id, size_px)
         pil_image = Image.fromarray(marker_pixels)
         create_dir_if_not_exists('app/out')
@@ -49,8 +66,8 @@ class ArUco():
 class Marker():
     """Handle OpenCV ArUco marker."""
     id: int
-    corners: VecFloat | None
-    center: VecFloat | None
+    corners: VecFloat | None = None
+    center: VecFloat | None = None
     debug: bool
     __corner_buffer: deque[VecFloat] | None = None
 
@@ -68,14 +85,18 @@ class Marker():
     def detect(self, image: cv2.Mat, aruco: ArUco, disable_smooth: bool = False) -> None:
         """Detect ArUco marker in OpenCV image."""
         # Detect all image markers
-        corners, ids, _ = aruco.detector.detectMarkers(image)
+        self.update(aruco.detect_markers(image), disable_smooth)
+
+    def update(self, detections: MarkerDetections, disable_smooth: bool = False) -> None:
+        """Update ArUco marker from all markers detected in the current image."""
+        corners, ids = detections
         try:
             # Get index of the marker Id in list of all detected marker Ids
-            marker_ids: list[int] = ids[0].tolist()
+            marker_ids: list[int] = ids.tolist()
             marker_index = marker_ids.index(self.id)
             # Get corners for the marker from list of all detected corners
             marker_corners = np.array(
-                corners[0][marker_index],
+                corners[marker_index],
                 dtype=np.float32
             )
             # Set new corners as mean of corner buffer if smoothing is enabled
@@ -90,7 +111,7 @@ class Marker():
                 self.center = (self.corners[0] + self.corners[2]) * 0.5
         except Exception as e:
             if self.debug:
-                logger.warn(f'Could not detect marker with id {self.id}', e)
+                logger.warn(f'Could not detect marker with id {self.id}: {e}')
             self.corners = None
             self.center = None
 
@@ -151,7 +172,7 @@ class Marker():
 
         if self.corners is not None:
             # Estimate marker width
-            marker_width_px = int(distance.euclidean(self.corners[0], self.corners[1]))
+            marker_width_px = int(np.linalg.norm(self.corners[0] - self.corners[1]))
 
             # Get perspective transform matrix
             M = cv2.getPerspectiveTransform(
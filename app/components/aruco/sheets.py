@@ -0,0 +1,268 @@
+"""Generate printable sheets of ArUco markers."""
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import cv2
+import numpy as np
+import numpy.typing as npt
+from cv2 import aruco
+
+from app.components.helpers import create_dir_if_not_exists
+from app.logger import logger
+
+MM_PER_INCH = 25.4
+
+# Page sizes (width, height) in millimeters
+PAGE_SIZES_MM: dict[str, tuple[float, float]] = {
+    'A4': (210, 297),
+    'A3': (297, 420),
+    'Letter': (215.9, 279.4),
+}
+
+
+def parse_id_ranges(text: str) -> list[int]:
+    """Parse marker Ids from comma-separated Ids and inclusive ranges, e.g. `0-9,15`."""
+    ids: list[int] = []
+    for part in text.split(','):
+        if not part.strip():
+            continue
+        start, separator, end = part.partition('-')
+        if separator:
+            if int(end) < int(start):
+                raise ValueError(f'Invalid marker Id range {part.strip()}')
+            ids.extend(range(int(start), int(end) + 1))
+        else:
+            ids.append(int(start))
+    # Drop duplicates but keep the order
+    return list(dict.fromkeys(ids))
+
+
+def get_marker_cells(aruco_dict: int) -> int:
+    """Get number of cells per marker side (including the black border)."""
+    return int(aruco.getPredefinedDictionary(aruco_dict).markerSize) + 2
+
+
+def get_marker_count(aruco_dict: int) -> int:
+    """Get number of markers in the dictionary."""
+    return int(aruco.getPredefinedDictionary(aruco_dict).bytesList.shape[0])
+
+
+@lru_cache(maxsize=None)
+def get_marker_bitmap(aruco_dict: int, marker_id: int) -> npt.NDArray[np.uint8]:
+    """Get marker bitmap with a single pixel per cell (including the black border).
+
+    Markers of any size are scaled from this bitmap, so each Id is only generated once.
+    """
+    dictionary = aruco.getPredefinedDictionary(aruco_dict)
+    return np.array(dictionary.generateImageMarker(marker_id, get_marker_cells(aruco_dict)), dtype=np.uint8)
+
+
+def scale_marker_bitmap(bitmap: npt.NDArray[np.uint8], size_px: int) -> npt.NDArray[np.uint8]:
+    """Scale marker bitmap without blurring the cell edges."""
+    return np.array(cv2.resize(bitmap, (size_px, size_px), interpolation=cv2.INTER_NEAREST), dtype=np.uint8)
+
+
+class SheetLayout():
+    """Page layout for marker sheets (lengths in millimeters)."""
+    page_width_mm: float
+    page_height_mm: float
+    page_margin_mm: float
+    cut_margin_mm: float
+    label_height_mm: float
+    dpi: int
+
+    def __init__(self,
+                 page_width_mm: float = 210,
+                 page_height_mm: float = 297,
+                 page_margin_mm: float = 10,
+                 cut_margin_mm: float = 5,
+                 label_height_mm: float = 4,
+                 dpi: int = 300) -> None:
+        """Create sheet layout.
+
+        Every marker is surrounded by a white `cut_margin_mm` quiet zone inside its cut line,
+        the Id label is printed below the marker inside the cut line.
+        """
+        self.page_width_mm = page_width_mm
+        self.page_height_mm = page_height_mm
+        self.page_margin_mm = page_margin_mm
+        self.cut_margin_mm = cut_margin_mm
+        self.label_height_mm = label_height_mm
+        self.dpi = dpi
+
+    def to_px(self, mm: float) -> int:
+        """Convert millimeters to pixels."""
+        return round(mm / MM_PER_INCH * self.dpi)
+
+    def to_mm(self, px: int) -> float:
+        """Convert pixels to millimeters."""
+        return px * MM_PER_INCH / self.dpi
+
+    def get_cell_size_px(self, marker_size_px: int) -> tuple[int, int]:
+        """Get (width, height) of a marker cell including cut margins and label."""
+        cut_margin_px = self.to_px(self.cut_margin_mm)
+        return (
+            marker_size_px + 2 * cut_margin_px,
+            marker_size_px + 2 * cut_margin_px + self.to_px(self.label_height_mm)
+        )
+
+    def get_grid(self, marker_size_px: int) -> tuple[int, int]:
+        """Get number of (columns, rows) of marker cells fitting on a page."""
+        cell_width, cell_height = self.get_cell_size_px(marker_size_px)
+        printable_width = self.to_px(self.page_width_mm - 2 * self.page_margin_mm)
+        printable_height = self.to_px(self.page_height_mm - 2 * self.page_margin_mm)
+        return printable_width // cell_width, printable_height // cell_height
+
+
+class SheetJob():
+    """Single sheet to be rendered by a worker process."""
+    path: str
+    layout: SheetLayout
+    marker_size_px: int
+    label_size: str
+    markers: list[tuple[int, npt.NDArray[np.uint8]]]
+
+    def __init__(self,
+                 path: str,
+                 layout: SheetLayout,
+                 marker_size_px: int,
+                 label_size: str,
+                 markers: list[tuple[int, npt.NDArray[np.uint8]]]) -> None:
+        """Create sheet job from marker Ids and their bitmaps."""
+        self.path = path
+        self.layout = layout
+        self.marker_size_px = marker_size_px
+        self.label_size = label_size
+        self.markers = markers
+
+
+def render_sheet(job: SheetJob) -> str:
+    """Render sheet and write it as PNG, return its path."""
+    # Pillow is only needed for writing the sheet with its print resolution
+    from PIL import Image
+
+    layout = job.layout
+    page = np.full(
+        (layout.to_px(layout.page_height_mm), layout.to_px(layout.page_width_mm)),
+        255,
+        dtype=np.uint8
+    )
+    columns, _ = layout.get_grid(job.marker_size_px)
+    cell_width, cell_height = layout.get_cell_size_px(job.marker_size_px)
+    page_margin_px = layout.to_px(layout.page_margin_mm)
+    cut_margin_px = layout.to_px(layout.cut_margin_mm)
+    label_height_px = layout.to_px(layout.label_height_mm)
+    cut_mark_px = cut_margin_px // 3
+    # Label font scale fitting the label height (Hershey fonts are ~22px high at scale 1)
+    font_scale = 0.6 * label_height_px / 22
+    font_thickness = max(1, round(font_scale * 1.5))
+
+    for index, (marker_id, bitmap) in enumerate(job.markers):
+        row, column = divmod(index, columns)
+        x = page_margin_px + column * cell_width
+        y = page_margin_px + row * cell_height
+        # Marker inside its quiet zone
+        marker_x = x + cut_margin_px
+        marker_y = y + cut_margin_px
+        page[marker_y:marker_y+job.marker_size_px, marker_x:marker_x+job.marker_size_px] = \
+            scale_marker_bitmap(bitmap, job.marker_size_px)
+        # Id label centered below the marker
+        label = f'ID {marker_id}  {job.label_size}'
+        (text_width, text_height), _ = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, font_scale, font_thickness)
+        cv2.putText(
+            page,
+            text=label,
+            org=(x + (cell_width - text_width) // 2, marker_y + job.marker_size_px + cut_margin_px // 2 + text_height),
+            fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+            fontScale=font_scale,
+            color=0,
+            thickness=font_thickness,
+            lineType=cv2.LINE_AA
+        )
+        # Cut marks at the cell corners
+        # (No closed cut lines: the detector drops markers nested in a similar square contour)
+        for corner_x, corner_y, direction_x, direction_y in [
+            (x, y, 1, 1),
+            (x + cell_width - 1, y, -1, 1),
+            (x, y + cell_height - 1, 1, -1),
+            (x + cell_width - 1, y + cell_height - 1, -1, -1),
+        ]:
+            cv2.line(page, (corner_x, corner_y), (corner_x + direction_x * cut_mark_px, corner_y), color=0)
+            cv2.line(page, (corner_x, corner_y), (corner_x, corner_y + direction_y * cut_mark_px), color=0)
+
+    # Store print resolution, so the markers are printed at their actual size
+    Image.fromarray(page).save(job.path, dpi=(layout.dpi, layout.dpi))
+    return job.path
+
+
+class MarkerSheetGenerator():
+    """Render printable sheets of ArUco markers in parallel worker processes."""
+    aruco_dict: int
+    layout: SheetLayout
+    workers: int | None
+
+    def __init__(self, aruco_dict: int, layout: SheetLayout, workers: int | None = None) -> None:
+        """Create marker sheet generator."""
+        self.aruco_dict = aruco_dict
+        self.layout = layout
+        self.workers = workers
+
+    def get_marker_size_px(self, marker_size_mm: float) -> int:
+        """Get marker size in pixels as a multiple of the marker's cell count.
+
+        Every marker cell is then printed with the same number of pixels.
+        """
+        cells = get_marker_cells(self.aruco_dict)
+        return max(1, round(self.layout.to_px(marker_size_mm) / cells)) * cells
+
+    def create_jobs(self,
+                    marker_ids: list[int],
+                    marker_sizes_mm: list[float],
+                    directory: str,
+                    name: str) -> list[SheetJob]:
+        """Split markers into sheets for every marker size."""
+        marker_count = get_marker_count(self.aruco_dict)
+        invalid_ids = [marker_id for marker_id in marker_ids if not 0 <= marker_id < marker_count]
+        if invalid_ids:
+            raise ValueError(f'Marker Ids {invalid_ids} are not part of the dictionary (Ids 0-{marker_count - 1})')
+        # Marker bitmaps are shared across all sizes
+        markers = [(marker_id, get_marker_bitmap(self.aruco_dict, marker_id)) for marker_id in marker_ids]
+
+        jobs: list[SheetJob] = []
+        for marker_size_mm in marker_sizes_mm:
+            marker_size_px = self.get_marker_size_px(marker_size_mm)
+            actual_size_mm = self.layout.to_mm(marker_size_px)
+            if abs(actual_size_mm - marker_size_mm) > 0.5:
+                logger.warn(
+                    f'Marker size {marker_size_mm:g}mm is printed as {actual_size_mm:.1f}mm at {self.layout.dpi}dpi'
+                )
+            columns, rows = self.layout.get_grid(marker_size_px)
+            if columns * rows == 0:
+                raise ValueError(f'Markers of size {marker_size_mm:g}mm do not fit on the page')
+            per_sheet = columns * rows
+            sheet_count = math.ceil(len(markers) / per_sheet)
+            for sheet in range(sheet_count):
+                jobs.append(SheetJob(
+                    path=os.path.join(directory, f'{name}_{marker_size_mm:g}mm_{sheet + 1}.png'),
+                    layout=self.layout,
+                    marker_size_px=marker_size_px,
+                    label_size=f'{actual_size_mm:.0f}mm',
+                    markers=markers[sheet*per_sheet:(sheet+1)*per_sheet]
+                ))
+        return jobs
+
+    def generate(self,
+                 marker_ids: list[int],
+                 marker_sizes_mm: list[float],
+                 name: str = 'markers',
+                 directory: str = 'app/out/sheets') -> list[str]:
+        """Generate marker sheets for every marker size, return their paths."""
+        create_dir_if_not_exists(directory)
+        jobs = self.create_jobs(marker_ids, marker_sizes_mm, directory, name)
+        # Sheets are rendered and PNG-encoded independently, so they are spread across processes
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            paths = list(executor.map(render_sheet, jobs))
+        logger.info(f'Generated {len(paths)} marker sheets for {len(marker_ids)} markers in {directory}')
+        return paths
@@ -0,0 +1,159 @@
+"""Detect floating garbage as foreground against an adaptive background model of the pool."""
+
+import math
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.blob_detection import visualize_keypoints
+from app.components.calibration_store import get_calibration_store
+from app.logger import logger
+
+CACHE_KEY = 'background_model'
+FRAMES_CACHE_KEY = 'background_model_frames'
+
+
+class BackgroundModel():
+    """Detect foreground blobs against an adaptive background model.
+
+    The model is a running average of the downscaled (`scale`) captures within the region of interest.
+    Pixels differing from the model by more than `threshold` in any color channel are foreground,
+    cleaned up by a morphological opening and closing and split into blobs by connected components.
+    Background pixels are blended into the model with `learning_rate` (adapting to changing light),
+    foreground pixels only with `foreground_learning_rate` (so garbage is not absorbed by the model right away).
+    Blobs are reported as keypoints (in full-frame coordinates, largest first) like `BlobDetection`.
+    """
+    scale: float
+    learning_rate: float
+    foreground_learning_rate: float
+    threshold: int
+    min_area_px: float
+    max_area_px: float
+    warmup_frames: int
+    keypoints: list[cv2.KeyPoint] = []
+    # Foreground mask of the latest detection (downscaled region of interest)
+    foreground: npt.NDArray[np.uint8] | None = None
+    frames: int = 0
+    __background: npt.NDArray[np.float32] | None = None
+    __kernel: cv2.Mat
+
+    def __init__(self,
+                 scale: float = 0.25,
+                 learning_rate: float = 0.02,
+                 threshold: int = 25,
+                 min_area_px: float = 50,
+                 max_area_px: float = 50_000,
+                 warmup_frames: int = 30,
+                 kernel_size: int = 3,
+                 model_from_cache: bool = False) -> None:
+        """Create new background model (areas in full-resolution pixels)."""
+        self.scale = scale
+        self.learning_rate = learning_rate
+        self.foreground_learning_rate = learning_rate * 0.1
+        self.threshold = threshold
+        self.min_area_px = min_area_px
+        self.max_area_px = max_area_px
+        self.warmup_frames = warmup_frames
+        self.__kernel = cv2.getStructuringElement(cv2.MORPH_ELLIPSE, (kernel_size, kernel_size))
+
+        if model_from_cache:
+            self.__read_model()
+
+    @property
+    def is_warm(self) -> bool:
+        """The model has seen enough frames to report foreground."""
+        return self.frames >= self.warmup_frames
+
+    def reset(self) -> None:
+        """Discard the background model."""
+        self.__background = None
+        self.frames = 0
+        self.keypoints = []
+        self.foreground = None
+
+    def detect(self,
+               image: cv2.Mat,
+               roi: tuple[int, int, int, int] | None = None,
+               mask: npt.NDArray[np.uint8] | None = None) -> None:
+        """Detect foreground blobs and update the background model.
+
+        Restrict the detection to a region of interest (x, y, width, height)
+        and to the non-zero pixels of an ROI-sized `mask`.
+        """
+        x, y, width, height = roi if roi is not None else (0, 0, image.shape[1], image.shape[0])
+        size = (max(1, round(width * self.scale)), max(1, round(height * self.scale)))
+        # Downscale the ROI view (area interpolation averages out sensor noise)
+        small = cv2.resize(image[y:y + height, x:x + width], size, interpolation=cv2.INTER_AREA)
+        small_mask = cv2.resize(mask, size, interpolation=cv2.INTER_NEAREST) if mask is not None else None
+
+        # (Re)start the model for a new region of interest
+        if self.__background is None or self.__background.shape[:2] != small.shape[:2]:
+            if self.__background is not None:
+                logger.info('Region of interest changed: restarting background model')
+            self.__background = small.astype(np.float32)
+            self.frames = 1
+            self.keypoints = []
+            return
+
+        # Until the model is warm every pixel is learned at once (average of all frames so far)
+        if not self.is_warm:
+            cv2.accumulateWeighted(small, self.__background, max(self.learning_rate, 1 / (self.frames + 1)))
+            self.frames += 1
+            self.keypoints = []
+            return
+
+        # Foreground: largest absolute difference of all color channels
+        difference = cv2.absdiff(small, cv2.convertScaleAbs(self.__background))
+        difference = np.max(difference, axis=2) if difference.ndim == 3 else difference
+        _, foreground = cv2.threshold(difference, self.threshold, 255, cv2.THRESH_BINARY)
+        if small_mask is not None:
+            foreground = cv2.bitwise_and(foreground, small_mask)
+        # Remove speckles, then fill holes within blobs
+        foreground = cv2.morphologyEx(foreground, cv2.MORPH_OPEN, self.__kernel)
+        foreground = cv2.morphologyEx(foreground, cv2.MORPH_CLOSE, self.__kernel)
+        self.foreground = foreground
+
+        # Blend background pixels quickly and foreground pixels slowly into the model
+        cv2.accumulateWeighted(small, self.__background, self.learning_rate, mask=cv2.bitwise_not(foreground))
+        cv2.accumulateWeighted(small, self.__background, self.foreground_learning_rate, mask=foreground)
+        self.frames += 1
+
+        # Blobs as keypoints in full-frame coordinates (sized as circles of equal area)
+        count, _, stats, centroids = cv2.connectedComponentsWithStats(foreground, connectivity=8)
+        # Downscaled pixels cover blocks of (scale_x x scale_y) full-resolution pixels
+        scale_x, scale_y = width / size[0], height / size[1]
+        areas = stats[1:count, cv2.CC_STAT_AREA] * scale_x * scale_y
+        valid = np.flatnonzero((areas >= self.min_area_px) & (areas <= self.max_area_px))
+        order = valid[np.argsort(-areas[valid], kind='stable')]
+        # Downscaled pixel centers map to the centers of their blocks
+        self.keypoints = [
+            cv2.KeyPoint(
+                float((centroids[label + 1][0] + 0.5) * scale_x - 0.5 + x),
+                float((centroids[label + 1][1] + 0.5) * scale_y - 0.5 + y),
+                float(2 * math.sqrt(areas[label] / math.pi))
+            )
+            for label in order
+        ]
+
+    def visualize(self, image: cv2.Mat, color: tuple[int, int, int] = (0, 0, 255)) -> None:
+        """Render detected keypoints to OpenCV image."""
+        visualize_keypoints(image, self.keypoints, color)
+
+    def __read_model(self) -> None:
+        """Read background model from cache."""
+        store = get_calibration_store()
+        background = store.get_array(CACHE_KEY)
+        if background is None:
+            logger.info('No background model cached: warming up')
+            return
+        self.__background = background.astype(np.float32)
+        self.frames = store.get_int(FRAMES_CACHE_KEY) or 0
+
+    def write_to_cache(self) -> None:
+        """Write background model to cache."""
+        if self.__background is None:
+            return
+        # Written in the background
+        store = get_calibration_store()
+        store.set_array(CACHE_KEY, self.__background)
+        store.set_value(FRAMES_CACHE_KEY, self.frames)
+        logger.info('Wrote background model to cache')
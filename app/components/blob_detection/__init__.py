@@ -1,65 +1,172 @@
 """Handle blob detection."""
 
+import json
+import zlib
 import cv2
 import numpy as np
+import numpy.typing as npt
+from app.components.blob_detection.color_lut import ColorLUT, HSVRange, create_table_from_hsv_ranges
 from app.components.blob_detection.params import BlobDetectionParams
 from app.components.tkinter_gui import TkVarVal
 from app.util_types import VecFloat
 
+# Parameters defining the color lookup table's HSV range
+HSV_RANGE_PARAMETERS = ('hueMin', 'hueMax', 'saturationMin', 'saturationMax', 'valueMin', 'valueMax')
+
+
+def visualize_keypoints(image: cv2.Mat, keypoints: list[cv2.KeyPoint], color: tuple[int, int, int]) -> None:
+    """Render keypoints and their Ids to OpenCV image."""
+    # Render keypoint circles
+    cv2.drawKeypoints(
+        image,
+        keypoints,
+        image,
+        color=color,
+        flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS
+    )
+    # Render blob Ids as text
+    for i, keypoint in enumerate(keypoints):
+        cv2.putText(
+            image,
+            str(i),
+            np.array(keypoint.pt, dtype=int),
+            fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+            fontScale=0.5,
+            color=color,
+            thickness=1
+        )
+
 
 class BlobDetection():
     """Wrapper for OpenCV blob detection."""
     detector: cv2.SimpleBlobDetector
     keypoints: list[cv2.KeyPoint] = []
     params: BlobDetectionParams
+    params_hash: int
+    color_lut: ColorLUT | None = None
+    __memo_key: tuple[int, int] | None = None
+    __memo_preprocessed: cv2.Mat | None = None
 
-    def __init__(self, params: BlobDetectionParams) -> None:
-        """Create new OpenCv blob detection."""
+    def __init__(self, params: BlobDetectionParams, color_lut: ColorLUT | None = None) -> None:
+        """Create new OpenCv blob detection.
+
+        The color segmentation uses `color_lut`, the cached lookup table or one built from the HSV range parameters.
+        """
         # Set detection parameters
         self.params = params
+        self.color_lut = color_lut
+        self.params_hash = self.__hash_params()
         # Create detector
         self.detector = cv2.SimpleBlobDetector_create(self.params)
 
-    def detect(self, image: cv2.Mat) -> None:
-        """Detect blob keypoints in OpenCV image."""
-        # Preprocess image for better blob detection
-        preprocessed = self.preprocess_image(image)
-        # Detect blob keypoint in image
-        self.keypoints = self.detector.detect(preprocessed)
+    def detect(self,
+               image: cv2.Mat,
+               roi: tuple[int, int, int, int] | None = None,
+               mask: npt.NDArray[np.uint8] | None = None) -> None:
+        """Detect blob keypoints in OpenCV image.
+
+        Restrict the detection to a region of interest (x, y, width, height)
+        and to the non-zero pixels of an ROI-sized `mask`.
+        Keypoints are always in full-frame coordinates.
+        """
+        if roi is None:
+            # Preprocess image for better blob detection
+            preprocessed = self.preprocess_image(image)
+            # Detect blob keypoint in image
+            self.keypoints = self.detector.detect(preprocessed)
+            return
+
+        # Only preprocess and search the ROI (a view, not a copy)
+        x, y, width, height = roi
+        keypoints = self.detector.detect(self.preprocess_image(image[y:y + height, x:x + width]))
+        # Discard blobs centered outside the mask
+        if mask is not None:
+            keypoints = [
+                keypoint for keypoint in keypoints
+                if mask[min(int(keypoint.pt[1]), height - 1), min(int(keypoint.pt[0]), width - 1)]
+            ]
+        # Offset keypoints to full-frame coordinates
+        self.keypoints = [
+            cv2.KeyPoint(
+                keypoint.pt[0] + x,
+                keypoint.pt[1] + y,
+                keypoint.size,
+                keypoint.angle,
+                keypoint.response,
+                keypoint.octave,
+                keypoint.class_id
+            )
+            for keypoint in keypoints
+        ]
+
+    def detect_memoized(self, image: cv2.Mat) -> cv2.Mat:
+        """Detect blob keypoints and return the preprocessed image.
+
+        Preprocessing and detection are skipped if neither the image content
+        nor the detection parameters changed since the previous call.
+        The returned preprocessed image is shared with the memo and must not be modified.
+        """
+        # Fingerprint the entire frame (a few milliseconds even for full HD captures)
+        fingerprint = zlib.crc32(np.ascontiguousarray(image).data)
+        key = (fingerprint, self.params_hash)
+        if key != self.__memo_key or self.__memo_preprocessed is None:
+            self.__memo_preprocessed = self.preprocess_image(image)
+            self.keypoints = self.detector.detect(self.__memo_preprocessed)
+            self.__memo_key = key
+        return self.__memo_preprocessed
 
     def update_parameter(self, name: str, value: TkVarVal) -> None:
         """Update a detection parameter during execution."""
-        # Update the parameter
-        setattr(self.params, name, value)
+        self.update_parameters({name: value})
+
+    def update_parameters(self, parameters: dict[str, TkVarVal]) -> None:
+        """Update multiple detection parameters at once during execution."""
+        # Update the parameters
+        for name, value in parameters.items():
+            setattr(self.params, name, value)
+        # Rebuild the color lookup table for the new HSV range
+        if any(name in HSV_RANGE_PARAMETERS for name in parameters):
+            self.color_lut = ColorLUT(create_table_from_hsv_ranges([self.get_hsv_range()]))
+        self.params_hash = self.__hash_params()
         # Refresh the detectors parameters
         self.detector.setParams(self.params)
 
+    def get_hsv_range(self) -> HSVRange:
+        """Get the HSV range parameters as (min, max)."""
+        params = self.params
+        return (
+            (int(params.hueMin), int(params.saturationMin), int(params.valueMin)),
+            (int(params.hueMax), int(params.saturationMax), int(params.valueMax))
+        )
+
+    def get_color_lut(self) -> ColorLUT:
+        """Get the color lookup table (read from cache or built from the HSV range parameters on first use)."""
+        if self.color_lut is None:
+            self.color_lut = ColorLUT.from_cache() or ColorLUT(create_table_from_hsv_ranges([self.get_hsv_range()]))
+            self.params_hash = self.__hash_params()
+        return self.color_lut
+
+    def set_color_lut(self, color_lut: ColorLUT) -> None:
+        """Replace the color lookup table during execution (e.g. built from sampled colors)."""
+        self.color_lut = color_lut
+        self.params_hash = self.__hash_params()
+
+    def __hash_params(self) -> int:
+        """Hash the current detection parameters (and color lookup table)."""
+        lut_checksum = zlib.crc32(self.color_lut.table.data) if self.color_lut is not None else 0
+        return hash((json.dumps(self.params.to_dict(), sort_keys=True), lut_checksum))
+
     def visualize(self, image: cv2.Mat, color: tuple[int, int, int] = (0, 0, 255)) -> None:
         """Render detected keypoints to OpenCV image."""
-        # Render keypoint circles
-        cv2.drawKeypoints(
-            image,
-            self.keypoints,
-            image,
-            color=color,
-            flags=cv2.DRAW_MATCHES_FLAGS_DRAW_RICH_KEYPOINTS
-        )
-        # Render blob Ids as text
-        for i, keypoint in enumerate(self.keypoints):
-            cv2.putText(
-                image,
-                str(i),
-                np.array(keypoint.pt, dtype=int),
-                fontFace=cv2.FONT_HERSHEY_SIMPLEX,
-                fontScale=0.5,
-                color=color,
-                thickness=1
-            )
+        visualize_keypoints(image, self.keypoints, color)
 
     def preprocess_image(self, image: cv2.Mat) -> cv2.Mat:
         """Preprocess the image for blob detection."""
+        # Classify garbage colors with a single table lookup per pixel
+        if self.params.useColorSegmentation:
+            greyscale = self.get_color_lut().classify(image)
         # Extract single color channel
-        if self.params.extractColorChannel:
+        elif self.params.extractColorChannel:
             b, g, r = cv2.split(image)
             channels: dict[str, VecFloat] = {
                 'r': r,
@@ -0,0 +1,123 @@
+"""Classify pixel colors with a precomputed 3D lookup table."""
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.calibration_store import get_calibration_store
+from app.logger import logger
+
+# Bits per BGR channel: the table has 32 x 32 x 32 bins, indexed as `b << 10 | g << 5 | r`
+LUT_BITS = 5
+LUT_LEVELS = 1 << LUT_BITS
+LUT_SHIFT = 8 - LUT_BITS
+
+# HSV range as ((hue, saturation, value) min, (hue, saturation, value) max) in OpenCV's HSV scale (hue 0-179),
+# hue ranges with min > max wrap around (e.g. red)
+HSVRange = tuple[tuple[int, int, int], tuple[int, int, int]]
+
+LUTTable = npt.NDArray[np.uint8]
+
+CACHE_KEY = 'blob_detection_color_lut'
+
+
+def get_bin_colors() -> npt.NDArray[np.uint8]:
+    """Get the BGR center colors of all table bins in table order (n x 1 x 3, as OpenCV image)."""
+    levels = (np.arange(LUT_LEVELS) << LUT_SHIFT) + (1 << LUT_SHIFT) // 2
+    b, g, r = np.meshgrid(levels, levels, levels, indexing='ij')
+    colors: npt.NDArray[np.uint8] = np.stack([b, g, r], axis=-1).reshape(-1, 1, 3).astype(np.uint8)
+    return colors
+
+
+def create_table_from_hsv_ranges(ranges: list[HSVRange]) -> LUTTable:
+    """Classify all bins whose center color is within any of the HSV ranges as foreground."""
+    hsv = cv2.cvtColor(get_bin_colors(), cv2.COLOR_BGR2HSV).reshape(-1, 3).astype(np.int32)
+    foreground = np.zeros(len(hsv), dtype=np.bool_)
+    for (h_min, s_min, v_min), (h_max, s_max, v_max) in ranges:
+        hue = hsv[:, 0]
+        in_hue = (hue >= h_min) & (hue <= h_max) if h_min <= h_max else (hue >= h_min) | (hue <= h_max)
+        in_sv = (hsv[:, 1] >= s_min) & (hsv[:, 1] <= s_max) & (hsv[:, 2] >= v_min) & (hsv[:, 2] <= v_max)
+        foreground |= in_hue & in_sv
+    table: LUTTable = np.where(foreground, 255, 0).astype(np.uint8)
+    return table
+
+
+def create_table_from_samples(foreground_colors: npt.ArrayLike,
+                              background_colors: npt.ArrayLike,
+                              chunk_size: int = 4096) -> LUTTable:
+    """Classify all bins whose center color is closer to a foreground than to any background sample (in Lab).
+
+    Takes sampled BGR colors (n x 3) of both classes (e.g. garbage and water).
+    """
+    def __to_lab(colors: npt.ArrayLike) -> npt.NDArray[np.float32]:
+        # Duplicate samples (e.g. from uniform patches) do not change the distances
+        unique = np.unique(np.asarray(colors, dtype=np.uint8).reshape(-1, 3), axis=0)
+        lab: npt.NDArray[np.float32] = cv2.cvtColor(unique.reshape(-1, 1, 3), cv2.COLOR_BGR2LAB).astype(np.float32)
+        return lab.reshape(-1, 3)
+
+    def __min_distances(colors: npt.NDArray[np.float32], samples: npt.NDArray[np.float32]) -> npt.NDArray[np.float32]:
+        # Squared distances as |c|^2 - 2 c.s + |s|^2 (a single matrix product)
+        products = colors @ samples.T
+        distances: npt.NDArray[np.float32] = (
+            (samples ** 2).sum(axis=1)[None, :] - 2 * products
+        ).min(axis=1) + (colors ** 2).sum(axis=1)
+        return distances
+
+    table = np.zeros(LUT_LEVELS ** 3, dtype=np.uint8)
+    if not np.size(foreground_colors):
+        return table
+    if not np.size(background_colors):
+        return np.full(LUT_LEVELS ** 3, 255, dtype=np.uint8)
+
+    # Bin colors keep their table order (not deduplicated)
+    bins = cv2.cvtColor(get_bin_colors(), cv2.COLOR_BGR2LAB).reshape(-1, 3).astype(np.float32)
+    foreground = __to_lab(foreground_colors)
+    background = __to_lab(background_colors)
+    # Chunked to bound the size of the distance matrices
+    for start in range(0, len(bins), chunk_size):
+        chunk = bins[start:start + chunk_size]
+        closer = __min_distances(chunk, foreground) < __min_distances(chunk, background)
+        table[start:start + chunk_size] = np.where(closer, 255, 0)
+    return table
+
+
+class ColorLUT():
+    """Classify every pixel of a BGR image by a single lookup in a 3D color table.
+
+    The table holds 255 (foreground) or 0 (background) for every quantized BGR color,
+    so arbitrary color classes (e.g. hue ranges wrapping around or sampled colors) cost the same per pixel.
+    """
+    table: LUTTable
+    __index: npt.NDArray[np.uint8] | None = None
+
+    def __init__(self, table: npt.ArrayLike) -> None:
+        """Create color lookup table from table of LUT_LEVELS^3 entries."""
+        self.table = np.ascontiguousarray(table, dtype=np.uint8).reshape(LUT_LEVELS ** 3)
+
+    @staticmethod
+    def from_cache() -> 'ColorLUT | None':
+        """Read color lookup table from cache."""
+        table = get_calibration_store().get_array(CACHE_KEY)
+        if table is None or table.size != LUT_LEVELS ** 3:
+            return None
+        return ColorLUT(table)
+
+    def write_to_cache(self) -> None:
+        """Write color lookup table to cache."""
+        # Written in the background
+        get_calibration_store().set_array(CACHE_KEY, self.table.astype(np.float32))
+        logger.info('Wrote blob detection color lookup table to cache')
+
+    def classify(self, image: cv2.Mat) -> cv2.Mat:
+        """Classify BGR image (or view) into a single-channel mask (255: foreground)."""
+        height, width = image.shape[:2]
+        # Reuse the index buffer (as little-endian byte pairs) between frames of the same size
+        if self.__index is None or self.__index.shape[:2] != (height, width):
+            self.__index = np.empty((height, width, 2), dtype=np.uint8)
+        quantized = image >> LUT_SHIFT
+        b, g, r = quantized[..., 0], quantized[..., 1], quantized[..., 2]
+        # Low byte: lower 3 bits of g and r (the uint8 shift drops the upper bits of g),
+        # high byte: b and the upper 2 bits of g
+        np.bitwise_or(g << 5, r, out=self.__index[..., 0])
+        np.bitwise_or(b << 2, g >> 3, out=self.__index[..., 1])
+        mask: cv2.Mat = self.table[self.__index.view('<u2')[..., 0]]
+        return mask
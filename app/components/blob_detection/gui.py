@@ -1,17 +1,24 @@
 """GUI for adjusting blob detection parameters."""
 
+import time
 import tkinter as tk
 from app.components.blob_detection import BlobDetection
-from app.components.tkinter_gui import GUI, TkVar
+from app.components.tkinter_gui import GUI, TkVar, TkVarVal
 from app.components.tkinter_gui.components import HorizontalSlider, Checkbox
 
 
 class BlobDetectionGUI(GUI):
     """GUI for adjusting the blob detection parameters."""
     blob_detection: BlobDetection
+    debounce_ms: int
+    __pending_parameters: dict[str, TkVarVal]
+    __last_change: float = 0
 
-    def __init__(self, blob_detection: BlobDetection) -> None:
-        """Create new blob detection GUI."""
+    def __init__(self, blob_detection: BlobDetection, debounce_ms: int = 150) -> None:
+        """Create new blob detection GUI.
+
+        Parameter changes are applied once no further change happened for `debounce_ms`.
+        """
         # Instantiate GUI
         super().__init__(
             'Configure blob detection',
@@ -20,6 +27,8 @@ class BlobDetectionGUI(GUI):
         )
 
         self.blob_detection = blob_detection
+        self.debounce_ms = debounce_ms
+        self.__pending_parameters = {}
 
         # Set blob detection parameters
         params = blob_detection.params
@@ -84,6 +93,121 @@ class BlobDetectionGUI(GUI):
         gButton.pack()
         bButton.pack()
 
+        ######################
+        # Color segmentation #
+        ######################
+
+        # Classify garbage colors using the color lookup table
+        useColorSegmentation = tk.BooleanVar(
+            self.frame,
+            name='useColorSegmentation',
+            value=params.useColorSegmentation
+        )
+        self.trace_var(useColorSegmentation)
+        colorSegCheckbox = Checkbox(
+            self.frame,
+            label='useColorSegmentation',
+            variable=useColorSegmentation
+        )
+        colorSegCheckbox.pack()
+        # HSV range sliders (rebuild the color lookup table)
+        # Min hue slider (min > max wraps around, e.g. for red)
+        hueMin = tk.IntVar(
+            self.frame,
+            name='hueMin',
+            value=params.hueMin
+        )
+        self.trace_var(hueMin)
+        hMinSlider = HorizontalSlider(
+            self.frame,
+            label='hueMin',
+            from_=0,
+            to=179,
+            resolution=1,
+            variable=hueMin
+        )
+        hMinSlider.pack()
+        # Max hue slider
+        hueMax = tk.IntVar(
+            self.frame,
+            name='hueMax',
+            value=params.hueMax
+        )
+        self.trace_var(hueMax)
+        hMaxSlider = HorizontalSlider(
+            self.frame,
+            label='hueMax',
+            from_=0,
+            to=179,
+            resolution=1,
+            variable=hueMax
+        )
+        hMaxSlider.pack()
+        # Min saturation slider
+        saturationMin = tk.IntVar(
+            self.frame,
+            name='saturationMin',
+            value=params.saturationMin
+        )
+        self.trace_var(saturationMin)
+        sMinSlider = HorizontalSlider(
+            self.frame,
+            label='saturationMin',
+            from_=0,
+            to=255,
+            resolution=1,
+            variable=saturationMin
+        )
+        sMinSlider.pack()
+        # Max saturation slider
+        saturationMax = tk.IntVar(
+            self.frame,
+            name='saturationMax',
+            value=params.saturationMax
+        )
+        self.trace_var(saturationMax)
+        sMaxSlider = HorizontalSlider(
+            self.frame,
+            label='saturationMax',
+            from_=0,
+            to=255,
+            resolution=1,
+            variable=saturationMax
+        )
+        sMaxSlider.pack()
+        # Min value slider
+        valueMin = tk.IntVar(
+            self.frame,
+            name='valueMin',
+            value=params.valueMin
+        )
+        self.trace_var(valueMin)
+        vMinSlider = HorizontalSlider(
+            self.frame,
+            label='valueMin',
+            from_=0,
+            to=255,
+            resolution=1,
+            variable=valueMin
+        )
+        vMinSlider.pack()
+        # Max value slider
+        valueMax = tk.IntVar(
+            self.frame,
+            name='valueMax',
+            value=params.valueMax
+        )
+        self.trace_var(valueMax)
+        vMaxSlider = HorizontalSlider(
+            self.frame,
+            label='valueMax',
+            from_=0,
+            to=255,
+            resolution=1,
+            variable=valueMax
+        )
+        vMaxSlider.pack()
+
         ########
         # Blur #
         ########
@@ -428,13 +552,32 @@ class BlobDetectionGUI(GUI):
         ################
         writeButton = tk.Button(
             self.frame,
-            text='Write parameters to cache.',
-            command=self.blob_detection.params.__write_parameters__
+            text='Write parameters (and color lookup table) to cache.',
+            command=self.__write_parameters
         )
         writeButton.pack()
 
+    def update(self) -> None:
+        """Update tkinter UI and apply debounced parameter changes."""
+        super().update()
+        elapsed_ms = (time.perf_counter() - self.__last_change) * 1000
+        if self.__pending_parameters and elapsed_ms >= self.debounce_ms:
+            self.__apply_parameters()
+
     def trace_callback(self, var: TkVar, name: str, index: str, mode: str) -> None:
-        """Update blob detection parameters on Var trace."""
-        # Update the traced parameter
-        val = var.get()
-        self.blob_detection.update_parameter(name, val)
+        """Queue blob detection parameter update on Var trace."""
+        # Only keep the latest value of the traced parameter
+        self.__pending_parameters[name] = var.get()
+        self.__last_change = time.perf_counter()
+
+    def __apply_parameters(self) -> None:
+        """Apply all pending parameter changes at once."""
+        self.blob_detection.update_parameters(self.__pending_parameters)
+        self.__pending_parameters = {}
+
+    def __write_parameters(self) -> None:
+        """Apply pending parameter changes and write parameters to cache."""
+        self.__apply_parameters()
+        self.blob_detection.params.__write_parameters__()
+        if self.blob_detection.color_lut is not None:
+            self.blob_detection.color_lut.write_to_cache()
@@ -1,9 +1,9 @@
 """Parameters for blob detection."""
 
-import json
 import cv2
 from typing import Literal
-from app.components.helpers import create_dir_if_not_exists
+from app.components.calibration_store import get_calibration_store
+from app.components.tkinter_gui import TkVarVal
 from app.logger import logger
 
 ColorChannel = Literal['r', 'g', 'b']
@@ -51,8 +51,16 @@ class BlobDetectionParams(cv2.SimpleBlobDetector_Params):  # type: ignore
     # Blur
     useBlur: bool
     blurAmount: int
+    # Color segmentation (HSV range of the garbage colors, OpenCV hue scale 0-179, min > max wraps around)
+    useColorSegmentation: bool
+    hueMin: int
+    hueMax: int
+    saturationMin: int
+    saturationMax: int
+    valueMin: int
+    valueMax: int
 
-    __CACHE_FILNAME = 'blob_detection_parameters.json'
+    __CACHE_KEY = 'blob_detection_parameters'
 
     def __init__(self,
                  useBinaryThresholds: bool = False,
@@ -60,6 +68,13 @@ class BlobDetectionParams(cv2.SimpleBlobDetector_Params):  # type: ignore
                  colorChannel: ColorChannel = 'g',
                  useBlur: bool = False,
                  blurAmount: int = 5,
+                 useColorSegmentation: bool = False,
+                 hueMin: int = 0,
+                 hueMax: int = 179,
+                 saturationMin: int = 0,
+                 saturationMax: int = 255,
+                 valueMin: int = 0,
+                 valueMax: int = 255,
                  params_from_cache: bool = False) -> None:
         """Create new blob detection parameters."""
         super().__init__()
@@ -68,32 +83,41 @@ class BlobDetectionParams(cv2.SimpleBlobDetector_Params):  # type: ignore
         self.colorChannel = colorChannel
         self.useBlur = useBlur
         self.blurAmount = blurAmount
+        self.useColorSegmentation = useColorSegmentation
+        self.hueMin = hueMin
+        self.hueMax = hueMax
+        self.saturationMin = saturationMin
+        self.saturationMax = saturationMax
+        self.valueMin = valueMin
+        self.valueMax = valueMax
 
         if params_from_cache:
             self.__read_parameters()
 
     def __read_parameters(self) -> None:
         """Read blob detection parameters from cache."""
-        try:
-            with open(f'app/cache/{self.__CACHE_FILNAME}', 'r') as f:
-                params = json.load(f)
-                for key, value in params.items():
-                    setattr(self, key, value)
-        except Exception as e:
-            logger.warn(f'Failed reading blob detection parameters from cache: {e}')
+        params = get_calibration_store().get_params(self.__CACHE_KEY)
+        if params is None:
+            logger.warn('Failed reading blob detection parameters from cache')
+            return
+        for key, value in params.items():
+            try:
+                setattr(self, key, value)
+            except Exception as e:
+                logger.warn(f'Failed setting cached blob detection parameter {key}: {e}')
+
+    def to_dict(self) -> dict[str, TkVarVal]:
+        """Get all blob detection parameters as dictionary."""
+        # Dirty hack to access the OpenCV base-class-attributes (IMPROVE ME!)
+        attribute_names = dir(self)
+        public_attribute_names = [
+            name for name in attribute_names
+            if name[0] != '_' and not callable(self.__getattribute__(name))
+        ]
+        return {name: self.__getattribute__(name) for name in public_attribute_names}
 
     def __write_parameters__(self) -> None:
         """Write blob detection parameters to cache."""
-        try:
-            # Dirty hack to access the OpenCV base-class-attributes (IMPROVE ME!)
-            attribute_names = dir(self)
-            public_attribute_names = [name for name in attribute_names if name[0] != '_']
-            parameter_dict = {name: self.__getattribute__(name) for name in public_attribute_names}
-
-            # Write parameters to JSON file
-            create_dir_if_not_exists('app/cache')
-            with open(f'app/cache/{self.__CACHE_FILNAME}', 'w+') as f:
-                json.dump(parameter_dict, f)
-            logger.info('Wrote blob detection parameters to cache')
-        except Exception as e:
-            logger.warn(f'Failed writing blob detection parameters to cache: {e}')
+        # Written in the background
+        get_calibration_store().set_value(self.__CACHE_KEY, self.to_dict())
+        logger.info('Wrote blob detection parameters to cache')
@@ -0,0 +1,76 @@
+"""Sample garbage and water colors from the capture to build the color lookup table."""
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.blob_detection import BlobDetection
+from app.components.blob_detection.color_lut import ColorLUT, create_table_from_samples
+from app.components.opencv_ui import UIState
+from app.components.opencv_ui.text import TextBox
+from app.util_types import VecFloat
+
+
+class ColorSamplingUI(UIState):
+    """UI for sampling garbage (left click) and water (right click) colors.
+
+    Every click samples the capture's pixels around the mouse position
+    and rebuilds the blob detection's color lookup table from all samples.
+    """
+    blob_detection: BlobDetection
+    patch_size: int
+    __garbage_colors: list[npt.NDArray[np.uint8]]
+    __water_colors: list[npt.NDArray[np.uint8]]
+    # Clicks as (is garbage, position) until the next capture is sampled
+    __pending_clicks: list[tuple[bool, VecFloat]]
+
+    def __init__(self, blob_detection: BlobDetection, patch_size: int = 5) -> None:
+        """Create new color sampling UI."""
+        super().__init__(
+            keycode=99,
+            keyname='C',
+            name='Color sampling',
+            instructions='Left click: garbage, right click: water, "R": reset (enable useColorSegmentation)'
+        )
+        self.blob_detection = blob_detection
+        self.patch_size = patch_size
+        self.__garbage_colors = []
+        self.__water_colors = []
+        self.__pending_clicks = []
+
+    def on_key(self, keypress: int) -> None:
+        """Reset all samples on "R"."""
+        if keypress == 114:
+            self.__garbage_colors = []
+            self.__water_colors = []
+
+    def on_mouse(self, event: int, mouse_pos: VecFloat) -> None:
+        """Queue garbage (left click) or water (right click) sample."""
+        if event == cv2.EVENT_LBUTTONDOWN:
+            self.__pending_clicks.append((True, mouse_pos))
+        elif event == cv2.EVENT_RBUTTONDOWN:
+            self.__pending_clicks.append((False, mouse_pos))
+
+    def sample(self, image: cv2.Mat) -> None:
+        """Sample the unannotated capture at all clicks since the last capture and rebuild the lookup table."""
+        if not self.__pending_clicks:
+            return
+        height, width = image.shape[:2]
+        radius = self.patch_size // 2
+        for is_garbage, (x, y) in self.__pending_clicks:
+            x, y = int(np.clip(x, 0, width - 1)), int(np.clip(y, 0, height - 1))
+            patch = image[max(0, y - radius):y + radius + 1, max(0, x - radius):x + radius + 1].reshape(-1, 3)
+            (self.__garbage_colors if is_garbage else self.__water_colors).append(patch.copy())
+        self.__pending_clicks = []
+        self.blob_detection.set_color_lut(ColorLUT(create_table_from_samples(
+            np.concatenate(self.__garbage_colors) if self.__garbage_colors else np.empty((0, 3), dtype=np.uint8),
+            np.concatenate(self.__water_colors) if self.__water_colors else np.empty((0, 3), dtype=np.uint8)
+        )))
+
+    def render(self, image: cv2.Mat) -> None:
+        """Render the number of samples."""
+        samples_text_box = TextBox(
+            [f'Garbage samples: {len(self.__garbage_colors)}', f'Water samples: {len(self.__water_colors)}'],
+            0,
+            100
+        )
+        samples_text_box.render(image)
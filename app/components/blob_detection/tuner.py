@@ -0,0 +1,294 @@
+"""Offline tuning of blob detection parameters against labeled frames."""
+
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Literal
+import cv2
+import numpy as np
+from app.components.blob_detection import BlobDetection
+from app.components.blob_detection.params import BlobDetectionParams
+from app.components.tkinter_gui import TkVarVal
+from app.util_types import VecFloat
+from app.logger import logger
+
+ParamDict = dict[str, TkVarVal]
+SearchMode = Literal['random', 'refine']
+
+# Labeled garbage as (x, y, size) in pixels
+LabeledFrame = tuple[cv2.Mat, VecFloat]
+
+# Frames loaded once per worker process
+_worker_frames: list[LabeledFrame] = []
+
+
+def load_labeled_frames(labels_path: str) -> list[LabeledFrame]:
+    """Load labeled frames.
+
+    The labels file is a JSON list of frames:
+    `[{"image": "path/to/frame.png", "garbage": [{"x": 10, "y": 20, "size": 30}, ...]}, ...]`
+    Positions and sizes are in pixels of the (corrected) frame.
+    """
+    with open(labels_path, 'r') as f:
+        labels = json.load(f)
+    frames: list[LabeledFrame] = []
+    for frame in labels:
+        image = cv2.imread(frame['image'])
+        if image is None:
+            raise ValueError(f'Could not read labeled frame {frame["image"]}')
+        garbage = np.array(
+            [[g['x'], g['y'], g['size']] for g in frame['garbage']],
+            dtype=np.float32
+        ).reshape(-1, 3)
+        frames.append((image, garbage))
+    return frames
+
+
+def _init_worker(labels_path: str) -> None:
+    """Load labeled frames into worker process."""
+    # Single-threaded OpenCV for comparable latencies across parallel trials
+    cv2.setNumThreads(1)
+    _worker_frames.extend(load_labeled_frames(labels_path))
+
+
+def __match(keypoints: list[cv2.KeyPoint], garbage: VecFloat, tolerance_px: float) -> int:
+    """Greedily match keypoints to labeled garbage, return number of true positives."""
+    if not keypoints or len(garbage) == 0:
+        return 0
+    detected = np.array([keypoint.pt for keypoint in keypoints], dtype=np.float32)
+    # Pairwise distances between labels (rows) and detections (columns)
+    distances = np.linalg.norm(garbage[:, None, :2] - detected[None, :, :], axis=2)
+    max_distances = np.maximum(garbage[:, 2] * 0.5, tolerance_px)[:, None]
+    distances[distances > max_distances] = np.inf
+    true_positives = 0
+    # Match closest pairs first
+    for _ in range(min(distances.shape)):
+        label_idx, detection_idx = np.unravel_index(np.argmin(distances), distances.shape)
+        if not np.isfinite(distances[label_idx, detection_idx]):
+            break
+        true_positives += 1
+        distances[label_idx, :] = np.inf
+        distances[:, detection_idx] = np.inf
+    return true_positives
+
+
+class TrialResult():
+    """Score of a single parameter set."""
+    params: ParamDict
+    precision: float
+    recall: float
+    f1: float
+    latency_ms: float
+    score: float
+
+    def __init__(self, params: ParamDict, precision: float, recall: float, latency_ms: float,
+                 latency_weight: float) -> None:
+        """Create new trial result and calculate its objective score."""
+        self.params = params
+        self.precision = precision
+        self.recall = recall
+        self.f1 = 2 * precision * recall / (precision + recall) if precision + recall > 0 else 0
+        self.latency_ms = latency_ms
+        # Accuracy minus weighted latency: prefer fast parameters among similarly accurate ones
+        self.score = self.f1 - latency_weight * latency_ms
+
+    def __str__(self) -> str:
+        """Format trial result."""
+        return (
+            f'score={self.score:.3f} f1={self.f1:.3f} precision={self.precision:.3f}'
+            f' recall={self.recall:.3f} latency={self.latency_ms:.2f}ms'
+        )
+
+
+def _evaluate(params: ParamDict, tolerance_px: float, latency_weight: float) -> TrialResult:
+    """Score parameter set on all labeled frames of the worker."""
+    blob_detection = BlobDetection(create_params(params))
+    detections = 0
+    labels = 0
+    true_positives = 0
+    latencies_ms: list[float] = []
+    for image, garbage in _worker_frames:
+        start = time.perf_counter()
+        blob_detection.detect(image)
+        latencies_ms.append((time.perf_counter() - start) * 1000)
+        detections += len(blob_detection.keypoints)
+        labels += len(garbage)
+        true_positives += __match(blob_detection.keypoints, garbage, tolerance_px)
+    precision = true_positives / detections if detections else 0
+    recall = true_positives / labels if labels else 0
+    return TrialResult(params, precision, recall, float(np.median(latencies_ms)), latency_weight)
+
+
+def create_params(params: ParamDict) -> BlobDetectionParams:
+    """Create blob detection parameters from parameter dictionary."""
+    detection_params = BlobDetectionParams()
+    for key, value in params.items():
+        setattr(detection_params, key, value)
+    return detection_params
+
+
+def __ordered(a: float, b: float) -> tuple[float, float]:
+    return (a, b) if a <= b else (b, a)
+
+
+def sample_params(rng: random.Random) -> ParamDict:
+    """Sample random parameter set from the search space."""
+    min_threshold, max_threshold = __ordered(rng.randint(0, 255), rng.randint(0, 255))
+    min_area, max_area = __ordered(
+        math.exp(rng.uniform(math.log(1), math.log(10_000))),
+        math.exp(rng.uniform(math.log(2_500), math.log(100_000)))
+    )
+    min_circularity, max_circularity = __ordered(rng.uniform(0.1, 1), rng.uniform(0.1, 1))
+    min_convexity, max_convexity = __ordered(rng.uniform(0.1, 1), rng.uniform(0.1, 1))
+    min_inertia, max_inertia = __ordered(rng.uniform(0.1, 1), rng.uniform(0.1, 1))
+    return {
+        # Thresholds
+        'useBinaryThresholds': rng.random() < 0.5,
+        'minThreshold': int(min_threshold),
+        'maxThreshold': int(max_threshold),
+        # Fewer threshold steps are considerably faster
+        'thresholdStep': float(rng.randint(5, 50)),
+        # Color channel
+        'extractColorChannel': rng.random() < 0.5,
+        'colorChannel': rng.choice(['r', 'g', 'b']),
+        # Blur
+        'useBlur': rng.random() < 0.5,
+        'blurAmount': rng.randint(2, 60),
+        # Color
+        'filterByColor': rng.random() < 0.5,
+        'blobColor': rng.choice([0, 255]),
+        # Area
+        'filterByArea': rng.random() < 0.5,
+        'minArea': min_area,
+        'maxArea': max_area,
+        # Circularity
+        'filterByCircularity': rng.random() < 0.5,
+        'minCircularity': min_circularity,
+        'maxCircularity': max_circularity,
+        # Convexity
+        'filterByConvexity': rng.random() < 0.5,
+        'minConvexity': min_convexity,
+        'maxConvexity': max_convexity,
+        # Inertia
+        'filterByInertia': rng.random() < 0.5,
+        'minInertiaRatio': min_inertia,
+        'maxInertiaRatio': max_inertia,
+    }
+
+
+def perturb_params(params: ParamDict, rng: random.Random, scale: float = 0.15) -> ParamDict:
+    """Sample parameter set in the neighborhood of an existing one."""
+    sampled = sample_params(rng)
+    perturbed: ParamDict = {}
+    for key, value in params.items():
+        # Occasionally take a fresh sample to escape local optima
+        if rng.random() < scale:
+            perturbed[key] = sampled[key]
+        # Keep categorical parameters
+        elif isinstance(value, bool) or isinstance(value, str) or key == 'blobColor':
+            perturbed[key] = value
+        elif isinstance(value, int):
+            perturbed[key] = int(round(value + rng.gauss(0, scale) * max(abs(value), 10)))
+        else:
+            perturbed[key] = value * math.exp(rng.gauss(0, scale))
+
+    # Keep parameters within their valid ranges
+    def __clamp(key: str, low: float, high: float) -> None:
+        perturbed[key] = type(perturbed[key])(min(max(float(perturbed[key]), low), high))
+    for key in ('minThreshold', 'maxThreshold'):
+        __clamp(key, 0, 255)
+    __clamp('thresholdStep', 1, 100)
+    __clamp('blurAmount', 2, 200)
+    for key in ('minCircularity', 'maxCircularity', 'minConvexity', 'maxConvexity',
+                'minInertiaRatio', 'maxInertiaRatio'):
+        __clamp(key, 0.01, 1)
+    for low_key, high_key in (('minThreshold', 'maxThreshold'), ('minArea', 'maxArea'),
+                              ('minCircularity', 'maxCircularity'), ('minConvexity', 'maxConvexity'),
+                              ('minInertiaRatio', 'maxInertiaRatio')):
+        low, high = __ordered(float(perturbed[low_key]), float(perturbed[high_key]))
+        perturbed[low_key] = type(perturbed[low_key])(low)
+        perturbed[high_key] = type(perturbed[high_key])(high)
+    return perturbed
+
+
+class BlobDetectionTuner():
+    """Search blob detection parameters in parallel worker processes.
+
+    Search modes:
+    - `random`: Sample all trials from the entire search space.
+    - `refine`: Sample the first half randomly,
+      then sample around the best trials found so far (elite refinement).
+    """
+    labels_path: str
+    trials: int
+    mode: SearchMode
+    latency_weight: float
+    tolerance_px: float
+    workers: int | None
+    seed: int | None
+    results: list[TrialResult]
+
+    def __init__(self,
+                 labels_path: str,
+                 trials: int = 200,
+                 mode: SearchMode = 'refine',
+                 latency_weight: float = 0.005,
+                 tolerance_px: float = 10,
+                 workers: int | None = None,
+                 seed: int | None = None) -> None:
+        """Create new blob detection parameter tuner.
+
+        `latency_weight` is the score penalty per millisecond of median detection latency.
+        """
+        self.labels_path = labels_path
+        self.trials = trials
+        self.mode = mode
+        self.latency_weight = latency_weight
+        self.tolerance_px = tolerance_px
+        self.workers = workers
+        self.seed = seed
+        self.results = []
+
+    @property
+    def best(self) -> TrialResult | None:
+        """Best trial so far."""
+        if not self.results:
+            return None
+        return max(self.results, key=lambda result: result.score)
+
+    def run(self) -> TrialResult | None:
+        """Run all trials and return the best one."""
+        rng = random.Random(self.seed)
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            initializer=_init_worker,
+            initargs=(self.labels_path,)
+        ) as executor:
+            # Run trials in batches so refinement can use results of previous batches
+            batch_size = self.workers or os.cpu_count() or 1
+            random_trials = self.trials if self.mode == 'random' else self.trials // 2
+            while len(self.results) < self.trials:
+                count = min(batch_size, self.trials - len(self.results))
+                if len(self.results) < random_trials:
+                    candidates = [sample_params(rng) for _ in range(count)]
+                else:
+                    elite = sorted(self.results, key=lambda result: result.score, reverse=True)[:5]
+                    candidates = [perturb_params(rng.choice(elite).params, rng) for _ in range(count)]
+                futures = [
+                    executor.submit(_evaluate, params, self.tolerance_px, self.latency_weight)
+                    for params in candidates
+                ]
+                self.results.extend(future.result() for future in futures)
+                logger.info(f'Finished {len(self.results)}/{self.trials} trials, best: {self.best}')
+        return self.best
+
+    def write_best(self) -> None:
+        """Write the best parameter set to the blob detection parameter cache."""
+        best = self.best
+        if best is not None:
+            create_params(best.params).__write_parameters__()
+        else:
+            logger.warn('Failed writing tuned blob detection parameters: no trials were run')
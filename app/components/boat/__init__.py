@@ -1,11 +1,14 @@
 """Autonomous boat controls."""
 
+import math
+import time
 import cv2
 import numpy as np
-from scipy.spatial import distance
-from app.components.aruco import ArUco, Marker
+from app.components.aruco import ArUco, Marker, MarkerDetections
 from app.components.opencv_ui import UIState
 from app.components.opencv_ui.text import TextBox
+from app.components.pose_estimation import MarkerPose
+from app.components.trajectory import Trajectory
 from app.util_types import VecFloat
 
 
@@ -15,55 +18,112 @@ class Boat():
     __marker_size_mm: float
     __center: VecFloat | None = None
     direction: VecFloat | None = None
+    pose: MarkerPose | None = None
     velocity_m_per_s: float = 0
-    __steps: int = 0
+    # Pixel positions of the recent detections
+    trajectory: Trajectory
+    # `time.perf_counter()` of the previous detection
+    __detected_s: float | None = None
 
-    def __init__(self, marker_id: int, marker_size_mm: float) -> None:
+    def __init__(self, marker_id: int, marker_size_mm: float, trajectory_capacity: int = 512) -> None:
         """Create new autonomous boat controls."""
         self.marker = Marker(
             marker_id
         )
         self.__marker_size_mm = marker_size_mm
+        self.trajectory = Trajectory(trajectory_capacity)
 
-    def update_location_and_velocity(self, image: cv2.Mat, aruco: ArUco, step_duration_ms: int) -> None:
-        """Calculate the boat's position, direction and velocity."""
-        # Add calculation step
-        self.__steps += 1
+    @property
+    def center(self) -> VecFloat | None:
+        """Last detected boat position in pixels."""
+        return self.__center
 
-        # Previous position
+    @property
+    def mm_per_px(self) -> float | None:
+        """Image scale at the boat marker (only valid for top-down perspective)."""
+        corners = self.marker.corners
+        return None if corners is None else self.__px_to_mm(1, corners)
+
+    @property
+    def position_mm(self) -> VecFloat | None:
+        """Last estimated boat position in the pool frame (requires pose estimation)."""
+        return None if self.pose is None else np.array(self.pose.position_mm, dtype=np.float32)
+
+    @property
+    def yaw_rad(self) -> float | None:
+        """Last estimated boat rotation around the pool's z-axis (requires pose estimation)."""
+        return None if self.pose is None else self.pose.yaw_rad
+
+    def update_location_and_velocity(self,
+                                     image: cv2.Mat,
+                                     aruco: ArUco,
+                                     detections: MarkerDetections | None = None,
+                                     poses: dict[int, MarkerPose] | None = None) -> None:
+        """Calculate the boat's position, direction and velocity.
+
+        Pass the frame's marker `detections` to share a single detection pass between components.
+        With marker `poses` the velocity is measured in the pool frame,
+        otherwise it is estimated from the marker's pixel size (only valid for top-down perspective).
+        The velocity covers the time elapsed since the previous detection (incl. skipped frames).
+        """
+        # Previous position and detection time
         p_center = self.__center
+        p_pose = self.pose
+        p_detected_s = self.__detected_s
 
         # Detect boat marker
-        self.marker.detect(image, aruco)
+        self.marker.update(detections if detections is not None else aruco.detect_markers(image))
         corners = self.marker.corners
         center = self.marker.center
+        pose = None if poses is None else poses.get(self.marker.id)
 
         # If marker is detected
         if corners is not None and center is not None:
             # Update boat position
+            detected_s = time.perf_counter()
             self.__center = center
+            self.pose = pose
+            self.__detected_s = detected_s
 
             # Calculate new direction
             self.direction = self.__calculate_direction(corners)
+            # Record trajectory
+            self.trajectory.append(
+                detected_s,
+                center,
+                math.atan2(float(self.direction[1]), float(self.direction[0]))
+            )
 
             # If previous position was recorded
-            if p_center is not None:
+            if p_center is not None and p_detected_s is not None and detected_s > p_detected_s:
                 # Calculate velocity
-                moved_distance_px = distance.euclidean(p_center, center)
-                moved_distance_mm = self.__px_to_mm(moved_distance_px, corners)
-                d_time_ms = self.__steps * step_duration_ms
+                if pose is not None and p_pose is not None:
+                    moved_distance_mm = float(np.linalg.norm(pose.position_mm - p_pose.position_mm))
+                else:
+                    moved_distance_px = float(np.linalg.norm(p_center - center))
+                    moved_distance_mm = self.__px_to_mm(moved_distance_px, corners)
+                d_time_ms = (detected_s - p_detected_s) * 1000
                 velocity_mm_per_ms = moved_distance_mm / d_time_ms
                 # mm/ms = m/s
                 self.velocity_m_per_s = velocity_mm_per_ms
-
-                # Reset steps if all calculations were successful
-                self.__steps = 0
         else:
             # Reset direction if marker is not detected
             self.direction = None
+            self.pose = None
 
-    def visualize(self, image: cv2.Mat, direction_line_length_px: int = 100) -> None:
-        """Visualize the boat position and direction."""
+    def get_smoothed_velocity_m_per_s(self, window_s: float = 1) -> float | None:
+        """Estimate velocity by a least-squares fit over the trajectory of the last `window_s` seconds."""
+        corners = self.marker.corners
+        velocity_px_per_s = self.trajectory.estimate_velocity(window_s)
+        if corners is None or velocity_px_per_s is None:
+            return None
+        # mm/s -> m/s
+        return self.__px_to_mm(float(np.linalg.norm(velocity_px_per_s)), corners) / 1000
+
+    def visualize(self, image: cv2.Mat, direction_line_length_px: int = 100, trail_duration_s: float = 10) -> None:
+        """Visualize the boat position, direction and recent trajectory."""
+        # Render trajectory
+        self.trajectory.visualize(image, trail_duration_s)
         # Render marker position
         self.marker.visualize(image, render_id=False)
         # Render boat direction
@@ -107,10 +167,10 @@ class Boat():
     def __px_to_mm(self, px: float, corners: VecFloat) -> float:
         """Calculate millimeters from pixels using known marker size."""
         # Marker side lengths in px
-        l_top = distance.euclidean(corners[0], corners[1])
-        l_bottom = distance.euclidean(corners[3], corners[2])
-        l_left = distance.euclidean(corners[0], corners[3])
-        l_right = distance.euclidean(corners[1], corners[2])
+        l_top = float(np.linalg.norm(corners[0] - corners[1]))
+        l_bottom = float(np.linalg.norm(corners[3] - corners[2]))
+        l_left = float(np.linalg.norm(corners[0] - corners[3]))
+        l_right = float(np.linalg.norm(corners[1] - corners[2]))
 
         # Average marker side length
         l_mean_px = float(np.mean([l_top, l_bottom, l_left, l_right]))
@@ -142,5 +202,18 @@ class BoatUI(UIState):
             f'Velocity [m/s]: {"{:.3f}".format(self.__boat.velocity_m_per_s)}',
             f'Velocity [cm/s]: {"{:.2f}".format(velocity_cm_per_s)}'
         ]
+        # Velocity fitted over the trajectory of the last second
+        smoothed_velocity_m_per_s = self.__boat.get_smoothed_velocity_m_per_s()
+        if smoothed_velocity_m_per_s is not None:
+            parameters_text.append(f'Smoothed velocity [cm/s]: {smoothed_velocity_m_per_s * 100:.2f}')
+        # Metric pose (if estimated)
+        position_mm = self.__boat.position_mm
+        yaw_rad = self.__boat.yaw_rad
+        if position_mm is not None and yaw_rad is not None:
+            x_mm, y_mm, z_mm = position_mm
+            parameters_text += [
+                f'Position [mm]: {x_mm:.0f}, {y_mm:.0f}, {z_mm:.0f}',
+                f'Yaw [deg]: {math.degrees(yaw_rad):.1f}'
+            ]
         params_text_box = TextBox(parameters_text, 0, 200)
         params_text_box.render(image)
@@ -0,0 +1,184 @@
+"""Versioned store for all calibration state."""
+
+import atexit
+import json
+import os
+import threading
+import time
+import numpy as np
+from app.components.helpers import create_dir_if_not_exists
+from app.util_types import VecFloat
+from app.logger import logger
+
+CALIBRATION_STORE_VERSION = 1
+
+CalibrationValue = int | float | str | bool
+CalibrationParams = dict[str, CalibrationValue]
+
+# Legacy JSON caches imported when no calibration store exists yet
+LEGACY_CACHES = {
+    'perspective_transform_matrix': 'app/cache/perspective_correction.json',
+    'blob_detection_parameters': 'app/cache/blob_detection_parameters.json',
+    'floating_garbage_blob_id': 'app/cache/floating_garbage.json',
+    'pool_corners': 'app/cache/pool_constraints.json',
+}
+
+
+class CalibrationStore():
+    """Versioned store for all calibration state.
+
+    The store is loaded once and serves all values from memory.
+    Changes are written atomically as a single `.npz` file (arrays in binary form, other values as JSON metadata)
+    by a background thread, coalescing all changes within `coalesce_s` into a single write.
+    """
+    path: str
+    coalesce_s: float
+    __values: dict[str, CalibrationValue | CalibrationParams]
+    __arrays: dict[str, VecFloat]
+    __lock: threading.Lock
+    __write_lock: threading.Lock
+    __changed: threading.Event
+    __version: int = 0
+    __written_version: int = 0
+    __thread: threading.Thread
+
+    def __init__(self, path: str, coalesce_s: float = 0.5) -> None:
+        """Load calibration store and start its writer thread."""
+        self.path = path
+        self.coalesce_s = coalesce_s
+        self.__values = {}
+        self.__arrays = {}
+        self.__lock = threading.Lock()
+        self.__write_lock = threading.Lock()
+        self.__changed = threading.Event()
+
+        if os.path.exists(path):
+            self.__load()
+        else:
+            self.__import_legacy_caches()
+
+        self.__thread = threading.Thread(target=self.__write_loop, name='calibration-store', daemon=True)
+        self.__thread.start()
+        # Never lose changes still waiting for the writer thread
+        atexit.register(self.flush)
+
+    def get_array(self, key: str) -> VecFloat | None:
+        """Get calibration array."""
+        return self.__arrays.get(key)
+
+    def get_int(self, key: str) -> int | None:
+        """Get integer calibration value."""
+        value = self.__values.get(key)
+        return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+    def get_float(self, key: str) -> float | None:
+        """Get numeric calibration value."""
+        value = self.__values.get(key)
+        return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+    def get_params(self, key: str) -> CalibrationParams | None:
+        """Get calibration parameter dictionary."""
+        value = self.__values.get(key)
+        return dict(value) if isinstance(value, dict) else None
+
+    def set_array(self, key: str, value: VecFloat) -> None:
+        """Set calibration array and schedule write."""
+        with self.__lock:
+            self.__arrays[key] = np.array(value, dtype=np.float32)
+            self.__version += 1
+        self.__changed.set()
+
+    def set_value(self, key: str, value: CalibrationValue | CalibrationParams) -> None:
+        """Set calibration value and schedule write."""
+        with self.__lock:
+            self.__values[key] = dict(value) if isinstance(value, dict) else value
+            self.__version += 1
+        self.__changed.set()
+
+    def flush(self) -> None:
+        """Write pending changes immediately."""
+        self.__write()
+
+    def __write_loop(self) -> None:
+        """Write changes in the background."""
+        while True:
+            self.__changed.wait()
+            # Coalesce changes in quick succession (e.g. slider movements) into a single write
+            self.__changed.clear()
+            time.sleep(self.coalesce_s)
+            self.__write()
+
+    def __write(self) -> None:
+        """Atomically replace the calibration store file."""
+        # Serialize writes from the writer thread and explicit flushes
+        with self.__write_lock:
+            # Snapshot the current state
+            with self.__lock:
+                version = self.__version
+                if version == self.__written_version:
+                    return
+                meta = json.dumps({'version': CALIBRATION_STORE_VERSION, 'values': self.__values})
+                arrays = dict(self.__arrays)
+            try:
+                create_dir_if_not_exists(os.path.dirname(self.path) or '.')
+                tmp_path = f'{self.path}.tmp'
+                with open(tmp_path, 'wb') as f:
+                    np.savez(f, __meta__=np.frombuffer(meta.encode(), dtype=np.uint8), **arrays)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                # Not marked as written: the next change or flush retries the write
+                logger.warn(f'Failed writing calibration store: {e}')
+                return
+            with self.__lock:
+                self.__written_version = version
+
+    def __load(self) -> None:
+        """Load calibration store file."""
+        try:
+            with np.load(self.path, allow_pickle=False) as data:
+                meta = json.loads(data['__meta__'].tobytes().decode())
+                if meta.get('version') != CALIBRATION_STORE_VERSION:
+                    logger.warn(f'Ignoring calibration store with unsupported version {meta.get("version")}')
+                    return
+                self.__values = meta['values']
+                self.__arrays = {
+                    key: np.array(data[key], dtype=np.float32)
+                    for key in data.files if key != '__meta__'
+                }
+            self.__written_version = self.__version
+            logger.info(f'Loaded calibration store {self.path}')
+        except Exception as e:
+            logger.warn(f'Failed reading calibration store: {e}')
+
+    def __import_legacy_caches(self) -> None:
+        """Import calibration state from the previous JSON caches."""
+        for key, path in LEGACY_CACHES.items():
+            try:
+                with open(path, 'r') as f:
+                    value = json.load(f)
+            except Exception:
+                continue
+            if key == 'perspective_transform_matrix':
+                self.set_array(key, np.array(value))
+            elif key == 'blob_detection_parameters':
+                self.set_value(key, value)
+            elif key == 'floating_garbage_blob_id':
+                self.set_value(key, int(value['blob_id']))
+            elif key == 'pool_corners':
+                self.set_array(key, np.array([
+                    value['top_left'], value['top_right'], value['bottom_left'], value['bottom_right']
+                ]))
+            logger.info(f'Imported {path} into calibration store')
+
+
+__store: CalibrationStore | None = None
+
+
+def get_calibration_store(path: str = 'app/cache/calibration.npz') -> CalibrationStore:
+    """Get the application's calibration store (loaded on first use)."""
+    global __store
+    if __store is None:
+        __store = CalibrationStore(path)
+    return __store
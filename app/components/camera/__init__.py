@@ -1,66 +1,375 @@
 """Load an image as a mock camera capture."""
 
-import json
+import time
 import cv2
 import numpy as np
+import numpy.typing as npt
+from app.components.calibration_store import get_calibration_store
+from app.components.camera.watchdog import CaptureWatchdog
 from app.logger import logger
 from app.util_types import VecFloat
 
+# Remap tables as (map1, map2) for `cv2.remap`
+RemapTables = tuple[cv2.Mat, cv2.Mat]
+
+# Capture backends by name
+CAPTURE_BACKENDS: dict[str, int] = {
+    'any': cv2.CAP_ANY,
+    'v4l2': cv2.CAP_V4L2,
+    'dshow': cv2.CAP_DSHOW,
+    'msmf': cv2.CAP_MSMF,
+    'avfoundation': cv2.CAP_AVFOUNDATION,
+    'gstreamer': cv2.CAP_GSTREAMER,
+    'ffmpeg': cv2.CAP_FFMPEG,
+}
+
+
+class CaptureSettings():
+    """Requested camera capture configuration (`0` or empty values keep the driver defaults)."""
+    width: int
+    height: int
+    fps: float
+    fourcc: str
+    buffer_size: int
+    backend: str
+    discard_stale_frames: bool
+    stall_timeout_s: float
+    reconnect_max_backoff_s: float
+
+    def __init__(self,
+                 width: int = 0,
+                 height: int = 0,
+                 fps: float = 0,
+                 fourcc: str = '',
+                 buffer_size: int = 0,
+                 backend: str = 'any',
+                 discard_stale_frames: bool = False,
+                 stall_timeout_s: float = 2,
+                 reconnect_max_backoff_s: float = 5) -> None:
+        """Create capture settings.
+
+        Compressed formats (e.g. `MJPG`) allow higher resolutions and frame rates over USB than raw `YUYV`.
+        A small `buffer_size` (e.g. `1`) and `discard_stale_frames` reduce the latency of each captured frame.
+        Captures without new frames for `stall_timeout_s` are reopened (retrying up to every `reconnect_max_backoff_s`).
+        """
+        if backend not in CAPTURE_BACKENDS:
+            raise ValueError(f'Unknown capture backend {backend} (available: {", ".join(CAPTURE_BACKENDS)})')
+        if fourcc and len(fourcc) != 4:
+            raise ValueError(f'Invalid FOURCC {fourcc}')
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.buffer_size = buffer_size
+        self.backend = backend
+        self.discard_stale_frames = discard_stale_frames
+        self.stall_timeout_s = stall_timeout_s
+        self.reconnect_max_backoff_s = reconnect_max_backoff_s
+
+    @staticmethod
+    def from_settings() -> 'CaptureSettings':
+        """Create capture settings from the application settings (`CAMERA_*`)."""
+        # Read on call, after command-line overrides were applied
+        from app import settings
+        return CaptureSettings(
+            width=settings.CAMERA_WIDTH,
+            height=settings.CAMERA_HEIGHT,
+            fps=settings.CAMERA_FPS,
+            fourcc=settings.CAMERA_FOURCC,
+            buffer_size=settings.CAMERA_BUFFER_SIZE,
+            backend=settings.CAMERA_BACKEND,
+            discard_stale_frames=settings.CAMERA_DISCARD_STALE_FRAMES,
+            stall_timeout_s=settings.CAMERA_STALL_TIMEOUT_S,
+            reconnect_max_backoff_s=settings.CAMERA_RECONNECT_MAX_BACKOFF_S
+        )
+
+
+def decode_fourcc(value: float) -> str:
+    """Decode FOURCC capture property."""
+    code = int(value)
+    return ''.join(chr((code >> 8 * i) & 0xFF) for i in range(4)).strip('\x00')
+
+
+def open_capture(camera: int, settings: CaptureSettings) -> cv2.VideoCapture:
+    """Open camera capture and request the configured format."""
+    capture = cv2.VideoCapture(camera, CAPTURE_BACKENDS[settings.backend])
+    # Set the pixel format first, the available resolutions and frame rates depend on it
+    if settings.fourcc:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*settings.fourcc))
+    if settings.width:
+        capture.set(cv2.CAP_PROP_FRAME_WIDTH, settings.width)
+    if settings.height:
+        capture.set(cv2.CAP_PROP_FRAME_HEIGHT, settings.height)
+    if settings.fps:
+        capture.set(cv2.CAP_PROP_FPS, settings.fps)
+    if settings.buffer_size:
+        capture.set(cv2.CAP_PROP_BUFFERSIZE, settings.buffer_size)
+    return capture
+
+
+def get_capture_properties(capture: cv2.VideoCapture) -> dict[str, str | float]:
+    """Get the capture properties negotiated with the driver."""
+    return {
+        'backend': capture.getBackendName(),
+        'width': capture.get(cv2.CAP_PROP_FRAME_WIDTH),
+        'height': capture.get(cv2.CAP_PROP_FRAME_HEIGHT),
+        'fps': capture.get(cv2.CAP_PROP_FPS),
+        'fourcc': decode_fourcc(capture.get(cv2.CAP_PROP_FOURCC)),
+        'buffer_size': capture.get(cv2.CAP_PROP_BUFFERSIZE),
+    }
+
 
 class Camera():
     """Handle (mock) OpenCV camera capture."""
     __mock_image_path: str
     __camera: int
     __capture: cv2.VideoCapture
-    __mock_capture: cv2.Mat
+    __mock_capture: cv2.Mat | None
+    __watchdog: CaptureWatchdog
     __mock: bool
-    perspective_transform_matrix: VecFloat | None = None
+    capture_settings: CaptureSettings
+    discarded_frames: int = 0
+    __stale_grab_s: float = 0.005
+    __max_stale_frames: int = 4
+    __perspective_transform_matrix: VecFloat | None = None
+    camera_matrix: VecFloat | None = None
+    distortion_coefficients: VecFloat | None = None
+    image_size: tuple[int, int] | None = None
+    frame_size: tuple[int, int] | None = None
+    __undistort_maps: RemapTables | None = None
+    __correction_maps: RemapTables | None = None
 
     def __init__(self,
                  mock_image_path: str,
                  camera: int,
                  mock: bool,
-                 perspective_correction_from_cache: bool = False) -> None:
+                 perspective_correction_from_cache: bool = False,
+                 intrinsics_from_cache: bool = False,
+                 capture_settings: CaptureSettings | None = None) -> None:
         """Set up (mock) camera instance."""
         self.__mock_image_path = mock_image_path
         self.__camera = camera
         self.__mock = mock
+        self.capture_settings = capture_settings or CaptureSettings()
+        self.__watchdog = CaptureWatchdog(
+            lambda: open_capture(self.__camera, self.capture_settings),
+            stall_timeout_s=self.capture_settings.stall_timeout_s,
+            max_backoff_s=self.capture_settings.reconnect_max_backoff_s
+        )
 
         # Create (mock) capture
         self.__create_capture()
 
         if perspective_correction_from_cache:
-            try:
-                with open('app/cache/perspective_correction.json', 'r') as f:
-                    self.perspective_transform_matrix = np.array(json.load(f))
-            except Exception:
+            self.perspective_transform_matrix = get_calibration_store().get_array('perspective_transform_matrix')
+            if self.perspective_transform_matrix is None:
                 logger.warn('Failed reading perspective correction matrix from cache')
 
+        if intrinsics_from_cache:
+            self.__load_intrinsics()
+
         logger.info(
             f'Created camera capture'
             f' {f"using mock image {self.__mock_image_path}" if self.__mock else f"using camera {self.__camera}"}'
         )
 
+    @property
+    def perspective_transform_matrix(self) -> VecFloat | None:
+        """Perspective transform matrix (in undistorted image coordinates if intrinsics are set)."""
+        return self.__perspective_transform_matrix
+
+    @perspective_transform_matrix.setter
+    def perspective_transform_matrix(self, matrix: VecFloat | None) -> None:
+        self.__perspective_transform_matrix = matrix
+        # Combined remap has to be rebuilt for the new matrix
+        self.__correction_maps = None
+
+    @property
+    def watchdog(self) -> CaptureWatchdog:
+        """Watchdog reopening failed or stalled camera captures."""
+        return self.__watchdog
+
+    @property
+    def has_intrinsics(self) -> bool:
+        """Camera intrinsics exist and lens distortion is corrected."""
+        return self.camera_matrix is not None and self.distortion_coefficients is not None
+
+    def set_intrinsics(self,
+                       camera_matrix: VecFloat,
+                       distortion_coefficients: VecFloat,
+                       image_size: tuple[int, int]) -> None:
+        """Set camera intrinsics estimated for captures of `image_size` (width, height)."""
+        self.camera_matrix = camera_matrix
+        self.distortion_coefficients = distortion_coefficients
+        self.image_size = image_size
+        # Remaps have to be rebuilt for the new intrinsics
+        self.__undistort_maps = None
+        self.__correction_maps = None
+
+    def __load_intrinsics(self) -> None:
+        """Load camera intrinsics from cache."""
+        store = get_calibration_store()
+        camera_matrix = store.get_array('camera_matrix')
+        distortion_coefficients = store.get_array('distortion_coefficients')
+        image_size = store.get_array('camera_image_size')
+        if camera_matrix is None or distortion_coefficients is None or image_size is None:
+            logger.info('No camera intrinsics cached: lens distortion is not corrected')
+            return
+        width, height = image_size.astype(int).tolist()
+        self.set_intrinsics(camera_matrix, distortion_coefficients, (width, height))
+
     def __create_capture(self) -> None:
         """Create (mock) OpenCV capture using camera Id."""
         if self.__mock:
             self.__mock_capture = cv2.imread(self.__mock_image_path)
+            if self.__mock_capture is None:
+                logger.warn(f'Failed reading mock image {self.__mock_image_path}')
         else:
-            self.__capture = cv2.VideoCapture(self.__camera)
+            self.__capture = open_capture(self.__camera, self.capture_settings)
+            if not self.__capture.isOpened():
+                # Reads fail until the watchdog reopens the capture
+                logger.warn(f'Failed opening camera {self.__camera}')
+                return
+            self.__log_negotiated_properties()
+
+    def __log_negotiated_properties(self) -> None:
+        """Log capture properties negotiated with the driver and warn about ignored settings."""
+        properties = get_capture_properties(self.__capture)
+        logger.info(
+            f'Negotiated camera capture: {properties["width"]:.0f}x{properties["height"]:.0f}'
+            f' @ {properties["fps"]:.1f}fps, FOURCC {properties["fourcc"] or "-"},'
+            f' buffer size {properties["buffer_size"]:.0f} ({properties["backend"]})'
+        )
+        settings = self.capture_settings
+        requested: dict[str, str | float] = {
+            'width': settings.width,
+            'height': settings.height,
+            'fps': settings.fps,
+            'fourcc': settings.fourcc,
+            'buffer_size': settings.buffer_size,
+        }
+        for key, value in requested.items():
+            if value and properties[key] != value:
+                logger.warn(f'Camera ignored requested {key} {value} (using {properties[key]})')
+        # Grabs faster than a quarter frame are served from the driver's buffer
+        fps = float(properties['fps'])
+        if fps > 0:
+            self.__stale_grab_s = 0.25 / fps
+        if float(properties['buffer_size']) > 0:
+            self.__max_stale_frames = int(properties['buffer_size']) + 1
+
+    def __grab_latest(self) -> bool:
+        """Grab the newest frame, discarding stale frames buffered by the driver."""
+        for _ in range(self.__max_stale_frames):
+            start = time.perf_counter()
+            if not self.__capture.grab():
+                return False
+            # Grab had to wait for the camera: the frame is fresh
+            if time.perf_counter() - start > self.__stale_grab_s:
+                return True
+            self.discarded_frames += 1
+        # Keep the last grabbed frame if the buffer never ran empty
+        self.discarded_frames -= 1
+        return True
 
-    def read_capture(self) -> cv2.Mat:
-        """Read (mock) OpenCV capture."""
+    def __read_camera(self) -> cv2.Mat | None:
+        """Read camera capture (None if the read failed, stalled or the capture is being reopened)."""
+        if self.__watchdog.is_reconnecting:
+            capture = self.__watchdog.take_capture()
+            if capture is None:
+                return None
+            self.__capture = capture
+            self.__log_negotiated_properties()
+        if self.capture_settings.discard_stale_frames:
+            success = self.__grab_latest()
+            if success:
+                success, image = self.__capture.retrieve()
+        else:
+            success, image = self.__capture.read()
+        if not self.__watchdog.check(self.__capture, success):
+            return None
+        return image
+
+    def read_capture(self) -> cv2.Mat | None:
+        """Read (mock) OpenCV capture (None if no new frame is available)."""
         if self.__mock:
-            return self.__mock_capture.copy()
+            if self.__mock_capture is None:
+                return None
+            image = self.__mock_capture.copy()
         else:
-            _, image = self.__capture.read()
-            return image.copy()
+            image = self.__read_camera()
+            if image is None:
+                return None
+        # Size (width, height) of the last capture
+        self.frame_size = (image.shape[1], image.shape[0])
+        return image
 
-    def read_corrected_capture(self) -> cv2.Mat:
-        """Read capture and correct perspective."""
-        image = self.read_capture()
+    def wait_for_capture(self, timeout_s: float = 10) -> cv2.Mat:
+        """Read the next available corrected capture, waiting for the camera to (re)connect."""
+        deadline = time.perf_counter() + timeout_s
+        while True:
+            image = self.read_corrected_capture()
+            if image is not None:
+                return image
+            if time.perf_counter() > deadline:
+                raise RuntimeError(f'No camera capture within {timeout_s:g}s')
+            time.sleep(0.01)
+
+    def get_camera_matrix(self, width: int, height: int) -> npt.NDArray[np.float64]:
+        """Get camera matrix scaled to the capture size (if the capture size changed since the calibration)."""
+        assert self.camera_matrix is not None
+        camera_matrix = np.array(self.camera_matrix, dtype=np.float64)
+        if self.image_size is not None and self.image_size != (width, height):
+            calibrated_width, calibrated_height = self.image_size
+            camera_matrix[0] *= width / calibrated_width
+            camera_matrix[1] *= height / calibrated_height
+        return camera_matrix
+
+    def __create_maps(self, width: int, height: int, new_camera_matrix: npt.NDArray[np.float64]) -> RemapTables:
+        """Create remap tables from the distorted capture to the image of `new_camera_matrix`."""
+        map1, map2 = cv2.initUndistortRectifyMap(
+            self.get_camera_matrix(width, height),
+            self.distortion_coefficients,
+            None,
+            new_camera_matrix,
+            (width, height),
+            cv2.CV_16SC2
+        )
+        return map1, map2
+
+    def __get_undistort_maps(self, width: int, height: int) -> RemapTables:
+        """Get (cached) remap tables for undistorting captures."""
+        if self.__undistort_maps is None or self.__undistort_maps[0].shape[:2] != (height, width):
+            self.__undistort_maps = self.__create_maps(width, height, self.get_camera_matrix(width, height))
+        return self.__undistort_maps
+
+    def __get_correction_maps(self, width: int, height: int) -> RemapTables:
+        """Get (cached) remap tables for undistorting and correcting the perspective of captures in one pass."""
+        if self.__correction_maps is None or self.__correction_maps[0].shape[:2] != (height, width):
+            camera_matrix = self.get_camera_matrix(width, height)
+            # The homography maps undistorted to corrected pixels,
+            # so `H @ K` projects undistorted normalized coordinates to the corrected image
+            new_camera_matrix = camera_matrix if self.perspective_transform_matrix is None \
+                else np.array(self.perspective_transform_matrix, dtype=np.float64) @ camera_matrix
+            self.__correction_maps = self.__create_maps(width, height, new_camera_matrix)
+        return self.__correction_maps
+
+    def undistort(self, image: cv2.Mat) -> cv2.Mat:
+        """Correct lens distortion of capture (if intrinsics are set)."""
+        if not self.has_intrinsics:
+            return image
+        height, width = image.shape[:2]
+        map1, map2 = self.__get_undistort_maps(width, height)
+        return cv2.remap(image, map1, map2, interpolation=cv2.INTER_LINEAR)
+
+    def correct(self, image: cv2.Mat) -> cv2.Mat:
+        """Correct lens distortion and perspective of capture."""
         height, width = image.shape[:2]
-        if self.perspective_transform_matrix is not None:
+        if self.has_intrinsics:
+            # Single remap for undistortion and perspective correction
+            map1, map2 = self.__get_correction_maps(width, height)
+            return cv2.remap(image, map1, map2, interpolation=cv2.INTER_LINEAR)
+        elif self.perspective_transform_matrix is not None:
             # Transform current capture
             return cv2.warpPerspective(
                 image,
@@ -70,3 +379,13 @@ class Camera():
             )
         else:
             return image
+
+    def read_undistorted_capture(self) -> cv2.Mat | None:
+        """Read capture and correct lens distortion."""
+        image = self.read_capture()
+        return self.undistort(image) if image is not None else None
+
+    def read_corrected_capture(self) -> cv2.Mat | None:
+        """Read capture and correct lens distortion and perspective."""
+        image = self.read_capture()
+        return self.correct(image) if image is not None else None
@@ -0,0 +1,104 @@
+"""Probe the capture modes supported by a camera."""
+
+import time
+from app.components.camera import CaptureSettings, get_capture_properties, open_capture
+from app.logger import logger
+
+# Common camera resolutions (width, height)
+DEFAULT_RESOLUTIONS: list[tuple[int, int]] = [
+    (640, 480),
+    (800, 600),
+    (1280, 720),
+    (1920, 1080),
+    (2560, 1440),
+    (3840, 2160),
+]
+DEFAULT_FOURCCS = ['MJPG', 'YUYV']
+
+
+class CaptureMode():
+    """Capture mode negotiated with the camera and its measured frame rate."""
+    requested: CaptureSettings
+    width: int
+    height: int
+    fps: float
+    fourcc: str
+    backend: str
+    measured_fps: float
+
+    def __init__(self,
+                 requested: CaptureSettings,
+                 width: int,
+                 height: int,
+                 fps: float,
+                 fourcc: str,
+                 backend: str,
+                 measured_fps: float) -> None:
+        """Create capture mode."""
+        self.requested = requested
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.backend = backend
+        self.measured_fps = measured_fps
+
+    def __str__(self) -> str:
+        """Describe capture mode."""
+        return (
+            f'{self.width}x{self.height} {self.fourcc or "-":4} {self.fps:5.1f}fps negotiated,'
+            f' {self.measured_fps:5.1f}fps measured ({self.backend})'
+        )
+
+
+def probe_capture_mode(camera: int,
+                       settings: CaptureSettings,
+                       frames: int = 30,
+                       warmup_frames: int = 5) -> CaptureMode | None:
+    """Open camera in the requested mode and measure its frame rate."""
+    capture = open_capture(camera, settings)
+    try:
+        if not capture.isOpened():
+            return None
+        properties = get_capture_properties(capture)
+        # Skip the first frames (exposure settling, buffered frames)
+        for _ in range(warmup_frames):
+            capture.grab()
+        start = time.perf_counter()
+        grabbed = 0
+        for _ in range(frames):
+            if capture.grab():
+                grabbed += 1
+        duration_s = time.perf_counter() - start
+        return CaptureMode(
+            requested=settings,
+            width=int(properties['width']),
+            height=int(properties['height']),
+            fps=float(properties['fps']),
+            fourcc=str(properties['fourcc']),
+            backend=str(properties['backend']),
+            measured_fps=grabbed / duration_s if duration_s > 0 else 0
+        )
+    finally:
+        capture.release()
+
+
+def probe_capture_modes(camera: int,
+                        backend: str = 'any',
+                        resolutions: list[tuple[int, int]] = DEFAULT_RESOLUTIONS,
+                        fourccs: list[str] = DEFAULT_FOURCCS,
+                        frames: int = 30) -> list[CaptureMode]:
+    """Probe all combinations of resolutions and pixel formats, return the distinct negotiated modes."""
+    modes: dict[tuple[int, int, str], CaptureMode] = {}
+    for fourcc in fourccs:
+        for width, height in resolutions:
+            settings = CaptureSettings(width=width, height=height, fourcc=fourcc, backend=backend)
+            mode = probe_capture_mode(camera, settings, frames)
+            if mode is None:
+                logger.warn(f'Failed opening camera {camera} using backend {backend}')
+                return []
+            # Drivers fall back to the closest supported mode
+            key = (mode.width, mode.height, mode.fourcc)
+            if key not in modes or mode.measured_fps > modes[key].measured_fps:
+                modes[key] = mode
+    return sorted(modes.values(), key=lambda mode: (mode.width * mode.height, mode.measured_fps))
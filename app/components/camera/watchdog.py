@@ -0,0 +1,120 @@
+"""Detect failed or stalled camera reads and reopen the capture in the background."""
+
+import math
+import threading
+import time
+from typing import Callable
+import cv2
+from app.logger import logger
+
+
+class CaptureWatchdog():
+    """Detect failed or stalled captures and reopen them on a background thread.
+
+    A capture failed after `max_failed_reads` consecutive failed reads
+    and stalled if its frame timestamp did not advance for `stall_timeout_s` seconds.
+    The broken capture is released and reopened with exponential backoff (up to `max_backoff_s`),
+    meanwhile reads report no frame instead of blocking the frame loop.
+    """
+    stall_timeout_s: float
+    max_failed_reads: int
+    initial_backoff_s: float
+    max_backoff_s: float
+    failed_reads: int = 0
+    stalled_reads: int = 0
+    reconnects: int = 0
+    __open_capture: Callable[[], cv2.VideoCapture]
+    __consecutive_failures: int = 0
+    __last_timestamp_ms: float = math.nan
+    __last_advance_s: float
+    __reopened_capture: cv2.VideoCapture | None = None
+    __thread: threading.Thread | None = None
+
+    def __init__(self,
+                 open_capture: Callable[[], cv2.VideoCapture],
+                 stall_timeout_s: float = 2,
+                 max_failed_reads: int = 3,
+                 initial_backoff_s: float = 0.1,
+                 max_backoff_s: float = 5) -> None:
+        """Create capture watchdog reopening captures with `open_capture`."""
+        self.__open_capture = open_capture
+        self.stall_timeout_s = stall_timeout_s
+        self.max_failed_reads = max_failed_reads
+        self.initial_backoff_s = initial_backoff_s
+        self.max_backoff_s = max_backoff_s
+        self.__last_advance_s = time.perf_counter()
+
+    @property
+    def is_reconnecting(self) -> bool:
+        """The capture is being reopened in the background."""
+        return self.__thread is not None
+
+    def check(self, capture: cv2.VideoCapture, success: bool) -> bool:
+        """Check the result of a read, start reopening the capture if it failed or stalled.
+
+        Returns whether the read produced a new frame.
+        """
+        now = time.perf_counter()
+        if success:
+            self.__consecutive_failures = 0
+            # Backends without frame timestamps report 0: every successful read counts as new frame
+            timestamp_ms = capture.get(cv2.CAP_PROP_POS_MSEC)
+            if timestamp_ms <= 0 or timestamp_ms != self.__last_timestamp_ms:
+                self.__last_timestamp_ms = timestamp_ms
+                self.__last_advance_s = now
+                return True
+            self.stalled_reads += 1
+        else:
+            self.failed_reads += 1
+            self.__consecutive_failures += 1
+
+        failed = self.__consecutive_failures >= self.max_failed_reads
+        stalled = now - self.__last_advance_s > self.stall_timeout_s
+        if failed or stalled:
+            logger.warn(
+                f'Camera capture {"failed" if failed else f"stalled for {now - self.__last_advance_s:.1f}s"}:'
+                ' reconnecting'
+            )
+            self.__start_reconnect(capture)
+        return False
+
+    def take_capture(self) -> cv2.VideoCapture | None:
+        """Take the reopened capture once the background reconnect succeeded."""
+        capture = self.__reopened_capture
+        if capture is None:
+            return None
+        self.__reopened_capture = None
+        self.__thread = None
+        self.__consecutive_failures = 0
+        self.__last_timestamp_ms = math.nan
+        self.__last_advance_s = time.perf_counter()
+        self.reconnects += 1
+        return capture
+
+    def __start_reconnect(self, capture: cv2.VideoCapture) -> None:
+        """Release the broken capture and reopen it on a background thread."""
+        self.__thread = threading.Thread(
+            target=self.__reconnect,
+            args=(capture,),
+            name='camera-reconnect',
+            daemon=True
+        )
+        self.__thread.start()
+
+    def __reconnect(self, capture: cv2.VideoCapture) -> None:
+        """Reopen capture with exponential backoff until a frame can be read."""
+        start = time.perf_counter()
+        capture.release()
+        backoff_s = self.initial_backoff_s
+        attempts = 1
+        while True:
+            reopened = self.__open_capture()
+            if reopened.isOpened() and reopened.grab():
+                break
+            reopened.release()
+            time.sleep(backoff_s)
+            backoff_s = min(2 * backoff_s, self.max_backoff_s)
+            attempts += 1
+        logger.info(f'Reconnected camera capture after {time.perf_counter() - start:.2f}s ({attempts} attempts)')
+        # Hand over the capture to the frame loop (single reference assignment)
+        self.__reopened_capture = reopened
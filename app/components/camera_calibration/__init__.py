@@ -0,0 +1,130 @@
+"""Estimate camera intrinsics using ChArUco boards."""
+
+import cv2
+import numpy as np
+from cv2 import aruco
+from app.components.calibration_store import get_calibration_store
+from app.components.helpers import create_dir_if_not_exists
+from app.util_types import VecFloat
+from app.logger import logger
+
+
+class CharucoCalibration():
+    """Collect ChArUco board views and estimate camera intrinsics and lens distortion."""
+    board: aruco.CharucoBoard
+    detector: aruco.CharucoDetector
+    min_corners: int
+    camera_matrix: VecFloat | None = None
+    distortion_coefficients: VecFloat | None = None
+    image_size: tuple[int, int] | None = None
+    reprojection_error: float | None = None
+    __object_points: list[VecFloat]
+    __image_points: list[VecFloat]
+    __corners: VecFloat | None = None
+    __ids: VecFloat | None = None
+
+    def __init__(self,
+                 aruco_dict: int,
+                 squares_x: int,
+                 squares_y: int,
+                 square_length_mm: float,
+                 marker_length_mm: float,
+                 min_corners: int = 8) -> None:
+        """Create ChArUco calibration using the board's layout and the ArUco dictionary.
+
+        Views are only collected if at least `min_corners` chessboard corners are detected.
+        """
+        self.board = aruco.CharucoBoard(
+            (squares_x, squares_y),
+            square_length_mm,
+            marker_length_mm,
+            aruco.getPredefinedDictionary(aruco_dict)
+        )
+        self.detector = aruco.CharucoDetector(self.board)
+        self.min_corners = min_corners
+        self.__object_points = []
+        self.__image_points = []
+
+    @property
+    def view_count(self) -> int:
+        """Number of collected board views."""
+        return len(self.__object_points)
+
+    def generate_board_image(self, path: str = 'app/out/charuco_board.png', dpi: int = 300) -> None:
+        """Write printable board image (printed at `dpi`, squares have their actual size)."""
+        # Pillow is only needed for writing the image with its print resolution
+        from PIL import Image
+
+        squares_x, squares_y = self.board.getChessboardSize()
+        square_length_px = round(self.board.getSquareLength() / 25.4 * dpi)
+        # Keep a one square quiet zone around the board
+        board_size = ((squares_x + 2) * square_length_px, (squares_y + 2) * square_length_px)
+        board_image = self.board.generateImage(board_size, marginSize=square_length_px)
+        create_dir_if_not_exists('app/out')
+        Image.fromarray(board_image).save(path, dpi=(dpi, dpi))
+        logger.info(f'Generated ChArUco board: {path}')
+
+    def detect(self, image: cv2.Mat) -> bool:
+        """Detect board corners in capture, return True if the view can be collected."""
+        corners, ids, _, _ = self.detector.detectBoard(image)
+        self.image_size = (image.shape[1], image.shape[0])
+        if ids is None or len(ids) < self.min_corners:
+            self.__corners = None
+            self.__ids = None
+            return False
+        self.__corners = corners
+        self.__ids = ids
+        return True
+
+    def visualize(self, image: cv2.Mat) -> None:
+        """Render detected board corners to OpenCV image."""
+        if self.__corners is not None:
+            aruco.drawDetectedCornersCharuco(image, self.__corners, self.__ids, cornerColor=(0, 255, 0))
+
+    def add_view(self) -> bool:
+        """Collect the last detected board view."""
+        if self.__corners is None or self.__ids is None:
+            logger.warn('Cannot add calibration view: not enough board corners detected')
+            return False
+        # Collinear corners (e.g. a single row) do not constrain the intrinsics
+        if self.board.checkCharucoCornersCollinear(self.__ids):
+            logger.warn('Cannot add calibration view: detected board corners are collinear')
+            return False
+        # Board coordinates of the detected chessboard corners
+        # (`CharucoBoard.matchImagePoints` treats ChArUco corners as marker corners in OpenCV 4.7)
+        chessboard_corners = np.array(self.board.getChessboardCorners(), dtype=np.float32)
+        self.__object_points.append(chessboard_corners[self.__ids.ravel()].reshape(-1, 1, 3))
+        self.__image_points.append(np.array(self.__corners, dtype=np.float32).reshape(-1, 1, 2))
+        logger.info(f'Added calibration view {self.view_count} ({len(self.__ids)} corners)')
+        return True
+
+    def calibrate(self, min_views: int = 5) -> bool:
+        """Estimate camera intrinsics and lens distortion from all collected views."""
+        if self.view_count < min_views or self.image_size is None:
+            logger.warn(f'Cannot calibrate camera: {self.view_count} of {min_views} required views collected')
+            return False
+        reprojection_error, camera_matrix, distortion_coefficients, _, _ = cv2.calibrateCamera(
+            self.__object_points,
+            self.__image_points,
+            self.image_size,
+            None,
+            None
+        )
+        self.camera_matrix = np.array(camera_matrix, dtype=np.float32)
+        self.distortion_coefficients = np.array(distortion_coefficients, dtype=np.float32)
+        self.reprojection_error = float(reprojection_error)
+        logger.info(
+            f'Calibrated camera from {self.view_count} views: RMS reprojection error {reprojection_error:.3f}px'
+        )
+        return True
+
+    def write_to_cache(self) -> None:
+        """Write camera intrinsics to cache."""
+        if self.camera_matrix is None or self.distortion_coefficients is None or self.image_size is None:
+            logger.warn('Failed writing camera intrinsics to cache: camera is not calibrated')
+            return
+        store = get_calibration_store()
+        store.set_array('camera_matrix', self.camera_matrix)
+        store.set_array('distortion_coefficients', self.distortion_coefficients)
+        store.set_array('camera_image_size', np.array(self.image_size, dtype=np.float32))
+        logger.info('Wrote camera intrinsics to cache')
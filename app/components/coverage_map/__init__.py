@@ -0,0 +1,251 @@
+"""Accumulate boat coverage and garbage sightings as heatmaps of the pool."""
+
+import math
+import os
+import time
+import cv2
+import numpy as np
+import numpy.typing as npt
+from datetime import datetime
+from app.components.helpers import create_dir_if_not_exists
+from app.components.opencv_ui import UIState
+from app.components.pool import Pool
+from app.util_types import VecFloat
+from app.logger import logger
+
+# Kernel as (cell offsets (k x 2) as (y, x), weights (k))
+Kernel = tuple[npt.NDArray[np.int32], VecFloat]
+
+
+def create_disc_kernel(radius_cells: float) -> Kernel:
+    """Create kernel of uniform weight 1 covering a disc."""
+    r = max(0, math.ceil(radius_cells))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    inside = dx ** 2 + dy ** 2 <= max(radius_cells, 0.5) ** 2
+    offsets = np.stack([dy[inside], dx[inside]], axis=1).astype(np.int32)
+    return offsets, np.ones(len(offsets), dtype=np.float32)
+
+
+def create_gaussian_kernel(sigma_cells: float) -> Kernel:
+    """Create Gaussian kernel (truncated at 3 sigma) with weights summing to 1."""
+    r = max(1, math.ceil(3 * sigma_cells))
+    dy, dx = np.mgrid[-r:r + 1, -r:r + 1]
+    weights = np.exp(-(dx ** 2 + dy ** 2) / (2 * sigma_cells ** 2)).ravel()
+    offsets = np.stack([dy.ravel(), dx.ravel()], axis=1).astype(np.int32)
+    return offsets, (weights / weights.sum()).astype(np.float32)
+
+
+class CoverageMap():
+    """Accumulate boat coverage and garbage sightings in fixed-resolution grids in pool coordinates.
+
+    The pool is mapped onto a grid of `grid_width` cells (height following the pool's aspect ratio).
+    Boats are splatted along their path since the previous frame, weighted by time (one unit per frame).
+    Both grids decay exponentially with `half_life_s` (0: never).
+    """
+    pool: Pool
+    boat_coverage: VecFloat
+    garbage_sightings: VecFloat
+    half_life_s: float
+    __boat_kernel: Kernel
+    __garbage_kernel: Kernel
+    __previous_boat_positions: VecFloat | None = None
+    __previous_update_s: float | None = None
+    __polygon: npt.NDArray[np.int32] | None = None
+    # Homography from image pixels to grid cells
+    __image_to_grid: npt.NDArray[np.float64]
+
+    def __init__(self,
+                 pool: Pool,
+                 grid_width: int = 200,
+                 boat_radius_cm: float = 15,
+                 garbage_sigma_cm: float = 5,
+                 half_life_s: float = 0) -> None:
+        """Create empty coverage map of the pool."""
+        self.pool = pool
+        self.half_life_s = half_life_s
+        # Grid aspect ratio from the mean pool edge lengths
+        width_px = float(
+            np.linalg.norm(pool.top_right - pool.top_left) + np.linalg.norm(pool.bottom_right - pool.bottom_left)
+        )
+        height_px = float(
+            np.linalg.norm(pool.bottom_left - pool.top_left) + np.linalg.norm(pool.bottom_right - pool.top_right)
+        )
+        grid_height = max(1, round(grid_width * height_px / width_px)) if width_px > 0 else grid_width
+        self.boat_coverage = np.zeros((grid_height, grid_width), dtype=np.float32)
+        self.garbage_sightings = np.zeros((grid_height, grid_width), dtype=np.float32)
+        # Metric kernel sizes from the pool's diagonal
+        cells_per_cm = math.hypot(grid_width, grid_height) / pool.top_left_bottom_right_distance_cm
+        self.__boat_kernel = create_disc_kernel(boat_radius_cm * cells_per_cm)
+        self.__garbage_kernel = create_gaussian_kernel(max(garbage_sigma_cm * cells_per_cm, 0.5))
+
+    @property
+    def grid_size(self) -> tuple[int, int]:
+        """Grid size as (width, height)."""
+        height, width = self.boat_coverage.shape
+        return width, height
+
+    def get_image_to_grid(self) -> npt.NDArray[np.float64]:
+        """Get homography from image pixels to grid cells (updated if the pool corners moved)."""
+        polygon = self.pool.get_polygon()
+        if self.__polygon is None or not np.array_equal(polygon, self.__polygon):
+            self.__polygon = polygon
+            width, height = self.grid_size
+            # Polygon is clockwise from top-left
+            grid_corners = np.array([[0, 0], [width, 0], [width, height], [0, height]], dtype=np.float32)
+            self.__image_to_grid = np.array(
+                cv2.getPerspectiveTransform(polygon.astype(np.float32), grid_corners),
+                dtype=np.float64
+            )
+        return self.__image_to_grid
+
+    def to_grid(self, points_px: VecFloat) -> VecFloat:
+        """Map image points (n x 2) to grid coordinates (n x 2) as (x, y)."""
+        H = self.get_image_to_grid()
+        points = np.concatenate([points_px, np.ones((len(points_px), 1))], axis=1) @ H.T
+        grid_points: VecFloat = (points[:, :2] / points[:, 2:]).astype(np.float32)
+        return grid_points
+
+    def update(self, boat_positions_px: VecFloat, garbage_positions_px: VecFloat) -> None:
+        """Decay both grids and add the frame's boats (n x 2) and garbage candidates (m x 2) positions.
+
+        Pass the boats in the same order every frame, with NaN rows for boats that are not detected,
+        and all detected garbage candidates (not only the selected blob) to show where garbage tends to collect.
+        """
+        now = time.perf_counter()
+        # Exponential decay since the previous update
+        if self.half_life_s > 0 and self.__previous_update_s is not None:
+            decay = 0.5 ** ((now - self.__previous_update_s) / self.half_life_s)
+            self.boat_coverage *= decay
+            self.garbage_sightings *= decay
+        self.__previous_update_s = now
+
+        boat_positions = self.to_grid(np.array(boat_positions_px, dtype=np.float32).reshape(-1, 2))
+        previous = self.__previous_boat_positions
+        self.__previous_boat_positions = boat_positions
+        if previous is None or previous.shape != boat_positions.shape:
+            previous = boat_positions
+        # Boats without a previous position are splatted at their current position only
+        previous = np.where(np.isnan(previous), boat_positions, previous)
+        self.__splat_segments(self.boat_coverage, previous, boat_positions, self.__boat_kernel)
+
+        garbage_positions = self.to_grid(np.array(garbage_positions_px, dtype=np.float32).reshape(-1, 2))
+        self.__splat(self.garbage_sightings, garbage_positions, np.ones(len(garbage_positions)), self.__garbage_kernel)
+
+    def reset(self) -> None:
+        """Clear both grids."""
+        self.boat_coverage[:] = 0
+        self.garbage_sightings[:] = 0
+        self.__previous_boat_positions = None
+
+    def export(self, directory: str) -> str:
+        """Write both grids as `.npy` files and color-mapped PNG images, return the snapshot's path prefix."""
+        create_dir_if_not_exists(directory)
+        prefix = os.path.join(directory, datetime.now().strftime('coverage_%Y%m%d_%H%M%S'))
+        for name, grid in (('boats', self.boat_coverage), ('garbage', self.garbage_sightings)):
+            np.save(f'{prefix}_{name}.npy', grid)
+            cv2.imwrite(f'{prefix}_{name}.png', colorize(grid))
+        logger.info(f'Exported coverage map {prefix}_*')
+        return prefix
+
+    def __splat_segments(self, grid: VecFloat, starts: VecFloat, ends: VecFloat, kernel: Kernel) -> None:
+        """Splat kernel along segments (sampled at least once per cell), one unit of weight per segment."""
+        valid = ~np.isnan(ends).any(axis=1)
+        starts, ends = starts[valid], ends[valid]
+        if not len(ends):
+            return
+        samples = np.maximum(1, np.ceil(np.linalg.norm(ends - starts, axis=1)).astype(np.int32))
+        # Sample positions of all segments at once
+        segment_indices = np.repeat(np.arange(len(ends)), samples)
+        offsets = np.arange(len(segment_indices)) - np.repeat(np.cumsum(samples) - samples, samples)
+        t = ((offsets + 1) / samples[segment_indices])[:, None]
+        points = starts[segment_indices] + (ends - starts)[segment_indices] * t
+        self.__splat(grid, points, 1 / samples[segment_indices], kernel)
+
+    def __splat(self, grid: VecFloat, points: VecFloat, point_weights: npt.ArrayLike, kernel: Kernel) -> None:
+        """Add weighted kernels centered at the grid points (n x 2) in a single scattered add."""
+        weights = np.broadcast_to(np.asarray(point_weights, dtype=np.float32), len(points))
+        valid = ~np.isnan(points).any(axis=1)
+        points, weights = points[valid], weights[valid]
+        if not len(points):
+            return
+        kernel_offsets, kernel_weights = kernel
+        centers = np.floor(points[:, ::-1]).astype(np.int32)
+        cells = (centers[:, None, :] + kernel_offsets[None, :, :]).reshape(-1, 2)
+        cell_weights = (weights[:, None] * kernel_weights[None, :]).ravel()
+        height, width = grid.shape
+        inside = (cells[:, 0] >= 0) & (cells[:, 0] < height) & (cells[:, 1] >= 0) & (cells[:, 1] < width)
+        np.add.at(grid, (cells[inside, 0], cells[inside, 1]), cell_weights[inside])
+
+
+def colorize(grid: VecFloat, colormap: int = cv2.COLORMAP_INFERNO) -> cv2.Mat:
+    """Color-map grid normalized to its maximum."""
+    maximum = float(grid.max())
+    normalized = (grid * (255 / maximum) if maximum > 0 else grid).astype(np.uint8)
+    return cv2.applyColorMap(normalized, colormap)
+
+
+class CoverageUI(UIState):
+    """UI for overlaying the coverage heatmaps on the pool."""
+    coverage_map: CoverageMap
+    export_directory: str
+    refresh_interval_s: float
+    show_garbage: bool = False
+    # Overlay and mask cropped to the visited cells' bounding box (x, y, width, height)
+    __overlay: cv2.Mat | None = None
+    __overlay_mask: npt.NDArray[np.bool_] | None = None
+    __overlay_roi: tuple[int, int, int, int] = (0, 0, 0, 0)
+    __overlay_key: tuple[tuple[int, int], bool] | None = None
+    __overlay_time_s: float = 0
+
+    def __init__(self, coverage_map: CoverageMap, export_directory: str, refresh_interval_s: float = 1) -> None:
+        """Create new coverage UI (the color-mapped overlay is refreshed every `refresh_interval_s`)."""
+        super().__init__(
+            keycode=104,
+            keyname='H',
+            name='Coverage heatmap',
+            instructions='Press "T" to toggle boat coverage / garbage sightings and "S" to export a snapshot.'
+        )
+        self.coverage_map = coverage_map
+        self.export_directory = export_directory
+        self.refresh_interval_s = refresh_interval_s
+
+    def on_key(self, keypress: int) -> None:
+        """Toggle the shown heatmap or export a snapshot."""
+        if keypress == 116:  # t
+            self.show_garbage = not self.show_garbage
+        elif keypress == 115:  # s
+            self.coverage_map.export(self.export_directory)
+
+    def render(self, image: cv2.Mat) -> None:
+        """Blend the cached heatmap overlay into the pool."""
+        height, width = image.shape[:2]
+        key = ((width, height), self.show_garbage)
+        now = time.perf_counter()
+        if key != self.__overlay_key or now - self.__overlay_time_s >= self.refresh_interval_s:
+            self.__refresh_overlay(width, height)
+            self.__overlay_key = key
+            self.__overlay_time_s = now
+        if self.__overlay is None or self.__overlay_mask is None:
+            return
+        # Only blend the visited region
+        x, y, roi_width, roi_height = self.__overlay_roi
+        roi = image[y:y + roi_height, x:x + roi_width]
+        blended = cv2.addWeighted(roi, 0.4, self.__overlay, 0.6, 0)
+        np.copyto(roi, blended, where=self.__overlay_mask[..., None])
+
+    def __refresh_overlay(self, width: int, height: int) -> None:
+        """Color-map the heatmap and warp it onto the pool in the frame."""
+        grid = self.coverage_map.garbage_sightings if self.show_garbage else self.coverage_map.boat_coverage
+        grid_to_image = np.linalg.inv(self.coverage_map.get_image_to_grid())
+        # Only overlay visited cells
+        visited = (grid > 0).astype(np.uint8)
+        mask = cv2.warpPerspective(visited, grid_to_image, (width, height), flags=cv2.INTER_NEAREST)
+        x, y, roi_width, roi_height = cv2.boundingRect(mask)
+        if not roi_width or not roi_height:
+            self.__overlay = None
+            self.__overlay_mask = None
+            return
+        overlay = cv2.warpPerspective(colorize(grid), grid_to_image, (width, height), flags=cv2.INTER_NEAREST)
+        self.__overlay_roi = (x, y, roi_width, roi_height)
+        self.__overlay = overlay[y:y + roi_height, x:x + roi_width].copy()
+        self.__overlay_mask = mask[y:y + roi_height, x:x + roi_width] > 0
@@ -0,0 +1,200 @@
+"""Track a fleet of autonomous boats."""
+
+import math
+import time
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.aruco import MarkerDetections
+from app.components.opencv_ui import UIState
+from app.components.opencv_ui.text import TextBox
+from app.components.pose_estimation import MarkerPose
+from app.util_types import VecFloat
+
+
+class Fleet():
+    """Track many boats from a single marker detection pass.
+
+    The state of all boats is stored in arrays indexed like `marker_ids`,
+    so updates cost a few array operations regardless of the fleet size.
+    Boats that were never detected have NaN positions.
+    """
+    marker_ids: npt.NDArray[np.int32]
+    marker_size_mm: float
+    # Pixel positions (n x 2) and unit direction vectors (n x 2)
+    centers: VecFloat
+    directions: VecFloat
+    # Heading of the direction vectors (image coordinates, y-axis down)
+    headings_rad: VecFloat
+    velocities_m_per_s: VecFloat
+    # Metric positions (n x 3) and yaw in the pool frame (requires pose estimation)
+    positions_mm: VecFloat
+    yaws_rad: VecFloat
+    # `time.time()` of the last detection (NaN: never detected)
+    last_seen_s: npt.NDArray[np.float64]
+    detected: npt.NDArray[np.bool_]
+    # Fleet index by marker Id (-1: not part of the fleet)
+    __index_by_id: npt.NDArray[np.int32]
+
+    def __init__(self, marker_ids: list[int], marker_size_mm: float) -> None:
+        """Create fleet of boats with the given marker Ids."""
+        if len(set(marker_ids)) != len(marker_ids):
+            raise ValueError(f'Duplicate fleet marker Ids: {marker_ids}')
+        if any(marker_id < 0 for marker_id in marker_ids):
+            raise ValueError(f'Invalid fleet marker Ids: {marker_ids}')
+        n = len(marker_ids)
+        self.marker_ids = np.array(marker_ids, dtype=np.int32)
+        self.marker_size_mm = marker_size_mm
+        self.centers = np.full((n, 2), np.nan, dtype=np.float32)
+        self.directions = np.full((n, 2), np.nan, dtype=np.float32)
+        self.headings_rad = np.full(n, np.nan, dtype=np.float32)
+        self.velocities_m_per_s = np.zeros(n, dtype=np.float32)
+        self.positions_mm = np.full((n, 3), np.nan, dtype=np.float32)
+        self.yaws_rad = np.full(n, np.nan, dtype=np.float32)
+        self.last_seen_s = np.full(n, np.nan, dtype=np.float64)
+        self.detected = np.zeros(n, dtype=np.bool_)
+        self.__index_by_id = np.full(max(marker_ids, default=-1) + 1, -1, dtype=np.int32)
+        self.__index_by_id[self.marker_ids] = np.arange(n, dtype=np.int32)
+
+    def __len__(self) -> int:
+        """Number of boats in the fleet."""
+        return len(self.marker_ids)
+
+    def get_index(self, marker_id: int) -> int | None:
+        """Get fleet index of the boat with the marker Id."""
+        if not 0 <= marker_id < len(self.__index_by_id) or self.__index_by_id[marker_id] < 0:
+            return None
+        return int(self.__index_by_id[marker_id])
+
+    def update(self,
+               detections: MarkerDetections,
+               poses: dict[int, MarkerPose] | None = None) -> None:
+        """Update positions, directions and velocities of all boats from the frame's marker detections.
+
+        With marker `poses` the velocities are measured in the pool frame,
+        otherwise they are estimated from the markers' pixel sizes (only valid for top-down perspective).
+        Velocities cover the time elapsed since each boat's previous detection.
+        """
+        corners, ids = detections
+        self.detected[:] = False
+
+        # Select the detections of fleet markers
+        in_range = (ids >= 0) & (ids < len(self.__index_by_id))
+        indices = np.full(len(ids), -1, dtype=np.int32)
+        indices[in_range] = self.__index_by_id[ids[in_range]]
+        is_boat = indices >= 0
+        indices = indices[is_boat]
+        corners = np.array(corners[is_boat], dtype=np.float32)
+
+        # Boats that are not detected keep their position but lose their direction
+        self.directions[:] = np.nan
+        self.headings_rad[:] = np.nan
+        if not len(indices):
+            return
+        now = time.time()
+        self.detected[indices] = True
+        # Elapsed time since the previous detection (NaN: not detected before)
+        elapsed_s = now - self.last_seen_s[indices]
+        self.last_seen_s[indices] = now
+
+        # Center as midpoint between diagonal corners
+        centers = (corners[:, 0] + corners[:, 2]) * 0.5
+        # Direction from bottom to top edge (assumes top-down perspective)
+        direction = (corners[:, 0] + corners[:, 1] - corners[:, 3] - corners[:, 2]) * 0.5
+        directions = direction / np.linalg.norm(direction, axis=1, keepdims=True)
+
+        # Moved distance since the previous detection (NaN: not detected before)
+        previous_centers = self.centers[indices]
+        previous_positions = self.positions_mm[indices]
+        moved_distance_mm = np.linalg.norm(centers - previous_centers, axis=1) * self.__get_mm_per_px(corners)
+        positions = np.full((len(indices), 3), np.nan, dtype=np.float32)
+        yaws = np.full(len(indices), np.nan, dtype=np.float32)
+        if poses:
+            ids_list: list[int] = self.marker_ids[indices].tolist()
+            for i, marker_id in enumerate(ids_list):
+                pose = poses.get(marker_id)
+                if pose is not None:
+                    positions[i] = pose.position_mm
+                    yaws[i] = pose.yaw_rad
+            # Prefer metric distances where both poses are known
+            moved_distance_pose_mm = np.linalg.norm(positions - previous_positions, axis=1)
+            has_poses = ~np.isnan(moved_distance_pose_mm)
+            moved_distance_mm[has_poses] = moved_distance_pose_mm[has_poses]
+
+        # mm/s -> m/s
+        has_previous = ~np.isnan(moved_distance_mm) & (elapsed_s > 0)
+        self.velocities_m_per_s[indices[has_previous]] = (
+            moved_distance_mm[has_previous] / elapsed_s[has_previous] / 1000
+        )
+
+        self.centers[indices] = centers
+        self.directions[indices] = directions
+        self.headings_rad[indices] = np.arctan2(directions[:, 1], directions[:, 0])
+        self.positions_mm[indices] = positions
+        self.yaws_rad[indices] = yaws
+
+    def visualize(self, image: cv2.Mat, direction_line_length_px: int = 100) -> None:
+        """Visualize positions and directions of all detected boats."""
+        detected = self.detected
+        if not detected.any():
+            return
+        centers = self.centers[detected]
+        direction_ends = centers + self.directions[detected] * direction_line_length_px
+        # Render all direction lines in a single call
+        lines = np.stack([centers, direction_ends], axis=1).round().astype(np.int32)
+        cv2.polylines(image, list(lines), isClosed=False, color=(0, 0, 255), thickness=2)
+        marker_ids: list[int] = self.marker_ids[detected].tolist()
+        for marker_id, center in zip(marker_ids, centers.round().astype(np.int32)):
+            cv2.circle(image, center, radius=4, color=(0, 0, 255), thickness=-1)
+            cv2.putText(
+                image,
+                text=str(marker_id),
+                org=center + np.array([8, -8]),
+                fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                fontScale=0.6,
+                color=(0, 255, 0),
+                thickness=2,
+            )
+
+    def __get_mm_per_px(self, corners: VecFloat) -> VecFloat:
+        """Calculate millimeters per pixel of all markers using the known marker size."""
+        # Mean length of the four marker sides
+        sides = corners - np.roll(corners, 1, axis=1)
+        side_lengths_px = np.linalg.norm(sides, axis=2).mean(axis=1)
+        mm_per_px: VecFloat = self.marker_size_mm / side_lengths_px
+        return mm_per_px
+
+
+class FleetUI(UIState):
+    """UI for visualizing the state of all boats in the fleet."""
+    __fleet: Fleet
+
+    def __init__(self, fleet: Fleet) -> None:
+        """Create new fleet UI."""
+        super().__init__(
+            keycode=102,
+            keyname='F',
+            name='Fleet overview',
+            instructions='Boats:'
+        )
+        self.__fleet = fleet
+
+    def render(self, image: cv2.Mat) -> None:
+        """Render one line per boat."""
+        fleet = self.__fleet
+        now = time.time()
+        lines = []
+        for i, marker_id in enumerate(fleet.marker_ids.tolist()):
+            last_seen_s = float(fleet.last_seen_s[i])
+            if math.isnan(last_seen_s):
+                lines.append(f'#{marker_id}: never seen')
+                continue
+            line = f'#{marker_id}: {fleet.velocities_m_per_s[i] * 100:.1f} cm/s'
+            if not math.isnan(fleet.positions_mm[i, 0]):
+                x_mm, y_mm, _ = fleet.positions_mm[i]
+                line += f', ({x_mm:.0f}, {y_mm:.0f}) mm, {math.degrees(fleet.yaws_rad[i]):.0f} deg'
+            if not fleet.detected[i]:
+                line += f', lost {now - last_seen_s:.1f}s ago'
+            lines.append(line)
+        fleet_text_box = TextBox(lines, 0, 200)
+        fleet_text_box.render(image)
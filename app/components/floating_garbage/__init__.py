@@ -1,57 +1,73 @@
 """Detect floating garbage."""
 
-import json
 import cv2
 import numpy as np
+from app.components.background_model import BackgroundModel
 from app.components.blob_detection import BlobDetection
 from app.components.blob_detection.params import BlobDetectionParams
-from app.components.helpers import create_dir_if_not_exists
+from app.components.calibration_store import get_calibration_store
 from app.components.opencv_ui import UIState
+from app.components.pool import Pool
 from app.util_types import VecFloat
 from app.logger import logger
 
 
 class FloatingGarbage():
-    """Detect floating garbage."""
+    """Detect floating garbage.
+
+    Garbage candidates are detected by blob detection or (if set) as foreground of the `background_model`.
+    """
     blob_detection: BlobDetection
+    background_model: BackgroundModel | None = None
     blob_id: int | None = None
     center: VecFloat | None = None
     size: float | None = None
 
-    CACHE_FILENAME = 'floating_garbage.json'
+    CACHE_KEY = 'floating_garbage_blob_id'
 
-    def __init__(self, detection_params: BlobDetectionParams | None = None, blob_id_from_cache: bool = False) -> None:
+    def __init__(self,
+                 detection_params: BlobDetectionParams | None = None,
+                 blob_id_from_cache: bool = False,
+                 background_model: BackgroundModel | None = None) -> None:
         """Create new floating garbage detector."""
         params = detection_params or BlobDetectionParams(
             params_from_cache=True
         )
         self.blob_detection = BlobDetection(params)
+        self.background_model = background_model
 
         if blob_id_from_cache:
-            try:
-                with open(f'app/cache/{self.CACHE_FILENAME}', 'r') as f:
-                    cache_data = json.load(f)
-                    self.blob_id = int(cache_data.get('blob_id'))
-            except Exception:
+            self.blob_id = get_calibration_store().get_int(self.CACHE_KEY)
+            if self.blob_id is None:
                 logger.warn('Failed reading floating garbage blob Id from cache.')
 
-    def detect(self, image: cv2.Mat, debug: bool = False) -> None:
-        """Detect floating garbage using OPenCV blob detection."""
+    @property
+    def detector(self) -> BlobDetection | BackgroundModel:
+        """Active garbage candidate detector."""
+        return self.background_model if self.background_model is not None else self.blob_detection
+
+    def detect(self, image: cv2.Mat, debug: bool = False, pool: Pool | None = None) -> None:
+        """Detect floating garbage using OPenCV blob detection (only within the `pool` if set)."""
         def __reset_detection() -> None:
             self.center = None
             self.size = None
 
-        if self.blob_id is not None:
-            try:
-                self.blob_detection.detect(image)
-                garbage_blob = self.blob_detection.keypoints[self.blob_id]
-                self.center = garbage_blob.pt
-                self.size = garbage_blob.size
-            except Exception:
-                if debug:
-                    logger.warn(f'Could not detect floating garbage with blob Id {self.blob_id}')
+        try:
+            # Detect all garbage candidates (also without a selected blob, e.g. for the coverage map)
+            if pool is not None:
+                frame_size = (image.shape[1], image.shape[0])
+                self.detector.detect(image, pool.get_roi(frame_size), pool.get_mask(frame_size))
+            else:
+                self.detector.detect(image)
+            if self.blob_id is None:
                 __reset_detection()
-        else:
+                return
+            garbage_blob = self.detector.keypoints[self.blob_id]
+            self.center = garbage_blob.pt
+            self.size = garbage_blob.size
+        except Exception:
+            if debug:
+                logger.warn(f'Could not detect floating garbage with blob Id {self.blob_id}')
             __reset_detection()
 
     def visualize(self, image: cv2.Mat, size: int = 4) -> None:
@@ -98,16 +114,9 @@ class FloatingGarbageUI(UIState):
         num = keypress - zero_keycode
         if 0 <= num <= 9:
             self.floating_garbage.blob_id = num
-            try:
-                create_dir_if_not_exists('app/cache')
-                with open(f'app/cache/{self.floating_garbage.CACHE_FILENAME}', 'w+') as f:
-                    json.dump(
-                        {'blob_id': num},
-                        f
-                    )
-            except Exception:
-                logger.warn('Failed writing floating garbage blob Id to cache.')
+            # Written in the background
+            get_calibration_store().set_value(self.floating_garbage.CACHE_KEY, num)
 
     def render(self, image: cv2.Mat) -> None:
         """Visualize all detected blobs."""
-        self.floating_garbage.blob_detection.visualize(image)
+        self.floating_garbage.detector.visualize(image)
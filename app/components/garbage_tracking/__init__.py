@@ -0,0 +1,210 @@
+"""Track drifting garbage candidates and plan intercepts."""
+
+import math
+import time
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.opencv_ui import UIState
+from app.components.opencv_ui.text import TextBox
+from app.util_types import VecFloat
+
+Vec64 = npt.NDArray[np.float64]
+# Ranked intercepts as (track Ids (n), intercept points (n x 2), times to intercept in seconds (n))
+Intercepts = tuple[npt.NDArray[np.int64], VecFloat, Vec64]
+
+
+def compute_intercepts(boat_position: VecFloat,
+                       boat_speed: float,
+                       positions: VecFloat,
+                       velocities: VecFloat) -> tuple[VecFloat, Vec64]:
+    """Compute the earliest points where a boat at full speed meets each drifting target.
+
+    Takes target positions (n x 2) and drift velocities (n x 2, units per second),
+    returns intercept points (n x 2) and times (n) (inf where the boat is too slow to catch up).
+    """
+    offsets = np.asarray(positions, dtype=np.float64) - np.asarray(boat_position, dtype=np.float64)
+    velocities_64 = np.asarray(velocities, dtype=np.float64)
+    # |offset + velocity * t| = speed * t  ->  a t^2 + b t + c = 0
+    a = np.einsum('ij,ij->i', velocities_64, velocities_64) - boat_speed ** 2
+    b = 2 * np.einsum('ij,ij->i', offsets, velocities_64)
+    c = np.einsum('ij,ij->i', offsets, offsets)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        discriminant = b ** 2 - 4 * a * c
+        root = np.sqrt(np.maximum(discriminant, 0))
+        t1 = (-b - root) / (2 * a)
+        t2 = (-b + root) / (2 * a)
+        # Degenerate case of equal speeds (a = 0): linear equation
+        t_linear = np.where(b < 0, -c / b, np.inf)
+    # Earliest non-negative root
+    t1 = np.where(t1 >= 0, t1, np.inf)
+    t2 = np.where(t2 >= 0, t2, np.inf)
+    times = np.where(np.abs(a) < 1e-12, t_linear, np.minimum(t1, t2))
+    times = np.where(discriminant >= 0, times, np.inf)
+    # Targets at the boat's position are reached immediately
+    times = np.where(c == 0, 0, np.where(np.isnan(times), np.inf, times))
+    finite = np.isfinite(times)
+    points = np.asarray(positions, dtype=np.float64) + velocities_64 * np.where(finite, times, 0)[:, None]
+    return np.where(finite[:, None], points, np.nan).astype(np.float32), times
+
+
+def rank_intercepts(track_ids: npt.NDArray[np.int64], points: VecFloat, times: Vec64) -> Intercepts:
+    """Sort reachable intercepts by time to intercept."""
+    reachable = np.isfinite(times)
+    order = np.argsort(times[reachable], kind='stable')
+    return track_ids[reachable][order], points[reachable][order], times[reachable][order]
+
+
+class GarbageTracker():
+    """Track garbage candidates across frames and estimate their drift velocities.
+
+    Candidates are associated with the tracks' predicted positions by mutual nearest neighbours within `gate_px`.
+    Every track keeps its last `history` positions in preallocated arrays,
+    the drift velocity is the least-squares slope over this history.
+    """
+    max_tracks: int
+    history: int
+    gate_px: float
+    max_age_s: float
+    # Per-track ring buffers (max tracks x history), NaN if empty
+    __positions: VecFloat
+    __timestamps: Vec64
+    __heads: npt.NDArray[np.int64]
+    __active: npt.NDArray[np.bool_]
+    __ids: npt.NDArray[np.int64]
+    __last_seen_s: Vec64
+    __velocities: VecFloat
+    __next_id: int = 0
+
+    def __init__(self, max_tracks: int = 64, history: int = 15, gate_px: float = 50, max_age_s: float = 1) -> None:
+        """Create garbage tracker."""
+        self.max_tracks = max_tracks
+        self.history = max(2, history)
+        self.gate_px = gate_px
+        self.max_age_s = max_age_s
+        self.__positions = np.full((max_tracks, self.history, 2), np.nan, dtype=np.float32)
+        self.__timestamps = np.full((max_tracks, self.history), np.nan, dtype=np.float64)
+        self.__heads = np.zeros(max_tracks, dtype=np.int64)
+        self.__active = np.zeros(max_tracks, dtype=np.bool_)
+        self.__ids = np.full(max_tracks, -1, dtype=np.int64)
+        self.__last_seen_s = np.full(max_tracks, np.nan, dtype=np.float64)
+        self.__velocities = np.zeros((max_tracks, 2), dtype=np.float32)
+
+    def update(self, positions: VecFloat, timestamp_s: float | None = None) -> None:
+        """Associate the frame's candidate positions (n x 2) with the tracks and update their drift."""
+        now = time.perf_counter() if timestamp_s is None else timestamp_s
+        positions = np.asarray(positions, dtype=np.float32).reshape(-1, 2)
+
+        # Expire tracks that were not seen for too long
+        with np.errstate(invalid='ignore'):
+            self.__active &= ~(now - self.__last_seen_s > self.max_age_s)
+
+        tracks = np.flatnonzero(self.__active)
+        matched_tracks = np.empty(0, dtype=np.int64)
+        matched_candidates = np.empty(0, dtype=np.int64)
+        if len(tracks) and len(positions):
+            # Predict the tracks' current positions from their drift
+            latest = self.__positions[tracks, (self.__heads[tracks] - 1) % self.history]
+            elapsed = (now - self.__last_seen_s[tracks])[:, None]
+            predicted = latest + self.__velocities[tracks] * elapsed
+            # Distances (candidates x tracks)
+            distances = np.linalg.norm(positions[:, None, :] - predicted[None, :, :], axis=2)
+            nearest_track = distances.argmin(axis=1)
+            nearest_candidate = distances.argmin(axis=0)
+            candidates = np.arange(len(positions))
+            mutual = nearest_candidate[nearest_track] == candidates
+            within_gate = distances[candidates, nearest_track] <= self.gate_px
+            matched_candidates = candidates[mutual & within_gate]
+            matched_tracks = tracks[nearest_track[matched_candidates]]
+
+        # Start new tracks in free slots for unmatched candidates
+        unmatched = np.setdiff1d(np.arange(len(positions)), matched_candidates)
+        free = np.flatnonzero(~self.__active)[:len(unmatched)]
+        unmatched = unmatched[:len(free)]
+        if len(free):
+            self.__positions[free] = np.nan
+            self.__timestamps[free] = np.nan
+            self.__heads[free] = 0
+            self.__velocities[free] = 0
+            self.__active[free] = True
+            self.__ids[free] = self.__next_id + np.arange(len(free))
+            self.__next_id += len(free)
+
+        updated_tracks = np.concatenate([matched_tracks, free])
+        updated_candidates = np.concatenate([matched_candidates, unmatched])
+        if not len(updated_tracks):
+            return
+        heads = self.__heads[updated_tracks]
+        self.__positions[updated_tracks, heads] = positions[updated_candidates]
+        self.__timestamps[updated_tracks, heads] = now
+        self.__heads[updated_tracks] = (heads + 1) % self.history
+        self.__last_seen_s[updated_tracks] = now
+        self.__update_velocities(updated_tracks)
+
+    def get_tracks(self) -> tuple[npt.NDArray[np.int64], VecFloat, VecFloat]:
+        """Get (track Ids, latest positions, drift velocities in px/s) of all active tracks."""
+        tracks = np.flatnonzero(self.__active)
+        latest = self.__positions[tracks, (self.__heads[tracks] - 1) % self.history]
+        return self.__ids[tracks], latest, self.__velocities[tracks]
+
+    def plan_intercepts(self, boat_position: VecFloat, boat_speed_px_per_s: float) -> Intercepts:
+        """Rank all tracked candidates by the time a boat at full speed needs to intercept them."""
+        track_ids, positions, velocities = self.get_tracks()
+        points, times = compute_intercepts(boat_position, boat_speed_px_per_s, positions, velocities)
+        return rank_intercepts(track_ids, points, times)
+
+    def visualize(self, image: cv2.Mat, drift_horizon_s: float = 2) -> None:
+        """Render the predicted drift of every track over the next `drift_horizon_s` seconds."""
+        _, positions, velocities = self.get_tracks()
+        if not len(positions):
+            return
+        lines = np.stack([positions, positions + velocities * drift_horizon_s], axis=1).round().astype(np.int32)
+        cv2.polylines(image, list(lines), isClosed=False, color=(255, 255, 0), thickness=2)
+
+    def __update_velocities(self, tracks: npt.NDArray[np.int64]) -> None:
+        """Least-squares slope of position over time for all given tracks at once."""
+        timestamps = self.__timestamps[tracks]
+        positions = self.__positions[tracks].astype(np.float64)
+        valid = ~np.isnan(timestamps)
+        counts = valid.sum(axis=1)
+        # Times relative to each track's mean time, invalid samples weighted 0
+        t = np.where(valid, timestamps, 0)
+        t_mean = t.sum(axis=1) / np.maximum(counts, 1)
+        dt = np.where(valid, timestamps - t_mean[:, None], 0)
+        p = np.where(valid[..., None], positions, 0)
+        p_mean = p.sum(axis=1) / np.maximum(counts, 1)[:, None]
+        dp = np.where(valid[..., None], positions - p_mean[:, None, :], 0)
+        variance = (dt ** 2).sum(axis=1)
+        covariance = (dt[..., None] * dp).sum(axis=1)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            velocities = np.where((counts >= 3)[:, None] & (variance > 0)[:, None], covariance / variance[:, None], 0)
+        self.__velocities[tracks] = velocities
+
+
+class InterceptUI(UIState):
+    """UI for listing the garbage candidates ranked by time to intercept."""
+    intercepts: Intercepts | None = None
+
+    def __init__(self) -> None:
+        """Create new intercept UI."""
+        super().__init__(
+            keycode=105,
+            keyname='I',
+            name='Garbage intercepts',
+            instructions='Candidates by time to intercept:'
+        )
+
+    def render(self, image: cv2.Mat) -> None:
+        """Render the ranked candidates and the path to the first intercept."""
+        if self.intercepts is None:
+            return
+        track_ids, points, times = self.intercepts
+        lines = [
+            f'#{track_id}: {time_s:.1f}s at ({point[0]:.0f}, {point[1]:.0f})'
+            for track_id, point, time_s in zip(track_ids.tolist()[:5], points[:5], times[:5].tolist())
+            if math.isfinite(time_s)
+        ]
+        intercepts_text_box = TextBox(lines or ['No reachable candidates'], 0, 200)
+        intercepts_text_box.render(image)
+        if len(points):
+            cv2.circle(image, points[0].round().astype(int), radius=8, color=(255, 0, 255), thickness=2)
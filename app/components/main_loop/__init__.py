@@ -1,7 +1,10 @@
 """Main application loop for handling OpenCV captures and tkinter GUIs."""
 
+import signal
+import time
 import cv2
 import numpy as np
+from types import FrameType
 from typing import Any, Callable, ParamSpec
 from app.components.tkinter_gui import GUI
 from app.components.opencv_ui import UI
@@ -11,58 +14,140 @@ P = ParamSpec('P')
 
 
 class MainLoop():
-    """Main application loop for handling OpenCV captures and tkinter GUIs."""
+    """Main application loop for handling OpenCV captures and tkinter GUIs.
+
+    Without a target frame rate, every iteration waits `refresh_rate_ms` after the frame's work.
+    With a target frame rate, every iteration only waits for the remainder of its frame period
+    (polling events for 1ms if over budget), so the loop runs at the target rate.
+    """
     __ui: UI
     refresh_rate_ms: int
+    target_fps: float | None
     interactive_window: str
     gui: GUI | None
+    frame_count: int = 0
+    overrun_count: int = 0
+    max_overrun_ms: float = 0
+    achieved_fps: float = 0
+    __stopped: bool = False
+    __mouse_callback_registered: bool = False
 
-    def __init__(self, ui: UI, interactive_window: str, gui: GUI | None = None, refresh_rate_ms: int = 15) -> None:
-        """Create new OpenCV capture loop."""
+    def __init__(self,
+                 ui: UI,
+                 interactive_window: str,
+                 gui: GUI | None = None,
+                 refresh_rate_ms: int = 15,
+                 target_fps: float | None = None) -> None:
+        """Create new OpenCV capture loop (a target frame rate of 0 or None waits `refresh_rate_ms` per frame)."""
         self.__ui = ui
         self.refresh_rate_ms = refresh_rate_ms
+        self.target_fps = target_fps or None
         self.interactive_window = interactive_window
         self.gui = gui
 
+    @property
+    def overrun_ratio(self) -> float:
+        """Fraction of frames that exceeded the target frame period."""
+        return self.overrun_count / self.frame_count if self.frame_count else 0
+
+    def stop(self) -> None:
+        """Stop the loop after the current iteration."""
+        self.__stopped = True
+
+    def __handle_mouse_event(self, event: int, x_pos: int, y_pos: int, *_: Any) -> None:  # type: ignore
+        """Process mouse event using UI."""
+        self.__ui.handle_mouse_event(event, np.array([x_pos, y_pos]))
+
+    def __get_wait_ms(self, deadline: float) -> int:
+        """Get time to wait for the frame's deadline (or the fixed refresh rate)."""
+        if self.target_fps is None:
+            return self.refresh_rate_ms
+        remaining_s = deadline - time.perf_counter()
+        if remaining_s < 0:
+            self.overrun_count += 1
+            self.max_overrun_ms = max(self.max_overrun_ms, -remaining_s * 1000)
+        # `cv2.waitKey(0)` would block until a key is pressed
+        return max(1, round(remaining_s * 1000))
+
+    def __update_stats(self, frame_start: float, frame_end: float) -> None:
+        """Update achieved frame rate (exponential moving average over the frame periods)."""
+        self.frame_count += 1
+        period_s = frame_end - frame_start
+        if period_s > 0:
+            fps = 1 / period_s
+            self.achieved_fps = fps if self.frame_count == 1 else 0.9 * self.achieved_fps + 0.1 * fps
+
     def run(self, func: Callable[P, None], *args: P.args, **kwargs: P.kwargs) -> None:
         """Run capture loop."""
-        # Run indefinitely until `esc`-key is pressed or error is reached
-        while True:
-            try:
-                ##########
-                # OpenCV #
-                ##########
+        headless = self.__ui.headless
+        # Stop gracefully when running as service (e.g. `systemctl stop`)
+        if headless:
+            def __handle_sigterm(signum: int, frame: FrameType | None) -> None:
+                self.stop()
+            signal.signal(signal.SIGTERM, __handle_sigterm)
 
+        period_s = 1 / self.target_fps if self.target_fps is not None else 0
+        frame_start = time.perf_counter()
+        deadline = frame_start + period_s
+
+        # Run indefinitely until `esc`-key is pressed, the loop is stopped or error is reached
+        while not self.__stopped:
+            try:
                 # Run loop callback
                 func(*args, **kwargs)
 
-                # Handle mouse events
-                def __handle_mouse_event(event: int, x_pos: int, y_pos: int, *_: Any) -> None:  # type: ignore
-                    # Process mouse event using UI
-                    self.__ui.handle_mouse_event(event, np.array([x_pos, y_pos]))
-                cv2.setMouseCallback(self.interactive_window, __handle_mouse_event)
+                # Without windows there are no mouse and keyboard events to await
+                if headless:
+                    time.sleep(self.__get_wait_ms(deadline) / 1000)
+                else:
+                    ###########
+                    # tkinter #
+                    ###########
+                    if self.gui is not None:
+                        self.gui.update()
+
+                    ##########
+                    # OpenCV #
+                    ##########
 
-                # Await keypress
-                keypress = cv2.waitKey(self.refresh_rate_ms)
+                    # Handle mouse events (the window exists after the first frame was shown)
+                    if not self.__mouse_callback_registered:
+                        cv2.setMouseCallback(self.interactive_window, self.__handle_mouse_event)
+                        self.__mouse_callback_registered = True
 
-                # Process keypress using UI
-                self.__ui.handle_keypress(keypress)
+                    # Await keypress for the rest of the frame period
+                    keypress = cv2.waitKey(self.__get_wait_ms(deadline))
 
-                # Close window on `esc`-press
-                if keypress == 27:
-                    break
+                    # Process keypress using UI
+                    self.__ui.handle_keypress(keypress)
 
-                ###########
-                # tkinter #
-                ###########
-                if self.gui is not None:
-                    self.gui.update()
+                    # Close window on `esc`-press
+                    if keypress == 27:
+                        break
+
+                frame_end = time.perf_counter()
+                self.__update_stats(frame_start, frame_end)
+                frame_start = frame_end
+                # Keep the frame schedule, restart it when falling behind (no catching up with bursts)
+                deadline += period_s
+                if deadline < frame_end:
+                    deadline = frame_end + period_s
+            # Close window on interrupt (Ctrl+C)
+            except KeyboardInterrupt:
+                break
             # Close window on error
             except Exception as e:
                 logger.error(e)
                 break
 
+        if self.target_fps is not None and self.frame_count:
+            logger.info(
+                f'Main loop: {self.achieved_fps:.1f}/{self.target_fps:.1f}fps,'
+                f' {self.overrun_count}/{self.frame_count} frames over budget (max {self.max_overrun_ms:.1f}ms)'
+            )
+
         # Cleanup after ending loop
-        cv2.destroyAllWindows()
+        if not headless:
+            cv2.destroyAllWindows()
         if self.gui:
             self.gui.destroy()
@@ -0,0 +1,239 @@
+"""Expose frame loop metrics in Prometheus text format on a local HTTP endpoint."""
+
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from itertools import accumulate
+from typing import NamedTuple
+from app.components.boat import Boat
+from app.components.stage_timer import StageTimer
+from app.logger import logger
+
+# Upper bounds of the stage latency histogram buckets in seconds
+STAGE_BUCKETS_S = (0.001, 0.002, 0.005, 0.01, 0.02, 0.033, 0.05, 0.1, 0.2, 0.5)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_value(value: int | float) -> str:
+    """Format sample value exactly (integers in full, floats with all significant digits)."""
+    # Counters are printed in full, not rounded to 6 digits
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
+
+
+class MetricsSnapshot(NamedTuple):
+    """Immutable copy of all metric values at one point in time."""
+    timestamp_s: float
+    frames_captured: int
+    frames_processed: int
+    boat_marker_hits: int
+    boat_velocity_m_per_s: float
+    fleet_boats_detected: int
+    garbage_candidates: int
+    garbage_candidates_total: int
+    # (source, count) and (queue, depth) pairs
+    dropped: tuple[tuple[str, int], ...]
+    queue_depths: tuple[tuple[str, int], ...]
+    # Stage latency histograms: non-cumulative bucket counts (incl. +Inf) and sums per stage
+    stages: tuple[str, ...]
+    stage_bucket_counts: tuple[tuple[int, ...], ...]
+    stage_sums_s: tuple[float, ...]
+
+
+def format_metrics(snapshot: MetricsSnapshot, prefix: str = 'sgi') -> str:
+    """Format metrics snapshot in the Prometheus text exposition format."""
+    lines: list[str] = []
+
+    def add(name: str, metric_type: str, help_text: str, samples: list[tuple[str, str, int | float]]) -> None:
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} {metric_type}')
+        lines.extend(f'{prefix}_{name}{suffix}{labels} {format_value(value)}' for suffix, labels, value in samples)
+
+    add('frames_captured_total', 'counter', 'Frames read from the camera.',
+        [('', '', snapshot.frames_captured)])
+    add('frames_processed_total', 'counter', 'Frames passed to perception (not skipped by the motion gate).',
+        [('', '', snapshot.frames_processed)])
+    add('dropped_total', 'counter', 'Frames or records dropped by their consumer.',
+        [('', f'{{source="{source}"}}', count) for source, count in snapshot.dropped])
+    add('boat_marker_hits_total', 'counter', 'Processed frames the boat marker was detected in.',
+        [('', '', snapshot.boat_marker_hits)])
+    hit_ratio = snapshot.boat_marker_hits / snapshot.frames_processed if snapshot.frames_processed else math.nan
+    add('boat_marker_hit_ratio', 'gauge', 'Fraction of processed frames the boat marker was detected in.',
+        [('', '', hit_ratio)])
+    add('boat_velocity_meters_per_second', 'gauge', 'Latest boat velocity.',
+        [('', '', snapshot.boat_velocity_m_per_s)])
+    add('fleet_boats_detected', 'gauge', 'Fleet boats detected in the latest processed frame.',
+        [('', '', snapshot.fleet_boats_detected)])
+    add('garbage_candidates', 'gauge', 'Garbage candidates detected in the latest processed frame.',
+        [('', '', snapshot.garbage_candidates)])
+    add('garbage_candidates_total', 'counter', 'Garbage candidates detected over all processed frames.',
+        [('', '', snapshot.garbage_candidates_total)])
+    add('queue_depth', 'gauge', 'Items waiting in the background workers\' queues.',
+        [('', f'{{queue="{queue}"}}', depth) for queue, depth in snapshot.queue_depths])
+
+    # Cumulative histogram buckets per stage
+    bounds = [*(f'{bound:g}' for bound in STAGE_BUCKETS_S), '+Inf']
+    stage_samples: list[tuple[str, str, int | float]] = []
+    for stage, counts, sum_s in zip(snapshot.stages, snapshot.stage_bucket_counts, snapshot.stage_sums_s):
+        cumulative = list(accumulate(counts))
+        stage_samples.extend(
+            ('_bucket', f'{{stage="{stage}",le="{bound}"}}', count) for bound, count in zip(bounds, cumulative)
+        )
+        stage_samples.append(('_sum', f'{{stage="{stage}"}}', sum_s))
+        stage_samples.append(('_count', f'{{stage="{stage}"}}', cumulative[-1]))
+    add('stage_duration_seconds', 'histogram', 'Duration of the frame loop\'s processing stages.', stage_samples)
+
+    return '\n'.join(lines) + '\n'
+
+
+class FrameMetrics():
+    """Aggregate per-frame metrics in the frame loop.
+
+    Values are only ever modified by the frame loop thread.
+    At most every `snapshot_interval_s` they are copied into an immutable snapshot,
+    which replaces the published snapshot by a single reference assignment,
+    so readers on other threads never lock or block the frame loop.
+    """
+    stages: tuple[str, ...]
+    snapshot_interval_s: float
+    frames_captured: int = 0
+    frames_processed: int = 0
+    boat_marker_hits: int = 0
+    garbage_candidates_total: int = 0
+    __bucket_counts: list[list[int]]
+    __sums_s: list[float]
+    __snapshot: MetricsSnapshot
+    __last_snapshot_s: float = -math.inf
+
+    def __init__(self, stages: tuple[str, ...], snapshot_interval_s: float = 0.2) -> None:
+        """Create new frame metrics for the given stages."""
+        self.stages = stages
+        self.snapshot_interval_s = snapshot_interval_s
+        self.__bucket_counts = [[0] * (len(STAGE_BUCKETS_S) + 1) for _ in stages]
+        self.__sums_s = [0.0] * len(stages)
+        self.__snapshot = self.__create_snapshot(0, 0, 0, {}, {})
+
+    @property
+    def snapshot(self) -> MetricsSnapshot:
+        """Get the latest published snapshot, safe to read from any thread."""
+        return self.__snapshot
+
+    def record(self,
+               timer: StageTimer,
+               processed: bool,
+               boat: Boat,
+               fleet_boats_detected: int,
+               garbage_candidates: int,
+               dropped: dict[str, int],
+               queue_depths: dict[str, int]) -> None:
+        """Record a frame's stage durations and state, publish a new snapshot if the interval passed."""
+        self.frames_captured += 1
+        if processed:
+            self.frames_processed += 1
+            self.boat_marker_hits += boat.center is not None
+            self.garbage_candidates_total += garbage_candidates
+
+        # Count stage durations into their buckets (skip stages that did not run)
+        for index, duration_ms in enumerate(timer.get(self.stages)):
+            if math.isnan(duration_ms):
+                continue
+            duration_s = duration_ms / 1000
+            self.__bucket_counts[index][bisect_left(STAGE_BUCKETS_S, duration_s)] += 1
+            self.__sums_s[index] += duration_s
+
+        now = time.perf_counter()
+        if now - self.__last_snapshot_s >= self.snapshot_interval_s:
+            self.__last_snapshot_s = now
+            self.__snapshot = self.__create_snapshot(
+                boat.velocity_m_per_s,
+                fleet_boats_detected,
+                garbage_candidates,
+                dropped,
+                queue_depths
+            )
+
+    def __create_snapshot(self,
+                          boat_velocity_m_per_s: float,
+                          fleet_boats_detected: int,
+                          garbage_candidates: int,
+                          dropped: dict[str, int],
+                          queue_depths: dict[str, int]) -> MetricsSnapshot:
+        """Copy the current values into an immutable snapshot."""
+        return MetricsSnapshot(
+            timestamp_s=time.time(),
+            frames_captured=self.frames_captured,
+            frames_processed=self.frames_processed,
+            boat_marker_hits=self.boat_marker_hits,
+            boat_velocity_m_per_s=float(boat_velocity_m_per_s),
+            fleet_boats_detected=fleet_boats_detected,
+            garbage_candidates=garbage_candidates,
+            garbage_candidates_total=self.garbage_candidates_total,
+            dropped=tuple((source, int(count)) for source, count in dropped.items()),
+            queue_depths=tuple((queue, int(depth)) for queue, depth in queue_depths.items()),
+            stages=self.stages,
+            stage_bucket_counts=tuple(tuple(counts) for counts in self.__bucket_counts),
+            stage_sums_s=tuple(self.__sums_s),
+        )
+
+
+class MetricsRequestHandler(BaseHTTPRequestHandler):
+    """Respond to scrapes of `/metrics` with the latest snapshot."""
+    server: 'MetricsHTTPServer'
+
+    def do_GET(self) -> None:
+        """Format and send the latest snapshot."""
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = format_metrics(self.server.metrics.snapshot).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        """Do not log every scrape."""
+
+
+class MetricsHTTPServer(HTTPServer):
+    """HTTP server holding the metrics it serves."""
+    metrics: FrameMetrics
+
+    def __init__(self, address: tuple[str, int], metrics: FrameMetrics) -> None:
+        """Create new metrics HTTP server."""
+        self.metrics = metrics
+        super().__init__(address, MetricsRequestHandler)
+
+
+class MetricsServer():
+    """Serve frame metrics at `http://<host>:<port>/metrics` on a background thread.
+
+    Scrapes only read and format the latest published snapshot.
+    """
+    address: tuple[str, int]
+    __server: MetricsHTTPServer
+    __thread: threading.Thread
+
+    def __init__(self, metrics: FrameMetrics, host: str = '127.0.0.1', port: int = 9464) -> None:
+        """Create new metrics server and start its thread."""
+        self.__server = MetricsHTTPServer((host, port), metrics)
+        # The actual port (if port 0 was requested)
+        self.address = (host, self.__server.server_address[1])
+        self.__thread = threading.Thread(target=self.__server.serve_forever, name='metrics', daemon=True)
+        self.__thread.start()
+        logger.info(f'Serving metrics on http://{self.address[0]}:{self.address[1]}/metrics')
+
+    def close(self) -> None:
+        """Stop serving metrics."""
+        self.__server.shutdown()
+        self.__server.server_close()
+        self.__thread.join()
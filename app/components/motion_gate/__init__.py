@@ -0,0 +1,105 @@
+"""Skip perception for frames without changes."""
+
+import time
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.logger import logger
+
+# Normalized region (x, y, width, height) with values between 0 and 1
+Region = tuple[float, ...]
+
+
+class MotionGate():
+    """Detect changes between frames using a downscaled greyscale copy.
+
+    Frames are compared to the frame of the last refresh (not the previous frame),
+    so slow drifts also trigger a refresh once they exceed the thresholds.
+    """
+    width: int
+    pixel_threshold: int
+    changed_fraction: float
+    max_skip_interval_s: float
+    regions: list[Region]
+    skipped_frames: int = 0
+    processed_frames: int = 0
+    __reference: npt.NDArray[np.uint8] | None = None
+    __region_mask: npt.NDArray[np.bool_] | None = None
+    __last_refresh: float = 0
+
+    def __init__(self,
+                 width: int = 160,
+                 pixel_threshold: int = 15,
+                 changed_fraction: float = 0.002,
+                 max_skip_interval_s: float = 1,
+                 regions: list[Region] | None = None) -> None:
+        """Create new motion gate.
+
+        A frame has changed if more than `changed_fraction` of the (region-masked) downscaled pixels
+        differ by more than `pixel_threshold` from the reference.
+        A refresh is forced after `max_skip_interval_s` regardless of changes.
+        """
+        self.width = width
+        self.pixel_threshold = pixel_threshold
+        self.changed_fraction = changed_fraction
+        self.max_skip_interval_s = max_skip_interval_s
+        self.regions = regions or []
+
+    def has_changed(self, image: cv2.Mat) -> bool:
+        """Check if the frame has changed and perception needs to run."""
+        height = max(1, round(image.shape[0] * self.width / image.shape[1]))
+        # Linear downscaling is an order of magnitude faster than area interpolation,
+        # blurring the small frame suppresses the resulting sampling noise
+        small = cv2.GaussianBlur(
+            cv2.cvtColor(
+                cv2.resize(image, (self.width, height), interpolation=cv2.INTER_LINEAR),
+                cv2.COLOR_BGR2GRAY
+            ),
+            (3, 3),
+            0
+        )
+        now = time.perf_counter()
+
+        # Refresh on first frame, resolution changes and after the max skip interval
+        reference = self.__reference
+        if reference is None or reference.shape != small.shape or now - self.__last_refresh >= self.max_skip_interval_s:
+            return self.__refresh(small, now)
+
+        # Fraction of changed pixels within the regions
+        changed = cv2.absdiff(small, reference) > self.pixel_threshold
+        region_mask = self.__get_region_mask(small.shape)
+        if region_mask is not None:
+            changed_fraction = np.count_nonzero(changed & region_mask) / max(1, np.count_nonzero(region_mask))
+        else:
+            changed_fraction = np.count_nonzero(changed) / changed.size
+
+        if changed_fraction > self.changed_fraction:
+            return self.__refresh(small, now)
+        self.skipped_frames += 1
+        return False
+
+    def log_stats(self) -> None:
+        """Log number of skipped frames."""
+        total = self.skipped_frames + self.processed_frames
+        logger.info(f'Motion gate skipped perception for {self.skipped_frames}/{total} frames')
+
+    def __refresh(self, small: npt.NDArray[np.uint8], now: float) -> bool:
+        """Set new reference frame."""
+        self.__reference = small
+        self.__last_refresh = now
+        self.processed_frames += 1
+        return True
+
+    def __get_region_mask(self, shape: tuple[int, ...]) -> npt.NDArray[np.bool_] | None:
+        """Get (cached) mask of all regions for the downscaled frame."""
+        if not self.regions:
+            return None
+        if self.__region_mask is None or self.__region_mask.shape != shape:
+            height, width = shape[:2]
+            mask = np.zeros((height, width), dtype=np.bool_)
+            for x, y, w, h in self.regions:
+                rows = slice(int(y * height), int(np.ceil((y + h) * height)))
+                columns = slice(int(x * width), int(np.ceil((x + w) * width)))
+                mask[rows, columns] = True
+            self.__region_mask = mask
+        return self.__region_mask
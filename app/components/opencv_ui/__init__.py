@@ -1,6 +1,7 @@
 """Handle OpenCV user input and UI states."""
 
 import cv2
+import numpy as np
 from .text import TextBox
 from app.util_types import VecFloat
 from app.logger import logger
@@ -34,11 +35,30 @@ class UI():
     """Handle OpenCV user input and UI states."""
 
     header_text = 'Press "KEY" to toggle the menus'
+    headless: bool
     __ui_states: list[UIState] = []
     __ui_state: UIState | None = None
 
-    def __init__(self) -> None:
-        """Create UI instance."""
+    def __init__(self, headless: bool = False) -> None:
+        """Create UI instance.
+
+        Headless UIs never open any windows.
+        """
+        self.headless = headless
+
+    def show(self, window_name: str, image: cv2.Mat) -> None:
+        """Show image in window (unless headless)."""
+        if not self.headless:
+            cv2.imshow(window_name, image)
+
+    def show_no_frame(self, window_name: str, frame_size: tuple[int, int] | None = None) -> None:
+        """Show placeholder of `frame_size` (width, height) while no capture is available (unless headless)."""
+        if self.headless:
+            return
+        width, height = frame_size or (640, 480)
+        image = np.zeros((height, width, 3), dtype=np.uint8)
+        TextBox(['No camera frame: reconnecting...'], x_pos=0, y_pos=0).render(image)
+        cv2.imshow(window_name, image)
 
     def __get_ui_state_keycodes(self) -> list[int]:
         """Get keycodes for all ui states."""
@@ -1,24 +1,50 @@
 """Set up pool dimensions."""
 
-import json
 import cv2
 import numpy as np
+import numpy.typing as npt
 import pyshine as ps
 from typing import Literal
-from app.components.helpers import create_dir_if_not_exists
+from app.components.calibration_store import get_calibration_store
 from app.components.opencv_ui import UIState
 from app.util_types import VecFloat
 from app.logger import logger
 
+# Region of interest as (x, y, width, height)
+ROI = tuple[int, int, int, int]
+
+
+def get_frame_corners(frame_width: int, frame_height: int) -> tuple[VecFloat, VecFloat, VecFloat, VecFloat]:
+    """Get the corners (top-left, top-right, bottom-left, bottom-right) of the entire frame."""
+    return (
+        np.array([0, 0], dtype=np.float32),
+        np.array([frame_width, 0], dtype=np.float32),
+        np.array([0, frame_height], dtype=np.float32),
+        np.array([frame_width, frame_height], dtype=np.float32)
+    )
+
 
 class Pool():
-    """Keep track of pool dimensions."""
-    top_left: VecFloat
-    top_right: VecFloat
-    bottom_left: VecFloat
-    bottom_right: VecFloat
+    """Keep track of pool dimensions.
+
+    The pool's bounding ROI and binary mask are cached until a corner moves.
+    """
+    __top_left: VecFloat
+    __top_right: VecFloat
+    __bottom_left: VecFloat
+    __bottom_right: VecFloat
     top_left_bottom_right_distance_cm: float
+    # Image scale at the pool's surface (if detected from the corner markers)
+    mm_per_px: float | None = None
     cache_constraints: bool
+    constraints_from_cache: bool = False
+    # ROI and mask (ROI-sized) for the cached frame size
+    __mask_frame_size: tuple[int, int] | None = None
+    __roi: ROI | None = None
+    __mask: npt.NDArray[np.uint8] | None = None
+
+    __CACHE_KEY = 'pool_corners'
+    __SCALE_CACHE_KEY = 'pool_mm_per_px'
 
     def __init__(self,
                  top_left: VecFloat,
@@ -32,51 +58,142 @@ class Pool():
         self.cache_constraints = cache_constraints
         # Try loading constraints from cache
         if cache_constraints:
-            try:
-                with open('cache/pool_constraints.json', 'r') as f:
-                    constraints = json.load(f)
-                    self.top_left = np.array(constraints.get('top_left'))
-                    self.top_right = np.array(constraints.get('top_right'))
-                    self.bottom_left = np.array(constraints.get('bottom_left'))
-                    self.bottom_right = np.array(constraints.get('bottom_right'))
-                    # Skip setting constraints from parameters if successful
-                    return
-            except Exception:
-                logger.warn('Failed reading pool constraints from cache')
+            store = get_calibration_store()
+            corners = store.get_array(self.__CACHE_KEY)
+            if corners is not None:
+                self.top_left, self.top_right, self.bottom_left, self.bottom_right = corners
+                self.constraints_from_cache = True
+                # Metric pool size (if detected from the corner markers)
+                mm_per_px = store.get_float(self.__SCALE_CACHE_KEY)
+                if mm_per_px is not None:
+                    self.set_scale(mm_per_px)
+                # Skip setting constraints from parameters if successful
+                return
+            logger.warn('Failed reading pool constraints from cache')
         # Set constraints from parameters if cache could not be loaded
         self.top_left = top_left
         self.top_right = top_right
         self.bottom_left = bottom_left
         self.bottom_right = bottom_right
 
+    @property
+    def top_left(self) -> VecFloat:
+        """Top-left pool corner in pixels."""
+        return self.__top_left
+
+    @top_left.setter
+    def top_left(self, corner: VecFloat) -> None:
+        self.__top_left = corner
+        self.__invalidate_mask()
+
+    @property
+    def top_right(self) -> VecFloat:
+        """Top-right pool corner in pixels."""
+        return self.__top_right
+
+    @top_right.setter
+    def top_right(self, corner: VecFloat) -> None:
+        self.__top_right = corner
+        self.__invalidate_mask()
+
+    @property
+    def bottom_left(self) -> VecFloat:
+        """Bottom-left pool corner in pixels."""
+        return self.__bottom_left
+
+    @bottom_left.setter
+    def bottom_left(self, corner: VecFloat) -> None:
+        self.__bottom_left = corner
+        self.__invalidate_mask()
+
+    @property
+    def bottom_right(self) -> VecFloat:
+        """Bottom-right pool corner in pixels."""
+        return self.__bottom_right
+
+    @bottom_right.setter
+    def bottom_right(self, corner: VecFloat) -> None:
+        self.__bottom_right = corner
+        self.__invalidate_mask()
+
+    def set_corners(self, corners: VecFloat) -> None:
+        """Set all corners as (top-left, top-right, bottom-left, bottom-right)."""
+        self.top_left, self.top_right, self.bottom_left, self.bottom_right = np.array(corners, dtype=np.float32)
+
+    def set_scale(self, mm_per_px: float) -> None:
+        """Set image scale at the pool's surface and derive the pool's metric size from it."""
+        self.mm_per_px = mm_per_px
+        diagonal_px = float(np.linalg.norm(self.bottom_right - self.top_left))
+        self.top_left_bottom_right_distance_cm = diagonal_px * mm_per_px / 10
+
+    def get_polygon(self) -> npt.NDArray[np.int32]:
+        """Get pool boundary as closed polygon (clockwise from top-left)."""
+        return np.array(
+            [self.top_left, self.top_right, self.bottom_right, self.bottom_left],
+            dtype=np.float32
+        ).round().astype(np.int32)
+
+    def get_roi(self, frame_size: tuple[int, int]) -> ROI | None:
+        """Get bounding box of the pool within a frame of size (width, height) (None if outside the frame)."""
+        self.__update_mask(frame_size)
+        return self.__roi
+
+    def get_mask(self, frame_size: tuple[int, int]) -> npt.NDArray[np.uint8] | None:
+        """Get binary pool mask for the ROI of a frame of size (width, height) (255: inside the pool)."""
+        self.__update_mask(frame_size)
+        return self.__mask
+
+    def __invalidate_mask(self) -> None:
+        """Rebuild ROI and mask on their next use."""
+        self.__mask_frame_size = None
+
+    def __update_mask(self, frame_size: tuple[int, int]) -> None:
+        """Rebuild ROI and mask if the corners or the frame size changed."""
+        if frame_size == self.__mask_frame_size:
+            return
+        self.__mask_frame_size = frame_size
+        frame_width, frame_height = frame_size
+        polygon = self.get_polygon()
+        # Bounding box clipped to the frame
+        x, y, width, height = cv2.boundingRect(polygon)
+        x_start, y_start = max(x, 0), max(y, 0)
+        x_end, y_end = min(x + width, frame_width), min(y + height, frame_height)
+        if x_end <= x_start or y_end <= y_start:
+            logger.warn('Pool boundary is outside the frame')
+            self.__roi = None
+            self.__mask = None
+            return
+        self.__roi = (x_start, y_start, x_end - x_start, y_end - y_start)
+        mask = np.zeros((y_end - y_start, x_end - x_start), dtype=np.uint8)
+        cv2.fillPoly(mask, [polygon - np.array([x_start, y_start], dtype=np.int32)], 255)
+        self.__mask = mask
+
     def visualize(self, image: cv2.Mat, color: tuple[int, int, int] = (0, 0, 255), thickness: float = 2) -> None:
         """Render pool boundaries to OpenCV image."""
+        top_left, top_right, bottom_left, bottom_right = [
+            np.array(corner, dtype=int) for corner in
+            (self.top_left, self.top_right, self.bottom_left, self.bottom_right)
+        ]
         # Top-left to top-right
-        cv2.line(image, self.top_left, self.top_right, color, thickness)
+        cv2.line(image, top_left, top_right, color, thickness)
         # Bottom-left to bottom-right
-        cv2.line(image, self.bottom_left, self.bottom_right, color, thickness)
+        cv2.line(image, bottom_left, bottom_right, color, thickness)
         # Top-left to bottom-left
-        cv2.line(image, self.top_left, self.bottom_left, color, thickness)
+        cv2.line(image, top_left, bottom_left, color, thickness)
         # Top-right to bottom-right
-        cv2.line(image, self.top_right, self.bottom_right, color, thickness)
+        cv2.line(image, top_right, bottom_right, color, thickness)
 
     def write_constraints(self) -> None:
         """Write pool constraints to cache if cache is enabled for pool instance."""
         if self.cache_constraints:
-            try:
-                create_dir_if_not_exists('app/cache')
-                with open('cache/pool_constraints.json', 'w+') as f:
-                    json.dump(
-                        {
-                            'top_left': self.top_left.tolist(),
-                            'top_right': self.top_right.tolist(),
-                            'bottom_left': self.bottom_left.tolist(),
-                            'bottom_right': self.bottom_right.tolist(),
-                        },
-                        f
-                    )
-            except Exception:
-                logger.warn('Failed writing pool constraints to cache')
+            # Written in the background, never blocks the UI
+            store = get_calibration_store()
+            store.set_array(
+                self.__CACHE_KEY,
+                np.array([self.top_left, self.top_right, self.bottom_left, self.bottom_right])
+            )
+            if self.mm_per_px is not None:
+                store.set_value(self.__SCALE_CACHE_KEY, self.mm_per_px)
 
 
 # Enum for corner shorthands
@@ -0,0 +1,136 @@
+"""Detect the pool boundary from ArUco markers placed at the pool's corners."""
+
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.aruco import ArUco, MarkerDetections
+from app.components.camera import Camera
+from app.components.pool import Pool
+from app.util_types import VecFloat
+from app.logger import logger
+
+
+class PoolBoundaryDetector():
+    """Average the positions of four corner markers over a window of frames.
+
+    The pool corners are the marker centers in the order (top-left, top-right, bottom-left, bottom-right).
+    The image scale follows from the markers' known size.
+    """
+    corner_marker_ids: npt.NDArray[np.int32]
+    marker_size_mm: float
+    window_size: int
+    # Ring buffers of marker centers (window x 4 x 2) and mean side lengths (window x 4), NaN if not detected
+    __centers: VecFloat
+    __side_lengths_px: VecFloat
+    __frame: int = 0
+
+    def __init__(self, corner_marker_ids: list[int], marker_size_mm: float, window_size: int = 30) -> None:
+        """Create pool boundary detector for the corner marker Ids."""
+        if len(corner_marker_ids) != 4 or len(set(corner_marker_ids)) != 4:
+            raise ValueError(f'Expected four distinct corner marker Ids, got {corner_marker_ids}')
+        self.corner_marker_ids = np.array(corner_marker_ids, dtype=np.int32)
+        self.marker_size_mm = marker_size_mm
+        self.window_size = max(1, window_size)
+        self.reset()
+
+    def reset(self) -> None:
+        """Discard all buffered marker positions."""
+        self.__centers = np.full((self.window_size, 4, 2), np.nan, dtype=np.float32)
+        self.__side_lengths_px = np.full((self.window_size, 4), np.nan, dtype=np.float32)
+        self.__frame = 0
+
+    @property
+    def sample_counts(self) -> npt.NDArray[np.int64]:
+        """Number of buffered detections of each corner marker."""
+        counts: npt.NDArray[np.int64] = np.count_nonzero(~np.isnan(self.__side_lengths_px), axis=0)
+        return counts
+
+    @property
+    def is_complete(self) -> bool:
+        """All corner markers were detected in every frame of the window."""
+        return bool((self.sample_counts >= self.window_size).all())
+
+    def update(self, detections: MarkerDetections) -> None:
+        """Buffer the corner markers of the frame's marker detections."""
+        corners, ids = detections
+        row = self.__frame % self.window_size
+        self.__frame += 1
+        self.__centers[row] = np.nan
+        self.__side_lengths_px[row] = np.nan
+        # Match all detections against all corner marker Ids at once (detections x corners)
+        matches = ids[:, None] == self.corner_marker_ids[None, :]
+        detection_indices, corner_indices = np.nonzero(matches)
+        if not len(detection_indices):
+            return
+        marker_corners = np.array(corners[detection_indices], dtype=np.float32)
+        # Center as midpoint between diagonal corners
+        self.__centers[row, corner_indices] = (marker_corners[:, 0] + marker_corners[:, 2]) * 0.5
+        sides = marker_corners - np.roll(marker_corners, 1, axis=1)
+        self.__side_lengths_px[row, corner_indices] = np.linalg.norm(sides, axis=2).mean(axis=1)
+
+    def get_corners(self) -> VecFloat | None:
+        """Get averaged pool corners (None unless every corner marker was detected at least once)."""
+        if not self.sample_counts.all():
+            return None
+        return self.__get_mean_centers()
+
+    def get_mm_per_px(self) -> float | None:
+        """Get image scale from the averaged marker sizes."""
+        if not self.sample_counts.any():
+            return None
+        return self.marker_size_mm / float(np.nanmean(self.__side_lengths_px))
+
+    def apply(self, pool: Pool) -> bool:
+        """Set the pool's corners and scale and write them to cache."""
+        corners = self.get_corners()
+        mm_per_px = self.get_mm_per_px()
+        if corners is None or mm_per_px is None:
+            logger.warn(f'Failed detecting pool boundary: corner markers detected {self.sample_counts.tolist()} times')
+            return False
+        pool.set_corners(corners)
+        pool.set_scale(mm_per_px)
+        pool.write_constraints()
+        logger.info(
+            f'Detected pool boundary: {mm_per_px:.3f} mm/px,'
+            f' diagonal {pool.top_left_bottom_right_distance_cm:.1f}cm'
+        )
+        return True
+
+    def visualize(self, image: cv2.Mat) -> None:
+        """Render the averaged corner positions and the detection progress of every corner."""
+        counts = self.sample_counts.tolist()
+        for marker_id, center, count in zip(self.corner_marker_ids.tolist(), self.__get_mean_centers(), counts):
+            if not count:
+                continue
+            position = center.round().astype(int)
+            cv2.circle(image, position, radius=6, color=(0, 0, 255), thickness=-1)
+            cv2.putText(
+                image,
+                text=f'{marker_id}: {count}/{self.window_size}',
+                org=position + np.array([10, -10]),
+                fontFace=cv2.FONT_HERSHEY_SIMPLEX,
+                fontScale=0.6,
+                color=(0, 0, 255),
+                thickness=2,
+            )
+
+    def __get_mean_centers(self) -> VecFloat:
+        """Average the buffered centers of each corner marker (NaN if never detected)."""
+        counts = self.sample_counts
+        sums = np.nansum(self.__centers, axis=0)
+        centers: VecFloat = np.where(counts[:, None] > 0, sums / np.maximum(counts, 1)[:, None], np.nan)
+        return centers.astype(np.float32)
+
+
+def detect_pool_boundary(camera: Camera,
+                         aruco: ArUco,
+                         detector: PoolBoundaryDetector,
+                         pool: Pool,
+                         max_frames: int) -> bool:
+    """Detect the pool boundary from the camera's corrected captures and write it to cache."""
+    detector.reset()
+    for _ in range(max_frames):
+        detector.update(aruco.detect_markers(camera.wait_for_capture()))
+        if detector.is_complete:
+            break
+    return detector.apply(pool)
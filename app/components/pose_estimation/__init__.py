@@ -0,0 +1,212 @@
+"""Estimate metric ArUco marker poses in the pool frame."""
+
+import math
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.aruco import MarkerDetections
+from app.components.calibration_store import get_calibration_store
+from app.components.camera import Camera
+from app.logger import logger
+
+Vec64 = npt.NDArray[np.float64]
+
+
+def get_marker_object_points(marker_size_mm: float) -> Vec64:
+    """Get marker corners in the marker frame (corner order of the ArUco detector, z towards the camera)."""
+    half = marker_size_mm / 2
+    return np.array([[-half, half, 0], [half, half, 0], [half, -half, 0], [-half, -half, 0]], dtype=np.float64)
+
+
+def estimate_initial_poses(object_points: Vec64,
+                           image_points: Vec64) -> tuple[Vec64, Vec64, npt.NDArray[np.bool_]]:
+    """Estimate poses of many square markers at once from their plane-to-image homographies.
+
+    Takes object points (n x 4 x 3, z = 0) and normalized image points (n x 4 x 2),
+    returns rotation matrices (n x 3 x 3), translations (n x 3) and which markers have a valid estimate.
+    """
+    n = len(object_points)
+    X, Y = object_points[..., 0], object_points[..., 1]
+    x, y = image_points[..., 0], image_points[..., 1]
+    zeros, ones = np.zeros_like(X), np.ones_like(X)
+    # Direct linear transform with h33 = 1: two equations per corner (n x 8 x 8)
+    A = np.concatenate([
+        np.stack([X, Y, ones, zeros, zeros, zeros, -x * X, -x * Y], axis=-1),
+        np.stack([zeros, zeros, zeros, X, Y, ones, -y * X, -y * Y], axis=-1),
+    ], axis=1)
+    b = np.concatenate([x, y], axis=1)
+    # Degenerate quads (e.g. near-collinear corners of partial detections) have no homography:
+    # solve the others only, since a single singular system fails the entire batch
+    valid = np.isfinite(A).all(axis=(1, 2)) & np.isfinite(b).all(axis=1)
+    valid[valid] = np.linalg.cond(A[valid]) < 1 / np.finfo(np.float64).eps
+    H = np.tile(np.eye(3), (n, 1, 1))
+    H[valid] = np.concatenate(
+        [np.linalg.solve(A[valid], b[valid][..., None])[..., 0], np.ones((int(valid.sum()), 1))],
+        axis=1
+    ).reshape(-1, 3, 3)
+
+    # H ~ [r1 r2 t] for normalized image points
+    h1, h2, h3 = H[..., 0], H[..., 1], H[..., 2]
+    scale = 2 / (np.linalg.norm(h1, axis=1) + np.linalg.norm(h2, axis=1))
+    # Markers are in front of the camera
+    scale *= np.sign(h3[:, 2])
+    r1 = h1 * scale[:, None]
+    r2 = h2 * scale[:, None]
+    t = h3 * scale[:, None]
+    # Closest rotation matrices
+    U, _, Vt = np.linalg.svd(np.stack([r1, r2, np.cross(r1, r2)], axis=-1))
+    R = U @ Vt
+    # Keep proper rotations
+    R[np.linalg.det(R) < 0, :, 2] *= -1
+    return R, t, valid
+
+
+class MarkerPose():
+    """Pose of a marker in the pool frame."""
+    marker_id: int
+    rotation: Vec64
+    position_mm: Vec64
+
+    def __init__(self, marker_id: int, rotation: Vec64, position_mm: Vec64) -> None:
+        """Create marker pose from rotation matrix and position."""
+        self.marker_id = marker_id
+        self.rotation = rotation
+        self.position_mm = position_mm
+
+    @property
+    def yaw_rad(self) -> float:
+        """Rotation of the marker's x-axis around the pool's z-axis."""
+        return math.atan2(self.rotation[1, 0], self.rotation[0, 0])
+
+
+class MarkerPoseEstimator():
+    """Estimate metric marker poses in the pool frame using the camera intrinsics.
+
+    The pool frame is defined by the pose of the perspective correction marker:
+    origin at the marker's center, x-axis along its top edge, z-axis towards the camera.
+    Without a cached pool frame, poses are returned in the camera frame.
+    """
+    camera: Camera
+    marker_sizes_mm: dict[int, float]
+    default_marker_size_mm: float | None
+    corrected: bool
+    pool_rotation: Vec64 | None = None
+    pool_translation_mm: Vec64 | None = None
+    __previous: dict[int, tuple[Vec64, Vec64]]
+
+    def __init__(self,
+                 camera: Camera,
+                 marker_sizes_mm: dict[int, float] | None = None,
+                 default_marker_size_mm: float | None = None,
+                 corrected: bool = True,
+                 pool_frame_from_cache: bool = True) -> None:
+        """Create pose estimator for markers of known size.
+
+        Markers not in `marker_sizes_mm` use `default_marker_size_mm` (or are ignored if not set).
+        Set `corrected` if the detections are from perspective-corrected captures.
+        """
+        self.camera = camera
+        self.marker_sizes_mm = marker_sizes_mm or {}
+        self.default_marker_size_mm = default_marker_size_mm
+        self.corrected = corrected
+        self.__previous = {}
+        if pool_frame_from_cache:
+            store = get_calibration_store()
+            rotation = store.get_array('pool_frame_rotation')
+            translation = store.get_array('pool_frame_translation')
+            if rotation is None or translation is None:
+                logger.warn('No pool frame cached: marker poses are estimated in the camera frame')
+            else:
+                self.set_pool_frame(np.array(rotation, dtype=np.float64), np.array(translation, dtype=np.float64))
+
+    def set_pool_frame(self, rotation: Vec64, translation_mm: Vec64) -> None:
+        """Set pool frame from its pose in the camera frame."""
+        self.pool_rotation = rotation
+        self.pool_translation_mm = translation_mm
+
+    def write_pool_frame_to_cache(self, rotation: Vec64, translation_mm: Vec64) -> None:
+        """Set pool frame and write it to cache."""
+        self.set_pool_frame(rotation, translation_mm)
+        store = get_calibration_store()
+        store.set_array('pool_frame_rotation', np.array(rotation, dtype=np.float32))
+        store.set_array('pool_frame_translation', np.array(translation_mm, dtype=np.float32))
+        logger.info('Wrote pool frame to cache')
+
+    def __get_marker_size_mm(self, marker_id: int) -> float | None:
+        return self.marker_sizes_mm.get(marker_id, self.default_marker_size_mm)
+
+    def __to_undistorted(self, corners: Vec64) -> Vec64:
+        """Map corners from the corrected capture back to the undistorted capture."""
+        H = self.camera.perspective_transform_matrix
+        if not self.corrected or H is None:
+            return corners
+        points = np.concatenate([corners, np.ones((*corners.shape[:-1], 1))], axis=-1)
+        points = points @ np.linalg.inv(np.array(H, dtype=np.float64)).T
+        result: Vec64 = points[..., :2] / points[..., 2:]
+        return result
+
+    def estimate_camera_poses(self,
+                              detections: MarkerDetections,
+                              image_size: tuple[int, int]) -> dict[int, tuple[Vec64, Vec64]]:
+        """Estimate (rotation matrix, translation) of all detected markers of known size in the camera frame."""
+        if not self.camera.has_intrinsics:
+            return {}
+        corners, ids = detections
+        sizes = [self.__get_marker_size_mm(int(marker_id)) for marker_id in ids]
+        known = np.array([size is not None for size in sizes], dtype=bool)
+        if not known.any():
+            self.__previous = {}
+            return {}
+        ids = ids[known]
+        object_points = np.stack([get_marker_object_points(size) for size in sizes if size is not None])
+        width, height = image_size
+        K = self.camera.get_camera_matrix(width, height)
+
+        # Map all corners to normalized undistorted image coordinates in one pass
+        image_points = self.__to_undistorted(np.array(corners[known], dtype=np.float64))
+        normalized = (image_points - K[:2, 2]) / np.array([K[0, 0], K[1, 1]])
+        # Initial estimates for all markers from their homographies
+        R_init, t_init, valid = estimate_initial_poses(object_points, normalized)
+
+        poses: dict[int, tuple[Vec64, Vec64]] = {}
+        for i, marker_id in enumerate(ids.tolist()):
+            # Skip degenerate detections
+            if not valid[i]:
+                continue
+            # Continue from the previous pose of tracked markers for faster convergence
+            if marker_id in self.__previous:
+                rvec, tvec = self.__previous[marker_id]
+            else:
+                rvec, _ = cv2.Rodrigues(R_init[i])
+                tvec = t_init[i].reshape(3, 1)
+            # Refine the estimate (image points are already undistorted)
+            try:
+                success, rvec, tvec = cv2.solvePnP(
+                    object_points[i],
+                    image_points[i],
+                    K,
+                    None,
+                    rvec=np.array(rvec, dtype=np.float64),
+                    tvec=np.array(tvec, dtype=np.float64),
+                    useExtrinsicGuess=True,
+                    flags=cv2.SOLVEPNP_ITERATIVE
+                )
+            except cv2.error:
+                continue
+            if success and np.isfinite(rvec).all() and np.isfinite(tvec).all():
+                poses[marker_id] = (rvec, tvec)
+
+        # Forget markers that were lost
+        self.__previous = poses
+        return {marker_id: (cv2.Rodrigues(rvec)[0], tvec.ravel()) for marker_id, (rvec, tvec) in poses.items()}
+
+    def estimate(self, detections: MarkerDetections, image_size: tuple[int, int]) -> dict[int, MarkerPose]:
+        """Estimate poses of all detected markers of known size in the pool frame."""
+        poses: dict[int, MarkerPose] = {}
+        for marker_id, (rotation, translation) in self.estimate_camera_poses(detections, image_size).items():
+            # Transform from camera to pool frame
+            if self.pool_rotation is not None and self.pool_translation_mm is not None:
+                rotation = self.pool_rotation.T @ rotation
+                translation = self.pool_rotation.T @ (translation - self.pool_translation_mm)
+            poses[marker_id] = MarkerPose(marker_id, rotation, translation)
+        return poses
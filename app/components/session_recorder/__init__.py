@@ -0,0 +1,270 @@
+"""Record sessions as append-only memory-mapped columns."""
+
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from datetime import datetime
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.components.boat import Boat
+from app.components.floating_garbage import FloatingGarbage
+from app.components.helpers import create_dir_if_not_exists
+from app.components.stage_timer import StageTimer
+from app.util_types import VecFloat
+from app.logger import logger
+
+SESSION_META_FILENAME = 'session.json'
+SESSION_FORMAT_VERSION = 1
+
+# Frame state captured in the frame loop, converted to column rows by the writer thread
+FrameState = tuple[
+    float,                  # timestamp
+    VecFloat | None,        # boat center
+    VecFloat | None,        # boat direction
+    float,                  # boat velocity
+    VecFloat | None,        # marker corners
+    list[cv2.KeyPoint],     # garbage keypoints
+    VecFloat | None,        # selected garbage center
+    float | None,           # selected garbage size
+    tuple[float, ...],      # stage timings
+]
+
+
+class Column():
+    """Growable memory-mapped column of fixed-shape rows."""
+    name: str
+    path: str
+    dtype: np.dtype[np.generic]
+    row_shape: tuple[int, ...]
+    capacity: int
+    length: int = 0
+    __array: npt.NDArray[np.generic]
+
+    def __init__(self,
+                 directory: str,
+                 name: str,
+                 dtype: npt.DTypeLike,
+                 row_shape: tuple[int, ...],
+                 capacity: int) -> None:
+        """Create new column file preallocated for `capacity` rows."""
+        self.name = name
+        self.path = os.path.join(directory, f'{name}.bin')
+        self.dtype = np.dtype(dtype)
+        self.row_shape = row_shape
+        self.capacity = 0
+        self.__resize(capacity)
+
+    def append(self, row: npt.ArrayLike) -> None:
+        """Append row, doubling the preallocated file if it is full."""
+        if self.length == self.capacity:
+            self.__resize(self.capacity * 2)
+        self.__array[self.length] = row
+        self.length += 1
+
+    def flush(self) -> None:
+        """Flush written rows to disk."""
+        if isinstance(self.__array, np.memmap):
+            self.__array.flush()
+
+    def __resize(self, capacity: int) -> None:
+        """Grow column file and remap it."""
+        row_bytes = self.dtype.itemsize * math.prod(self.row_shape)
+        # Flush previous mapping before remapping the grown file
+        if self.capacity:
+            self.flush()
+        with open(self.path, 'ab') as f:
+            f.truncate(capacity * row_bytes)
+        self.__array = np.memmap(self.path, dtype=self.dtype, mode='r+', shape=(capacity, *self.row_shape))
+        self.capacity = capacity
+
+    def describe(self) -> dict[str, object]:
+        """Describe column for the session metadata."""
+        return {
+            'dtype': self.dtype.str,
+            'row_shape': list(self.row_shape),
+            'length': self.length,
+        }
+
+
+class SessionRecorder():
+    """Record boat state, marker corners, garbage keypoints and stage timings.
+
+    Each frame only appends a tuple of references to a bounded queue.
+    A background thread writes the rows to preallocated, growable memory-mapped column files
+    and periodically flushes them together with the session metadata.
+    Frames are dropped (and counted) instead of blocking the frame loop if the writer falls behind.
+    """
+    directory: str
+    stage_names: tuple[str, ...]
+    max_keypoints: int
+    flush_interval_s: float
+    dropped_frames: int = 0
+    __columns: dict[str, Column]
+    __queue: deque[FrameState]
+    __wakeup: threading.Event
+    __running: bool = True
+    __thread: threading.Thread
+
+    def __init__(self,
+                 root_directory: str,
+                 stage_names: tuple[str, ...],
+                 max_keypoints: int = 16,
+                 initial_capacity: int = 4096,
+                 flush_interval_s: float = 5,
+                 max_queue_size: int = 1024) -> None:
+        """Create new session directory and start the writer thread."""
+        self.directory = os.path.join(root_directory, datetime.now().strftime('session_%Y%m%d_%H%M%S'))
+        create_dir_if_not_exists(self.directory)
+        self.stage_names = stage_names
+        self.max_keypoints = max_keypoints
+        self.flush_interval_s = flush_interval_s
+
+        # Preallocate columns
+        columns = [
+            Column(self.directory, 'timestamp', np.float64, (), initial_capacity),
+            Column(self.directory, 'boat_center', np.float32, (2,), initial_capacity),
+            Column(self.directory, 'boat_direction', np.float32, (2,), initial_capacity),
+            Column(self.directory, 'boat_velocity_m_per_s', np.float32, (), initial_capacity),
+            Column(self.directory, 'marker_corners', np.float32, (4, 2), initial_capacity),
+            # Keypoints as (x, y, size), padded with NaN
+            Column(self.directory, 'garbage_keypoints', np.float32, (max_keypoints, 3), initial_capacity),
+            Column(self.directory, 'garbage_keypoint_count', np.uint16, (), initial_capacity),
+            # Selected garbage as (x, y, size)
+            Column(self.directory, 'garbage', np.float32, (3,), initial_capacity),
+            Column(self.directory, 'stage_timings_ms', np.float32, (len(stage_names),), initial_capacity),
+        ]
+        self.__columns = {column.name: column for column in columns}
+        self.__write_meta()
+
+        self.__queue = deque([], maxlen=max_queue_size)
+        self.__wakeup = threading.Event()
+        self.__thread = threading.Thread(target=self.__write_loop, name='session-recorder', daemon=True)
+        self.__thread.start()
+        logger.info(f'Recording session to {self.directory}')
+
+    @property
+    def queue_size(self) -> int:
+        """Number of frames waiting to be written."""
+        return len(self.__queue)
+
+    def record(self, boat: Boat, floating_garbage: FloatingGarbage, timer: StageTimer) -> None:
+        """Queue the current frame state for recording."""
+        if len(self.__queue) == self.__queue.maxlen:
+            self.dropped_frames += 1
+        self.__queue.append((
+            time.time(),
+            boat.center,
+            boat.direction,
+            boat.velocity_m_per_s,
+            boat.marker.corners,
+            floating_garbage.detector.keypoints,
+            floating_garbage.center,
+            floating_garbage.size,
+            timer.get(self.stage_names),
+        ))
+        self.__wakeup.set()
+
+    def close(self) -> None:
+        """Write remaining frames, flush all columns and stop the writer thread."""
+        self.__running = False
+        self.__wakeup.set()
+        self.__thread.join()
+        length = self.__columns['timestamp'].length
+        logger.info(f'Closed session recording {self.directory}: {length} frames, dropped {self.dropped_frames}')
+
+    def __write_loop(self) -> None:
+        """Write queued frames and flush periodically until the recorder is closed."""
+        last_flush = time.perf_counter()
+        while self.__running:
+            self.__wakeup.wait(self.flush_interval_s)
+            self.__wakeup.clear()
+            self.__write_queued()
+            if time.perf_counter() - last_flush >= self.flush_interval_s:
+                self.__flush()
+                last_flush = time.perf_counter()
+        self.__write_queued()
+        self.__flush()
+
+    def __write_queued(self) -> None:
+        """Append all queued frames to the columns."""
+        nan2 = np.full(2, np.nan, dtype=np.float32)
+        while self.__queue:
+            timestamp, center, direction, velocity, corners, keypoints, g_center, g_size, timings = \
+                self.__queue.popleft()
+            keypoint_rows = np.full((self.max_keypoints, 3), np.nan, dtype=np.float32)
+            for i, keypoint in enumerate(keypoints[:self.max_keypoints]):
+                keypoint_rows[i] = (*keypoint.pt, keypoint.size)
+            columns = self.__columns
+            columns['timestamp'].append(timestamp)
+            columns['boat_center'].append(center if center is not None else nan2)
+            columns['boat_direction'].append(direction if direction is not None else nan2)
+            columns['boat_velocity_m_per_s'].append(velocity)
+            columns['marker_corners'].append(corners if corners is not None else np.nan)
+            columns['garbage_keypoints'].append(keypoint_rows)
+            columns['garbage_keypoint_count'].append(min(len(keypoints), self.max_keypoints))
+            columns['garbage'].append(
+                (*g_center, g_size) if g_center is not None and g_size is not None else np.nan
+            )
+            columns['stage_timings_ms'].append(timings)
+
+    def __flush(self) -> None:
+        """Flush columns and metadata to disk."""
+        for column in self.__columns.values():
+            column.flush()
+        self.__write_meta()
+
+    def __write_meta(self) -> None:
+        """Atomically replace the session metadata."""
+        meta = {
+            'version': SESSION_FORMAT_VERSION,
+            'stage_names': list(self.stage_names),
+            'columns': {name: column.describe() for name, column in self.__columns.items()},
+        }
+        meta_path = os.path.join(self.directory, SESSION_META_FILENAME)
+        with open(f'{meta_path}.tmp', 'w') as f:
+            json.dump(meta, f)
+        os.replace(f'{meta_path}.tmp', meta_path)
+
+
+class Session():
+    """Recorded session opened as read-only memory maps (no copies)."""
+    directory: str
+    stage_names: list[str]
+    columns: dict[str, npt.NDArray[np.generic]]
+
+    def __init__(self, directory: str) -> None:
+        """Open recorded session for analysis."""
+        self.directory = directory
+        with open(os.path.join(directory, SESSION_META_FILENAME), 'r') as f:
+            meta = json.load(f)
+        self.stage_names = meta['stage_names']
+        self.columns = {}
+        for name, description in meta['columns'].items():
+            shape = (description['length'], *description['row_shape'])
+            dtype = np.dtype(description['dtype'])
+            # Memory-mapping empty files is not possible
+            if description['length'] == 0:
+                self.columns[name] = np.empty(shape, dtype=dtype)
+            else:
+                self.columns[name] = np.memmap(
+                    os.path.join(directory, f'{name}.bin'),
+                    dtype=dtype,
+                    mode='r',
+                    shape=shape
+                )
+
+    def __len__(self) -> int:
+        """Number of recorded frames."""
+        return len(self.columns['timestamp'])
+
+    def __getitem__(self, name: str) -> npt.NDArray[np.generic]:
+        """Get recorded column by name."""
+        return self.columns[name]
+
+    def stage_timings(self, stage_name: str) -> npt.NDArray[np.generic]:
+        """Get recorded timings of a single stage."""
+        return self.columns['stage_timings_ms'][:, self.stage_names.index(stage_name)]
@@ -0,0 +1,30 @@
+"""Measure durations of the frame loop's processing stages."""
+
+import time
+from contextlib import contextmanager
+from typing import Iterator
+
+
+class StageTimer():
+    """Measure durations of the frame loop's processing stages.
+
+    Durations are overwritten every frame, so they always describe the latest frame.
+    """
+    durations_ms: dict[str, float]
+
+    def __init__(self) -> None:
+        """Create new stage timer."""
+        self.durations_ms = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Measure the duration of the wrapped stage."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations_ms[name] = (time.perf_counter() - start) * 1000
+
+    def get(self, names: tuple[str, ...]) -> tuple[float, ...]:
+        """Get the latest durations for the given stages (NaN if never measured)."""
+        return tuple(self.durations_ms.get(name, float('nan')) for name in names)
@@ -0,0 +1,75 @@
+"""Measure application startup time."""
+
+import os
+import subprocess
+import sys
+import time
+
+# Fresh interpreters run from the repository root to import the `app` package
+ROOT_DIRECTORY = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+
+
+class ImportTiming():
+    """Import time of a single module (from `python -X importtime`)."""
+    module: str
+    self_ms: float
+    cumulative_ms: float
+
+    def __init__(self, module: str, self_ms: float, cumulative_ms: float) -> None:
+        """Create new import timing."""
+        self.module = module
+        self.self_ms = self_ms
+        self.cumulative_ms = cumulative_ms
+
+    @property
+    def package(self) -> str:
+        """Top-level package of the module."""
+        return self.module.split('.')[0]
+
+
+def measure_imports(module: str) -> list[ImportTiming]:
+    """Measure import times of a module and all its dependencies in a fresh interpreter."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        capture_output=True,
+        text=True,
+        check=True,
+        cwd=ROOT_DIRECTORY
+    )
+    timings: list[ImportTiming] = []
+    # Lines are formatted as 'import time: <self [us]> | <cumulative [us]> | <module>'
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append(ImportTiming(name.strip(), int(self_us) / 1000, int(cumulative_us) / 1000))
+    return timings
+
+
+def get_package_breakdown(timings: list[ImportTiming]) -> list[tuple[str, float]]:
+    """Sum import times per top-level package, sorted by duration."""
+    packages: dict[str, float] = {}
+    for timing in timings:
+        packages[timing.package] = packages.get(timing.package, 0) + timing.self_ms
+    return sorted(packages.items(), key=lambda item: item[1], reverse=True)
+
+
+def get_action_load_code(action: str) -> str:
+    """Get Python code loading an action (its module and all its dependencies) like the launcher does."""
+    return f'from app.actions import load_action; load_action({action!r})'
+
+
+def measure_cold_start_ms(code: str, repeat: int = 3) -> float:
+    """Measure the best wall time for starting a fresh interpreter and running the code."""
+    durations_ms: list[float] = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run([sys.executable, '-c', code], capture_output=True, check=True, cwd=ROOT_DIRECTORY)
+        durations_ms.append((time.perf_counter() - start) * 1000)
+    return min(durations_ms)
+
+
+def check_cold_start_budget(action: str, budget_ms: float) -> tuple[bool, float]:
+    """Check if a cold start up to the loaded action (launcher and action imports) stays within the budget."""
+    cold_start_ms = measure_cold_start_ms(get_action_load_code(action))
+    return cold_start_ms <= budget_ms, cold_start_ms
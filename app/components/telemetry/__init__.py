@@ -0,0 +1,190 @@
+"""Stream per-frame boat and garbage state as binary telemetry."""
+
+import math
+import socket
+import struct
+import threading
+import time
+from collections import deque
+import numpy as np
+import numpy.typing as npt
+from app.components.boat import Boat
+from app.components.floating_garbage import FloatingGarbage
+from app.logger import logger
+
+# Fixed-size little-endian telemetry record (packed, 42 bytes)
+# Positions are in pixels of the corrected capture,
+# the heading is the angle of the boat's direction vector in radians (image coordinates, y-axis down)
+TELEMETRY_RECORD = np.dtype([
+    ('frame', '<u4'),
+    ('timestamp', '<f8'),
+    ('boat_detected', 'u1'),
+    ('boat_x', '<f4'),
+    ('boat_y', '<f4'),
+    ('boat_heading', '<f4'),
+    ('boat_velocity_m_per_s', '<f4'),
+    ('garbage_detected', 'u1'),
+    ('garbage_x', '<f4'),
+    ('garbage_y', '<f4'),
+    ('garbage_size', '<f4'),
+])
+
+# Datagram header: magic bytes and number of records in the batch
+TELEMETRY_HEADER = struct.Struct('<4sH')
+TELEMETRY_MAGIC = b'SGIT'
+
+TelemetryRecords = npt.NDArray[np.void]
+RecordTuple = tuple[int, float, int, float, float, float, float, int, float, float, float]
+
+
+def encode_records(records: list[RecordTuple]) -> bytes:
+    """Encode telemetry records as a single datagram."""
+    batch = np.array(records, dtype=TELEMETRY_RECORD)
+    return TELEMETRY_HEADER.pack(TELEMETRY_MAGIC, len(batch)) + batch.tobytes()
+
+
+def decode_records(datagram: bytes) -> TelemetryRecords:
+    """Decode telemetry datagram into structured array of records."""
+    magic, count = TELEMETRY_HEADER.unpack_from(datagram)
+    if magic != TELEMETRY_MAGIC:
+        raise ValueError('Invalid telemetry datagram: unknown magic bytes')
+    payload = datagram[TELEMETRY_HEADER.size:]
+    if len(payload) != count * TELEMETRY_RECORD.itemsize:
+        raise ValueError(f'Invalid telemetry datagram: expected {count} records, got {len(payload)} bytes')
+    return np.frombuffer(payload, dtype=TELEMETRY_RECORD)
+
+
+class TelemetryPublisher():
+    """Publish per-frame telemetry records over UDP.
+
+    Publishing only appends a plain tuple to a bounded queue,
+    encoding and sending happens in batches on a background thread.
+    If the queue is full the oldest records are dropped.
+    """
+    address: tuple[str, int]
+    batch_size: int
+    flush_interval_s: float
+    dropped_records: int = 0
+    sent_records: int = 0
+    __frame: int = 0
+    __queue: deque[RecordTuple]
+    __socket: socket.socket
+    __wakeup: threading.Event
+    __running: bool = True
+    __thread: threading.Thread
+
+    def __init__(self,
+                 host: str,
+                 port: int,
+                 batch_size: int = 8,
+                 max_queue_size: int = 256,
+                 flush_interval_s: float = 0.05) -> None:
+        """Create new telemetry publisher and start its sender thread."""
+        self.address = (host, port)
+        self.batch_size = batch_size
+        self.flush_interval_s = flush_interval_s
+        self.__queue = deque([], maxlen=max_queue_size)
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__wakeup = threading.Event()
+        self.__thread = threading.Thread(target=self.__send_loop, name='telemetry', daemon=True)
+        self.__thread.start()
+        logger.info(f'Publishing telemetry to udp://{host}:{port}')
+
+    @property
+    def queue_size(self) -> int:
+        """Number of records waiting to be sent."""
+        return len(self.__queue)
+
+    def publish(self, boat: Boat, floating_garbage: FloatingGarbage) -> None:
+        """Queue the current boat and garbage state as telemetry record."""
+        self.__frame += 1
+
+        # Boat state
+        boat_center = boat.center
+        boat_direction = boat.direction
+        boat_detected = boat_center is not None and boat_direction is not None
+        boat_x, boat_y, boat_heading = math.nan, math.nan, math.nan
+        if boat_center is not None and boat_direction is not None:
+            boat_x, boat_y = float(boat_center[0]), float(boat_center[1])
+            boat_heading = math.atan2(float(boat_direction[1]), float(boat_direction[0]))
+
+        # Garbage state
+        garbage_center = floating_garbage.center
+        garbage_size = floating_garbage.size
+        garbage_detected = garbage_center is not None and garbage_size is not None
+        garbage_x, garbage_y = math.nan, math.nan
+        if garbage_center is not None:
+            garbage_x, garbage_y = float(garbage_center[0]), float(garbage_center[1])
+
+        # Drop the oldest record if the sender thread fell behind
+        if len(self.__queue) == self.__queue.maxlen:
+            self.dropped_records += 1
+        self.__queue.append((
+            self.__frame,
+            time.time(),
+            int(boat_detected),
+            boat_x,
+            boat_y,
+            boat_heading,
+            float(boat.velocity_m_per_s),
+            int(garbage_detected),
+            garbage_x,
+            garbage_y,
+            float(garbage_size) if garbage_size is not None else math.nan,
+        ))
+
+        # Wake up the sender as soon as a full batch is available
+        if len(self.__queue) >= self.batch_size:
+            self.__wakeup.set()
+
+    def close(self) -> None:
+        """Send remaining records and stop the sender thread."""
+        self.__running = False
+        self.__wakeup.set()
+        self.__thread.join()
+        self.__socket.close()
+        logger.info(f'Closed telemetry publisher: sent {self.sent_records}, dropped {self.dropped_records} records')
+
+    def __send_loop(self) -> None:
+        """Send queued records in batches until the publisher is closed."""
+        while self.__running:
+            self.__wakeup.wait(self.flush_interval_s)
+            self.__wakeup.clear()
+            self.__flush()
+        self.__flush()
+
+    def __flush(self) -> None:
+        """Send all queued records."""
+        while self.__queue:
+            batch: list[RecordTuple] = []
+            while self.__queue and len(batch) < self.batch_size:
+                batch.append(self.__queue.popleft())
+            try:
+                self.__socket.sendto(encode_records(batch), self.address)
+                self.sent_records += len(batch)
+            except OSError as e:
+                self.dropped_records += len(batch)
+                logger.warn(f'Failed sending telemetry: {e}')
+
+
+class TelemetryReceiver():
+    """Receive and decode telemetry records sent by `TelemetryPublisher`."""
+    __socket: socket.socket
+
+    def __init__(self, host: str, port: int) -> None:
+        """Create new telemetry receiver bound to the publisher address."""
+        self.__socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.__socket.bind((host, port))
+
+    def receive(self, timeout_s: float | None = None) -> TelemetryRecords:
+        """Receive the next telemetry batch (empty if timed out)."""
+        self.__socket.settimeout(timeout_s)
+        try:
+            datagram = self.__socket.recv(65535)
+        except socket.timeout:
+            return np.empty(0, dtype=TELEMETRY_RECORD)
+        return decode_records(datagram)
+
+    def close(self) -> None:
+        """Close the receiver socket."""
+        self.__socket.close()
@@ -0,0 +1,109 @@
+"""Record timestamped positions in a fixed-capacity ring buffer."""
+
+import math
+import cv2
+import numpy as np
+import numpy.typing as npt
+from app.util_types import VecFloat
+
+Vec64 = npt.NDArray[np.float64]
+
+
+class Trajectory():
+    """Fixed-capacity history of timestamped 2D positions and headings.
+
+    All samples live in preallocated arrays, the oldest samples are overwritten once the buffer is full.
+    Queries cover the samples of the last `duration_s` seconds, in chronological order.
+    """
+    capacity: int
+    __timestamps: Vec64
+    __positions: VecFloat
+    __headings: VecFloat
+    __start: int = 0
+    __length: int = 0
+
+    def __init__(self, capacity: int = 512) -> None:
+        """Create empty trajectory."""
+        self.capacity = max(1, capacity)
+        self.__timestamps = np.empty(self.capacity, dtype=np.float64)
+        self.__positions = np.empty((self.capacity, 2), dtype=np.float32)
+        self.__headings = np.empty(self.capacity, dtype=np.float32)
+
+    def __len__(self) -> int:
+        """Number of recorded samples."""
+        return self.__length
+
+    def append(self, timestamp_s: float, position: VecFloat, heading_rad: float = math.nan) -> None:
+        """Record a sample (timestamps must increase)."""
+        index = (self.__start + self.__length) % self.capacity
+        if self.__length == self.capacity:
+            # Overwrite the oldest sample
+            self.__start = (self.__start + 1) % self.capacity
+        else:
+            self.__length += 1
+        self.__timestamps[index] = timestamp_s
+        self.__positions[index] = position
+        self.__headings[index] = heading_rad
+
+    def clear(self) -> None:
+        """Discard all samples."""
+        self.__start = 0
+        self.__length = 0
+
+    def get_window(self, duration_s: float | None = None) -> tuple[Vec64, VecFloat, VecFloat]:
+        """Get (timestamps, positions, headings) of the last `duration_s` seconds (all samples if None)."""
+        indices = (self.__start + np.arange(self.__length)) % self.capacity
+        timestamps = self.__timestamps[indices]
+        if duration_s is not None and self.__length:
+            # Timestamps are sorted
+            first = int(np.searchsorted(timestamps, timestamps[-1] - duration_s, side='left'))
+            indices = indices[first:]
+            timestamps = timestamps[first:]
+        return timestamps, self.__positions[indices], self.__headings[indices]
+
+    def estimate_velocity(self, duration_s: float) -> VecFloat | None:
+        """Estimate velocity (position units per second) by a least-squares line fit over the window."""
+        coefficients = self.__fit(duration_s, degree=1)
+        if coefficients is None:
+            return None
+        # Coefficients in increasing degree (offset, velocity)
+        velocity: VecFloat = coefficients[1].astype(np.float32)
+        return velocity
+
+    def estimate_curvature(self, duration_s: float) -> float | None:
+        """Estimate signed curvature (1 / position units) at the latest sample by a least-squares parabola fit."""
+        coefficients = self.__fit(duration_s, degree=2)
+        if coefficients is None:
+            return None
+        # Time is relative to the latest sample: velocity and acceleration at t = 0
+        velocity = coefficients[1]
+        acceleration = 2 * coefficients[2]
+        speed = float(np.linalg.norm(velocity))
+        if speed < 1e-9:
+            return None
+        return float(velocity[0] * acceleration[1] - velocity[1] * acceleration[0]) / speed ** 3
+
+    def visualize(self,
+                  image: cv2.Mat,
+                  duration_s: float | None = None,
+                  color: tuple[int, int, int] = (255, 0, 0),
+                  thickness: int = 2) -> None:
+        """Render the trail of the last `duration_s` seconds with a single polyline."""
+        _, positions, _ = self.get_window(duration_s)
+        if len(positions) < 2:
+            return
+        cv2.polylines(image, [positions.round().astype(np.int32)], isClosed=False, color=color, thickness=thickness)
+
+    def __fit(self, duration_s: float, degree: int) -> Vec64 | None:
+        """Fit polynomials of both coordinates over the window (coefficients (degree + 1) x 2)."""
+        timestamps, positions, _ = self.get_window(duration_s)
+        if len(timestamps) <= degree:
+            return None
+        t = timestamps - timestamps[-1]
+        # Vandermonde matrix in increasing degree, both coordinates in a single solve
+        A = t[:, None] ** np.arange(degree + 1)[None, :]
+        coefficients, _, rank, _ = np.linalg.lstsq(A, positions.astype(np.float64), rcond=None)
+        if rank <= degree:
+            return None
+        result: Vec64 = coefficients
+        return result
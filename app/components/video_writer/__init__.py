@@ -0,0 +1,126 @@
+"""Write annotated frames to a video file in the background."""
+
+import os
+import threading
+from collections import deque
+from datetime import datetime
+import cv2
+from app.components.helpers import create_dir_if_not_exists
+from app.logger import logger
+
+# Container file extension by codec
+CODEC_EXTENSIONS: dict[str, str] = {
+    'mp4v': 'mp4',
+    'avc1': 'mp4',
+    'MJPG': 'avi',
+    'XVID': 'avi',
+}
+
+
+class AsyncVideoWriter():
+    """Encode frames to a video file on a background thread.
+
+    Writing a frame only appends its reference to a bounded queue (no copy),
+    so frames must not be modified after they were written.
+    Frames are downscaled and encoded by the writer thread (OpenCV releases the GIL while encoding).
+    Frames are dropped (and counted) instead of blocking the frame loop if the encoder falls behind.
+    """
+    path: str
+    codec: str
+    fps: float
+    scale: float
+    decimation: int
+    written_frames: int = 0
+    dropped_frames: int = 0
+    __frame_index: int = 0
+    __writer: cv2.VideoWriter | None = None
+    __size: tuple[int, int] | None = None
+    __queue: deque[cv2.Mat]
+    __wakeup: threading.Event
+    __running: bool = True
+    __thread: threading.Thread
+
+    def __init__(self,
+                 directory: str,
+                 fps: float,
+                 codec: str = 'mp4v',
+                 scale: float = 1,
+                 decimation: int = 1,
+                 max_queue_size: int = 32) -> None:
+        """Create video file and start the writer thread.
+
+        Every `decimation`-th frame is written, downscaled by `scale`.
+        `fps` is the frame rate of the written frames.
+        """
+        if len(codec) != 4:
+            raise ValueError(f'Invalid codec {codec}: expected a FOURCC code (e.g. mp4v, MJPG)')
+        create_dir_if_not_exists(directory)
+        extension = CODEC_EXTENSIONS.get(codec, 'avi')
+        self.path = os.path.join(directory, datetime.now().strftime(f'video_%Y%m%d_%H%M%S.{extension}'))
+        self.codec = codec
+        self.fps = fps
+        self.scale = scale
+        self.decimation = max(1, decimation)
+
+        self.__queue = deque([], maxlen=max_queue_size)
+        self.__wakeup = threading.Event()
+        self.__thread = threading.Thread(target=self.__write_loop, name='video-writer', daemon=True)
+        self.__thread.start()
+        logger.info(f'Recording video to {self.path}')
+
+    @property
+    def queue_size(self) -> int:
+        """Number of frames waiting to be encoded."""
+        return len(self.__queue)
+
+    def write(self, image: cv2.Mat) -> None:
+        """Queue frame for encoding (skipped according to the decimation)."""
+        self.__frame_index += 1
+        if (self.__frame_index - 1) % self.decimation != 0:
+            return
+        if len(self.__queue) == self.__queue.maxlen:
+            self.dropped_frames += 1
+        self.__queue.append(image)
+        self.__wakeup.set()
+
+    def close(self) -> None:
+        """Encode remaining frames, finish the video file and stop the writer thread."""
+        self.__running = False
+        self.__wakeup.set()
+        self.__thread.join()
+        logger.info(
+            f'Closed video recording {self.path}: {self.written_frames} frames, dropped {self.dropped_frames}'
+        )
+
+    def __write_loop(self) -> None:
+        """Encode queued frames until the writer is closed."""
+        while self.__running:
+            self.__wakeup.wait(0.5)
+            self.__wakeup.clear()
+            self.__write_queued()
+        self.__write_queued()
+        if self.__writer is not None:
+            self.__writer.release()
+
+    def __write_queued(self) -> None:
+        """Downscale and encode all queued frames."""
+        while self.__queue:
+            image = self.__queue.popleft()
+            height, width = image.shape[:2]
+            # The video size is set by the first frame
+            if self.__size is None:
+                self.__size = (round(width * self.scale), round(height * self.scale))
+                self.__writer = cv2.VideoWriter(
+                    self.path,
+                    cv2.VideoWriter_fourcc(*self.codec),
+                    self.fps,
+                    self.__size
+                )
+                if not self.__writer.isOpened():
+                    logger.error(f'Failed opening video writer for {self.path} using codec {self.codec}')
+            # Frames of any other size would be skipped by the encoder
+            if (width, height) != self.__size:
+                image = cv2.resize(image, self.__size, interpolation=cv2.INTER_AREA)
+            if self.__writer is not None:
+                self.__writer.write(image)
+            self.written_frames += 1
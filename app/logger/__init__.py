@@ -1,8 +1,104 @@
-"""Handle app-wide logging."""
+"""Handle app-wide logging.
+
+Records are only queued by the logging thread (never blocking it),
+a background listener thread formats and writes them to the console (and optionally a JSON-lines file).
+Repeated messages from the same call site are rate limited, suppressed messages are summarized.
+"""
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import threading
 
 __logger_name = 'default'
 
+
+class RateLimitFilter(logging.Filter):
+    """Pass at most `burst` records per message key and `interval_s`.
+
+    The key is the record's `key` attribute (`logger.warn(..., extra={'key': ...})`) or its call site.
+    The next passed record of a key reports the number of suppressed records.
+    """
+    burst: int
+    interval_s: float
+    # Window start, passed and suppressed records by key
+    __windows: dict[tuple[str, int] | str, tuple[float, int, int]]
+    __lock: threading.Lock
+
+    def __init__(self, burst: int = 5, interval_s: float = 10) -> None:
+        """Create rate limit filter."""
+        super().__init__()
+        self.burst = burst
+        self.interval_s = interval_s
+        self.__windows = {}
+        self.__lock = threading.Lock()
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        """Pass or suppress record."""
+        if self.burst <= 0:
+            return True
+        key = getattr(record, 'key', None) or (record.pathname, record.lineno)
+        now = record.created
+        with self.__lock:
+            start, passed, suppressed = self.__windows.get(key, (now, 0, 0))
+            if now - start >= self.interval_s:
+                start, passed = now, 0
+            if passed >= self.burst:
+                self.__windows[key] = (start, passed, suppressed + 1)
+                return False
+            self.__windows[key] = (start, passed + 1, 0)
+        if suppressed:
+            record.msg = f'{record.getMessage()} (suppressed {suppressed} similar messages)'
+            record.args = None
+        return True
+
+    def get_suppressed(self) -> dict[tuple[str, int] | str, int]:
+        """Get number of records suppressed since the last passed record of each key."""
+        with self.__lock:
+            return {key: suppressed for key, (_, _, suppressed) in self.__windows.items() if suppressed}
+
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Queue records without ever blocking, count records dropped because the queue is full."""
+    dropped_records: int = 0
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        """Queue record or drop it."""
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped_records += 1
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as single-line JSON objects."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        """Format record as JSON."""
+        entry = {
+            'time': record.created,
+            'level': record.levelname,
+            'message': record.getMessage(),
+            'module': record.module,
+            'line': record.lineno,
+            'thread': record.threadName,
+        }
+        if getattr(record, 'key', None) is not None:
+            entry['key'] = getattr(record, 'key')
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry)
+
+
+class QueueListener(logging.handlers.QueueListener):
+    """Queue listener that waits for space in the queue when stopping."""
+
+    def enqueue_sentinel(self) -> None:
+        """Queue the stop sentinel (blocking: the queue might be full)."""
+        self.queue.put(self._sentinel)  # type: ignore[attr-defined]
+
+
 # Create app logger
 # Derived from:
 # https://docs.python.org/3/howto/logging.html#configuring-logging
@@ -17,5 +113,41 @@ __handler = logging.StreamHandler()
 __formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
 # Add formatter to handler
 __handler.setFormatter(__formatter)
-# Add handler to logger
-logger.addHandler(__handler)
+
+# Queue records in the calling thread, write them in the listener thread
+__queue: queue.Queue[logging.LogRecord] = queue.Queue(maxsize=1000)
+rate_limit_filter = RateLimitFilter()
+queue_handler = DroppingQueueHandler(__queue)
+queue_handler.addFilter(rate_limit_filter)
+logger.addHandler(queue_handler)
+__listener = QueueListener(__queue, __handler, respect_handler_level=True)
+__listener.start()
+
+
+def configure_logging(json_lines_path: str | None = None,
+                      rate_limit_burst: int = 5,
+                      rate_limit_interval_s: float = 10) -> None:
+    """Configure rate limiting and add JSON-lines file sink (if path is set)."""
+    rate_limit_filter.burst = rate_limit_burst
+    rate_limit_filter.interval_s = rate_limit_interval_s
+    if json_lines_path:
+        file_handler = logging.FileHandler(json_lines_path, encoding='utf-8')
+        file_handler.setFormatter(JsonLinesFormatter())
+        # Restart listener with the additional handler
+        global __listener
+        __listener.stop()
+        __listener = QueueListener(__queue, *__listener.handlers, file_handler, respect_handler_level=True)
+        __listener.start()
+
+
+def __shutdown() -> None:
+    """Summarize suppressed and dropped records and write all queued records."""
+    for key, suppressed in rate_limit_filter.get_suppressed().items():
+        location = f'{key[0]}:{key[1]}' if isinstance(key, tuple) else key
+        logger.info(f'Suppressed {suppressed} messages from {location}', extra={'key': f'summary:{location}'})
+    if queue_handler.dropped_records:
+        logger.warn(f'Dropped {queue_handler.dropped_records} log messages (queue full)')
+    __listener.stop()
+
+
+atexit.register(__shutdown)
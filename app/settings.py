@@ -1,17 +1,97 @@
 """Declare application settings."""
 
 import os
-from cv2 import aruco
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
 # Declare sttings
-ARUCO_DICT: int = aruco.DICT_7X7_50
+# ArUco dictionary: value of `cv2.aruco.DICT_7X7_50`, hardcoded to keep OpenCV out of the settings import
+# (tests/test_settings.py checks it against OpenCV)
+ARUCO_DICT: int = 12
 MOCK_IMAGE_PATH = os.getenv('MOCK_IMAGE_PATH') or 'app/assets/pool.jpg'
 CAMERA = int(os.getenv('CAMERA') or 0)
+USE_MOCK_CAMERA = (os.getenv('USE_MOCK_CAMERA') or 'false').lower() == 'true'
+# Camera capture format (0 or empty: driver default)
+CAMERA_WIDTH = int(os.getenv('CAMERA_WIDTH') or 0)
+CAMERA_HEIGHT = int(os.getenv('CAMERA_HEIGHT') or 0)
+CAMERA_FPS = float(os.getenv('CAMERA_FPS') or 0)
+CAMERA_FOURCC = os.getenv('CAMERA_FOURCC') or ''
+CAMERA_BUFFER_SIZE = int(os.getenv('CAMERA_BUFFER_SIZE') or 0)
+CAMERA_BACKEND = os.getenv('CAMERA_BACKEND') or 'any'
+CAMERA_DISCARD_STALE_FRAMES = (os.getenv('CAMERA_DISCARD_STALE_FRAMES') or 'false').lower() == 'true'
+# Reopen the camera without new frames for CAMERA_STALL_TIMEOUT_S (retry up to every CAMERA_RECONNECT_MAX_BACKOFF_S)
+CAMERA_STALL_TIMEOUT_S = float(os.getenv('CAMERA_STALL_TIMEOUT_S') or 2)
+CAMERA_RECONNECT_MAX_BACKOFF_S = float(os.getenv('CAMERA_RECONNECT_MAX_BACKOFF_S') or 5)
+HEADLESS = (os.getenv('HEADLESS') or 'false').lower() == 'true'
+# Target frame rate of the main loop (0: wait a fixed 15ms per frame)
+TARGET_FPS = float(os.getenv('TARGET_FPS') or 30)
 PERSPECTIVE_CORRECTION_MARKER_ID = int(os.getenv('PERSPECTIVE_CORRECTION_MARKER_ID') or 1)
 PERSPECTIVE_CORRECTION_MARKER_BUFFER_SIZE = int(os.getenv('PERSPECTIVE_CORRECTION_MARKER_BUFFER_SIZE') or 100)
+PERSPECTIVE_CORRECTION_MARKER_SIZE_MM = float(os.getenv('PERSPECTIVE_CORRECTION_MARKER_SIZE_MM') or 100)
 BOAT_MARKER_ID = int(os.getenv('BOAT_MARKER_ID') or 1)
 BOAT_MARKER_SIZE_MM = float(os.getenv('BOAT_MARKER_SIZE_MM') or 15)
+# Distance between the top-left and bottom-right pool corners
+POOL_DIAGONAL_CM = float(os.getenv('POOL_DIAGONAL_CM') or 200)
+# Marker Ids at the pool corners as 'top-left,top-right,bottom-left,bottom-right'
+POOL_CORNER_MARKER_IDS = [
+    int(marker_id) for marker_id in (os.getenv('POOL_CORNER_MARKER_IDS') or '10,11,12,13').split(',')
+]
+POOL_CORNER_MARKER_SIZE_MM = float(os.getenv('POOL_CORNER_MARKER_SIZE_MM') or 100)
+# Number of frames the corner marker positions are averaged over
+POOL_BOUNDARY_WINDOW = int(os.getenv('POOL_BOUNDARY_WINDOW') or 30)
+BOAT_MAX_SPEED_M_PER_S = float(os.getenv('BOAT_MAX_SPEED_M_PER_S') or 0.3)
+# Maximum distance between a garbage track's predicted and detected position
+GARBAGE_TRACK_GATE_PX = float(os.getenv('GARBAGE_TRACK_GATE_PX') or 50)
+# Detect garbage candidates by blob detection ('blob') or against an adaptive background model ('background')
+GARBAGE_DETECTION_MODE = os.getenv('GARBAGE_DETECTION_MODE') or 'blob'
+# Background model resolution (fraction of the capture), adaption rate per frame and foreground color difference
+BACKGROUND_MODEL_SCALE = float(os.getenv('BACKGROUND_MODEL_SCALE') or 0.25)
+BACKGROUND_MODEL_LEARNING_RATE = float(os.getenv('BACKGROUND_MODEL_LEARNING_RATE') or 0.02)
+BACKGROUND_MODEL_THRESHOLD = int(os.getenv('BACKGROUND_MODEL_THRESHOLD') or 25)
+BACKGROUND_MODEL_MIN_AREA_PX = float(os.getenv('BACKGROUND_MODEL_MIN_AREA_PX') or 50)
+# Marker Ids of additional boats as '2,3,4' (same marker size as the boat marker)
+FLEET_MARKER_IDS = [int(marker_id) for marker_id in (os.getenv('FLEET_MARKER_IDS') or '').split(',') if marker_id]
+CHARUCO_SQUARES_X = int(os.getenv('CHARUCO_SQUARES_X') or 5)
+CHARUCO_SQUARES_Y = int(os.getenv('CHARUCO_SQUARES_Y') or 7)
+CHARUCO_SQUARE_LENGTH_MM = float(os.getenv('CHARUCO_SQUARE_LENGTH_MM') or 35)
+CHARUCO_MARKER_LENGTH_MM = float(os.getenv('CHARUCO_MARKER_LENGTH_MM') or 26)
+TELEMETRY_ENABLED = (os.getenv('TELEMETRY_ENABLED') or 'false').lower() == 'true'
+TELEMETRY_HOST = os.getenv('TELEMETRY_HOST') or '127.0.0.1'
+TELEMETRY_PORT = int(os.getenv('TELEMETRY_PORT') or 5005)
+# Serve Prometheus metrics at http://METRICS_HOST:METRICS_PORT/metrics
+METRICS_ENABLED = (os.getenv('METRICS_ENABLED') or 'false').lower() == 'true'
+METRICS_HOST = os.getenv('METRICS_HOST') or '127.0.0.1'
+METRICS_PORT = int(os.getenv('METRICS_PORT') or 9464)
+RECORD_SESSION = (os.getenv('RECORD_SESSION') or 'false').lower() == 'true'
+SESSION_DIRECTORY = os.getenv('SESSION_DIRECTORY') or 'app/out/sessions'
+RECORD_VIDEO = (os.getenv('RECORD_VIDEO') or 'false').lower() == 'true'
+VIDEO_DIRECTORY = os.getenv('VIDEO_DIRECTORY') or 'app/out/videos'
+VIDEO_CODEC = os.getenv('VIDEO_CODEC') or 'mp4v'
+VIDEO_FPS = float(os.getenv('VIDEO_FPS') or 30)
+VIDEO_SCALE = float(os.getenv('VIDEO_SCALE') or 0.5)
+VIDEO_DECIMATION = int(os.getenv('VIDEO_DECIMATION') or 1)
+# Coverage heatmap grid width in cells and half-life of its decay (0: never)
+COVERAGE_GRID_WIDTH = int(os.getenv('COVERAGE_GRID_WIDTH') or 200)
+COVERAGE_BOAT_RADIUS_CM = float(os.getenv('COVERAGE_BOAT_RADIUS_CM') or 15)
+COVERAGE_HALF_LIFE_S = float(os.getenv('COVERAGE_HALF_LIFE_S') or 0)
+COVERAGE_DIRECTORY = os.getenv('COVERAGE_DIRECTORY') or 'app/out/coverage'
+# Export the coverage heatmaps when the autonomous action ends
+COVERAGE_EXPORT = (os.getenv('COVERAGE_EXPORT') or 'false').lower() == 'true'
+# Structured JSON-lines log file (empty: console only)
+LOG_FILE = os.getenv('LOG_FILE') or ''
+# Log at most LOG_RATE_LIMIT_BURST messages per call site and LOG_RATE_LIMIT_INTERVAL_S (0: unlimited)
+LOG_RATE_LIMIT_BURST = int(os.getenv('LOG_RATE_LIMIT_BURST') or 5)
+LOG_RATE_LIMIT_INTERVAL_S = float(os.getenv('LOG_RATE_LIMIT_INTERVAL_S') or 10)
+BLOB_TUNING_LABELS_PATH = os.getenv('BLOB_TUNING_LABELS_PATH') or 'app/assets/blob_detection_labels.json'
+MOTION_GATE_ENABLED = (os.getenv('MOTION_GATE_ENABLED') or 'false').lower() == 'true'
+MOTION_GATE_PIXEL_THRESHOLD = int(os.getenv('MOTION_GATE_PIXEL_THRESHOLD') or 15)
+MOTION_GATE_CHANGED_FRACTION = float(os.getenv('MOTION_GATE_CHANGED_FRACTION') or 0.002)
+MOTION_GATE_MAX_SKIP_S = float(os.getenv('MOTION_GATE_MAX_SKIP_S') or 1)
+# Normalized regions as 'x,y,width,height;x,y,width,height' (empty: entire frame)
+MOTION_GATE_REGIONS = [
+    tuple(float(v) for v in region.split(','))
+    for region in (os.getenv('MOTION_GATE_REGIONS') or '').split(';') if region
+]
+STARTUP_BUDGET_MS = float(os.getenv('STARTUP_BUDGET_MS') or 500)
@@ -5,8 +5,66 @@ set -e
 echo \
 "MOCK_IMAGE_PATH=app/assets/pool.jpg
 CAMERA=0
+USE_MOCK_CAMERA=false
+CAMERA_WIDTH=0
+CAMERA_HEIGHT=0
+CAMERA_FPS=0
+CAMERA_FOURCC=
+CAMERA_BUFFER_SIZE=0
+CAMERA_BACKEND=any
+CAMERA_DISCARD_STALE_FRAMES=false
+CAMERA_STALL_TIMEOUT_S=2
+CAMERA_RECONNECT_MAX_BACKOFF_S=5
+HEADLESS=false
+TARGET_FPS=30
 PERSPECTIVE_CORRECTION_MARKER_ID=1
 PERSPECTIVE_CORRECTION_MARKER_BUFFER_SIZE=100
+PERSPECTIVE_CORRECTION_MARKER_SIZE_MM=100
 BOAT_MARKER_ID=1
-BOAT_MARKER_SIZE_MM=15" \
+BOAT_MARKER_SIZE_MM=15
+BOAT_MAX_SPEED_M_PER_S=0.3
+GARBAGE_TRACK_GATE_PX=50
+GARBAGE_DETECTION_MODE=blob
+BACKGROUND_MODEL_SCALE=0.25
+BACKGROUND_MODEL_LEARNING_RATE=0.02
+BACKGROUND_MODEL_THRESHOLD=25
+BACKGROUND_MODEL_MIN_AREA_PX=50
+FLEET_MARKER_IDS=
+POOL_DIAGONAL_CM=200
+POOL_CORNER_MARKER_IDS=10,11,12,13
+POOL_CORNER_MARKER_SIZE_MM=100
+POOL_BOUNDARY_WINDOW=30
+CHARUCO_SQUARES_X=5
+CHARUCO_SQUARES_Y=7
+CHARUCO_SQUARE_LENGTH_MM=35
+CHARUCO_MARKER_LENGTH_MM=26
+TELEMETRY_ENABLED=false
+TELEMETRY_HOST=127.0.0.1
+TELEMETRY_PORT=5005
+METRICS_ENABLED=false
+METRICS_HOST=127.0.0.1
+METRICS_PORT=9464
+RECORD_SESSION=false
+SESSION_DIRECTORY=app/out/sessions
+RECORD_VIDEO=false
+VIDEO_DIRECTORY=app/out/videos
+VIDEO_CODEC=mp4v
+VIDEO_FPS=30
+VIDEO_SCALE=0.5
+VIDEO_DECIMATION=1
+COVERAGE_GRID_WIDTH=200
+COVERAGE_BOAT_RADIUS_CM=15
+COVERAGE_HALF_LIFE_S=0
+COVERAGE_DIRECTORY=app/out/coverage
+COVERAGE_EXPORT=false
+LOG_FILE=
+LOG_RATE_LIMIT_BURST=5
+LOG_RATE_LIMIT_INTERVAL_S=10
+BLOB_TUNING_LABELS_PATH=app/assets/blob_detection_labels.json
+MOTION_GATE_ENABLED=false
+MOTION_GATE_PIXEL_THRESHOLD=15
+MOTION_GATE_CHANGED_FRACTION=0.002
+MOTION_GATE_MAX_SKIP_S=1
+MOTION_GATE_REGIONS=
+STARTUP_BUDGET_MS=500" \
 > .env
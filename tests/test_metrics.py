@@ -0,0 +1,42 @@
+"""Test metrics formatting."""
+
+import math
+from app.components.metrics import MetricsSnapshot, format_metrics, format_value
+
+
+def create_snapshot(frames: int) -> MetricsSnapshot:
+    """Create snapshot with `frames` captured and processed frames, all in the first latency bucket."""
+    return MetricsSnapshot(
+        timestamp_s=0,
+        frames_captured=frames,
+        frames_processed=frames,
+        boat_marker_hits=frames,
+        boat_velocity_m_per_s=0.123456789,
+        fleet_boats_detected=0,
+        garbage_candidates=0,
+        garbage_candidates_total=frames * 40 + 3,
+        dropped=(('camera', 0),),
+        queue_depths=(('log', 0),),
+        stages=('capture',),
+        stage_bucket_counts=((frames, 0, 0, 0, 0, 0, 0, 0, 0, 0, 1),),
+        stage_sums_s=(1234.5678901234,),
+    )
+
+
+def test_counters_above_one_million_are_exact() -> None:
+    """Counters are not rounded to 6 significant digits."""
+    lines = format_metrics(create_snapshot(1234567)).splitlines()
+    assert 'sgi_frames_captured_total 1234567' in lines
+    assert 'sgi_garbage_candidates_total 49382683' in lines
+    assert 'sgi_stage_duration_seconds_bucket{stage="capture",le="0.001"} 1234567' in lines
+    assert 'sgi_stage_duration_seconds_count{stage="capture"} 1234568' in lines
+    assert 'sgi_stage_duration_seconds_sum{stage="capture"} 1234.5678901234' in lines
+    assert 'sgi_boat_velocity_meters_per_second 0.123456789' in lines
+
+
+def test_special_float_values() -> None:
+    """Not-a-number and infinite values use the exposition format's spelling."""
+    assert format_value(math.nan) == 'NaN'
+    assert format_value(math.inf) == '+Inf'
+    assert format_value(-math.inf) == '-Inf'
+    assert 'sgi_boat_marker_hit_ratio NaN' in format_metrics(create_snapshot(0)).splitlines()
@@ -0,0 +1,9 @@
+"""Test application settings."""
+
+from cv2 import aruco
+from app.settings import ARUCO_DICT
+
+
+def test_aruco_dict_is_7x7_50() -> None:
+    """The hardcoded ArUco dictionary matches OpenCV's `DICT_7X7_50`."""
+    assert ARUCO_DICT == aruco.DICT_7X7_50
@@ -0,0 +1,19 @@
+"""Test application startup time."""
+
+from app.actions import actions
+from app.actions.report_startup_time import PRODUCTION_ACTION
+from app.components.startup_report import check_cold_start_budget, measure_cold_start_ms
+from app.settings import STARTUP_BUDGET_MS
+
+
+def test_launcher_cold_start_within_budget() -> None:
+    """Starting the launcher stays within the startup budget."""
+    cold_start_ms = measure_cold_start_ms('import app')
+    assert cold_start_ms <= STARTUP_BUDGET_MS, f'Launcher cold start {cold_start_ms:.0f}ms'
+
+
+def test_production_action_cold_start_within_budget() -> None:
+    """Starting the launcher and loading the production action stays within the startup budget."""
+    assert PRODUCTION_ACTION in actions
+    within_budget, cold_start_ms = check_cold_start_budget(PRODUCTION_ACTION, STARTUP_BUDGET_MS)
+    assert within_budget, f'{PRODUCTION_ACTION} cold start {cold_start_ms:.0f}ms exceeds {STARTUP_BUDGET_MS:.0f}ms'